@@ -1,249 +1,399 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import chess
-import random
 import chess.engine
 import json
+import math
 import os
-import mysql.connector
+import time
+from functools import lru_cache
 from flask_socketio import SocketIO, emit, join_room, leave_room
-
-# Configurarea conexiunii la baza de date
-db_config = {
-    "host": "localhost",
-    "user": "root",  # Înlocuiește cu utilizatorul tău MySQL
-    "password": "12112003Ioan",  # Înlocuiește cu parola ta MySQL
-    "database": "fisher_random_chess"
-}
-
-# Creează o conexiune la baza de date
-db_connection = mysql.connector.connect(**db_config)
-db_cursor = db_connection.cursor()
-
-# Creează tabelele necesare
-def create_tables():
-    queries = [
-        """
-        CREATE TABLE IF NOT EXISTS learning_data (
-            piece CHAR(1) PRIMARY KEY,
-            value FLOAT NOT NULL
-        );
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS game_history (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            moves TEXT NOT NULL,
-            winner VARCHAR(10),
-            date_played TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-    ]
-    for query in queries:
-        db_cursor.execute(query)
-    db_connection.commit()
-
-create_tables()
+from engine import evaluation
+from engine import chess960
+from engine.analysis import analyze_many
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator
+from engine.openings import OpeningBook
+from engine.parallel import ParallelSearch, SearchPool
+from engine.search import Search, SearchLimits, SearchOptions
+from engine.tablebase import Tablebase
+from engine.transposition import TranspositionTable, invalidate_search_caches
+from utils.ai_jobs import AIJobQueue, QueueFull
+from utils.db import LearningData, WriteBehindQueue, database_from_env
+from utils.game_history import EXPORT_FORMATS, GameFilter, decode_cursor, encode_cursor, export_games, fetch_games
+from utils.game_store import DatabaseStateStore, GameNotFound, GameStore, IllegalMove, MemoryStateStore
+from utils.message_queue import socketio_queue_options
+from utils.metrics import Registry
+
+# Pool de conexiuni comun pentru toate firele serverului și coada de scrieri întârziate.
+# DB_BACKEND=sqlite folosește o bază SQLite locală (SQLITE_PATH, implicit în memorie).
+# Conexiunea și schema sunt create la prima interogare (sau cu `python -m utils.db migrate`),
+# deci importul modulului nu depinde de baza de date.
+db = database_from_env()
+db_writer = WriteBehindQueue(db)
 
 app = Flask(__name__)
 CORS(app)
 
-# Creează instanța SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Creează instanța SocketIO; cu mai multe procese, evenimentele trec prin coada SOCKETIO_MESSAGE_QUEUE
+socketio = SocketIO(app, cors_allowed_origins="*", **socketio_queue_options())
 
 # Calea către executabilul Stockfish
 
 LEARNING_DATA_FILE = "learning_data.json"
 
-# Încarcă datele de învățare din baza de date
-def load_learning_data():
-    default_data = {
-        "piece_values": {
-            "p": 1, "n": 3, "b": 3, "r": 5, "q": 9,
-            "P": 1, "N": 3, "B": 3, "R": 5, "Q": 9
-        },
-        "games_played": 0
-    }
-    for piece, value in default_data["piece_values"].items():
-        db_cursor.execute("""
-            INSERT INTO learning_data (piece, value)
-            VALUES (%s, %s)
-            ON DUPLICATE KEY UPDATE value = VALUES(value)
-        """, (piece, value))
-    db_connection.commit()
-
-    # Încarcă datele din tabel
-    db_cursor.execute("SELECT piece, value FROM learning_data")
-    rows = db_cursor.fetchall()
-    return {
-        "piece_values": {row[0]: row[1] for row in rows},
-        "games_played": 0
-    }
-
-# Salvează datele de învățare în baza de date
+# Salvează datele de învățare în baza de date (prin coada de scrieri, un singur lot)
 def save_learning_data(data):
     for piece, value in data["piece_values"].items():
-        db_cursor.execute("UPDATE learning_data SET value = %s WHERE piece = %s", (value, piece))
-    db_connection.commit()
-
-learning_data = load_learning_data()
-
-def save_game_history(moves, winner):
+        db_writer.put("UPDATE learning_data SET value = %s WHERE piece = %s", (value, piece), key=piece)
+
+# Valorile pieselor, citite din baza de date la prima mutare AI și comune tuturor firelor
+learning_data = LearningData(db, DEFAULT_PIECE_VALUES)
+
+# Tabela de transpoziții comună pentru toate căutările AI
+transposition_table = TranspositionTable()
+
+# Bugetul implicit al căutării AI și limitele acceptate de la client
+AI_MAX_DEPTH = 8
+AI_MAX_DEPTH_LIMIT = 10
+AI_TIME_LIMIT = 1.5  # secunde
+AI_TIME_LIMIT_MAX = 10.0
+AI_NODE_LIMIT_MAX = 2000000
+
+# Extensiile selective ale căutării: "all", "none" sau o listă, de exemplu "quiescence,pvs"
+AI_SEARCH_FEATURES = SearchOptions.parse(os.environ.get("AI_SEARCH_FEATURES", "all"))
+
+# Cartea de deschideri Chess960, construită cu `python -m engine.openings`
+opening_book = OpeningBook(os.environ.get("OPENING_BOOK", OpeningBook().path))
+
+# Tabelele de final KQK, KRK și KPK, generate cu `python -m engine.tablebase`
+tablebase = Tablebase(os.environ.get("TABLEBASE", Tablebase().path))
+
+# Numărul de procese pentru căutarea paralelă (0 sau 1 = căutare pe un singur proces)
+AI_WORKERS = int(os.environ.get("AI_WORKERS", "0"))
+search_pool = SearchPool(AI_WORKERS) if AI_WORKERS > 1 else None
+
+# Analiza pozițiilor (/api/analyze): procesele pool-ului (0 sau 1 = în firul cererii)
+# și limitele unei cereri; bugetul căutării este pentru fiecare poziție.
+# Fără ANALYSIS_WORKERS, analiza folosește pool-ul căutării paralele, dacă există,
+# altfel ANALYSIS_WORKERS_DEFAULT procese; cel mult câte un proces pe procesor.
+ANALYSIS_WORKERS_DEFAULT = 2
+if "ANALYSIS_WORKERS" not in os.environ and search_pool is not None:
+    ANALYSIS_WORKERS = search_pool.workers
+    analysis_pool = search_pool
+else:
+    ANALYSIS_WORKERS = min(max(int(os.environ.get("ANALYSIS_WORKERS", str(ANALYSIS_WORKERS_DEFAULT))), 0),
+                           os.cpu_count() or 1)
+    analysis_pool = SearchPool(ANALYSIS_WORKERS) if ANALYSIS_WORKERS > 1 else None
+ANALYZE_MAX_POSITIONS = int(os.environ.get("ANALYZE_MAX_POSITIONS", "10000"))
+ANALYZE_MAX_MULTIPV = 10
+
+# Istoricul jocurilor (/api/games): mărimea implicită și maximă a unei pagini
+GAMES_PAGE_SIZE = 100
+GAMES_PAGE_MAX = 1000
+
+# Numărul de poziții păstrate în cache-ul mutărilor legale
+LEGAL_MOVES_CACHE_SIZE = int(os.environ.get("LEGAL_MOVES_CACHE_SIZE", "4096"))
+
+# Mutările AI din fundal: fire de execuție și locuri în coadă
+AI_JOB_WORKERS = int(os.environ.get("AI_JOB_WORKERS", "2"))
+AI_JOB_QUEUE_SIZE = int(os.environ.get("AI_JOB_QUEUE_SIZE", "32"))
+
+# Procesele în care rulează căutarea mutărilor AI din fundal când ea nu este deja
+# paralelă (AI_WORKERS <= 1), ca firele serverului să nu împartă procesorul (GIL-ul)
+# cu căutarea; firele jobului doar așteaptă rezultatul. 0 = căutare în firul jobului.
+AI_JOB_PROCESSES = int(os.environ.get("AI_JOB_PROCESSES", str(AI_JOB_WORKERS)))
+ai_job_pool = SearchPool(AI_JOB_PROCESSES) if search_pool is None and AI_JOB_PROCESSES > 0 else None
+
+# Metricile procesului, exportate pe /api/metrics
+metrics = Registry()
+http_requests_total = metrics.counter(
+    "http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("route", "method"))
+ai_searches_total = metrics.counter("ai_searches_total", "AI move searches.")
+ai_book_moves_total = metrics.counter("ai_book_moves_total", "AI moves taken from the opening book.")
+ai_tablebase_moves_total = metrics.counter("ai_tablebase_moves_total", "AI moves taken from the endgame tablebases.")
+ai_search_nodes_total = metrics.counter("ai_search_nodes_total", "Nodes visited by AI searches.")
+ai_search_seconds = metrics.histogram("ai_search_duration_seconds", "AI search time.")
+ai_search_depth = metrics.histogram("ai_search_depth", "Depth of the last completed iteration.",
+                                    buckets=range(1, AI_MAX_DEPTH_LIMIT + 1))
+analysis_positions_total = metrics.counter("analysis_positions_total", "Positions analyzed by /api/analyze.")
+multiplayer_resyncs_total = metrics.counter("multiplayer_resyncs_total", "Resync requests after a missed move delta.")
+metrics.gauge("transposition_table_entries", "Entries in the shared transposition table.",
+              lambda: len(transposition_table))
+metrics.counter_func("legal_moves_cache_hits_total", "Legal move map cache hits.",
+                     lambda: _legal_move_map.cache_info().hits)
+metrics.counter_func("legal_moves_cache_misses_total", "Legal move map cache misses.",
+                     lambda: _legal_move_map.cache_info().misses)
+metrics.counter_func("transposition_table_hits_total", "Transposition table probe hits.",
+                     lambda: transposition_table.total_hits)
+metrics.counter_func("transposition_table_misses_total", "Transposition table probe misses.",
+                     lambda: transposition_table.total_misses)
+metrics.gauge("multiplayer_games_in_memory", "Live multiplayer games held in memory.",
+              lambda: len(multiplayer_games))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        http_request_seconds.observe(time.perf_counter() - started, route=route, method=request.method)
+        http_requests_total.inc(route=route, method=request.method, status=response.status_code)
+    return response
+
+def save_game_history(moves, winner, start_fen=None):
     try:
         print(f"Saving game history: moves={moves}, winner={winner}")  # Debugging
-        db_cursor.execute(
-            "INSERT INTO game_history (moves, winner) VALUES (%s, %s)",
-            (json.dumps(moves), winner)
+        db_writer.put(
+            "INSERT INTO game_history (moves, winner, start_fen) VALUES (%s, %s, %s)",
+            (json.dumps(moves), winner, start_fen)
         )
-        db_connection.commit()
     except Exception as e:
         print(f"Error saving game history: {e}")  # Debugging
 
-def generate_random_setup():
-    while True:
-        pieces = ['r', 'n', 'b', 'q', 'k', 'b', 'n', 'r']
-        random.shuffle(pieces)
-
-        bishop_indices = [i for i, p in enumerate(pieces) if p == 'b']
-        if bishop_indices[0] % 2 == bishop_indices[1] % 2:
-            continue
-
-        rook_indices = [i for i, p in enumerate(pieces) if p == 'r']
-        king_index = pieces.index('k')
-        if not (min(rook_indices) < king_index < max(rook_indices)):
-            continue
+def generate_random_setup(index=None):
+    """
+    Poziția de start Chess960 cu numărul `index` (0-959), aleatorie dacă lipsește.
+    """
+    return chess960.start_fen(index)
 
-        break
+def requested_position_index():
+    """
+    Numărul poziției Chess960 cerut prin parametrul `index`, sau None.
+    """
+    index = request.args.get('index')
+    return int(index) if index is not None else None
+
+def _position_key(fen):
+    # Contoarele de mutări din FEN nu schimbă mutările legale
+    return " ".join(fen.split()[:4])
+
+@lru_cache(maxsize=LEGAL_MOVES_CACHE_SIZE)
+def _legal_move_map(position):
+    board = chess960.make_board(position)
+    moves = {}
+    promotions = []
+    castling = []
+    for move in board.legal_moves:
+        from_name = chess.SQUARE_NAMES[move.from_square]
+        targets = moves.setdefault(from_name, [])
+        if move.promotion:
+            promotions.append(move.uci())
+        if board.is_castling(move):
+            # În Chess960 rocada este codificată ca „regele ia turnul”; regele
+            # poate fi lăsat fie pe turn, fie pe pătratul său final.
+            king_to, rook_to = chess960.castling_destinations(move)
+            castling.append({
+                "uci": move.uci(),
+                "king_from": from_name,
+                "king_to": chess.SQUARE_NAMES[king_to],
+                "rook_from": chess.SQUARE_NAMES[move.to_square],
+                "rook_to": chess.SQUARE_NAMES[rook_to]
+            })
+            for target in (move.to_square, king_to):
+                if chess.SQUARE_NAMES[target] not in targets:
+                    targets.append(chess.SQUARE_NAMES[target])
+        elif chess.SQUARE_NAMES[move.to_square] not in targets:
+            targets.append(chess.SQUARE_NAMES[move.to_square])
+    return {
+        "moves": moves,
+        "promotions": promotions,
+        "castling": castling,
+        "turn": "w" if board.turn else "b"
+    }
 
-    white_back_rank = ''.join(pieces).upper()
-    black_back_rank = ''.join(pieces).lower()
-    fen = f"{black_back_rank}/pppppppp/8/8/8/8/PPPPPPPP/{white_back_rank} w - - 0 1"
-    return fen
+def get_legal_move_map(fen):
+    """
+    Toate mutările legale ale poziției: pătrat de plecare -> pătrate de sosire,
+    plus promovările și rocadele. Rezultatul este păstrat într-un cache LRU
+    după poziție și nu trebuie modificat.
+    """
+    return _legal_move_map(_position_key(fen))
 
 def get_legal_moves(fen, square):
-    board = chess.Board(fen)
-    legal_moves = []
-    for move in board.legal_moves:
-        if move.from_square == chess.SQUARE_NAMES.index(square):
-            legal_moves.append(chess.SQUARE_NAMES[move.to_square])
-    return legal_moves
+    return get_legal_move_map(fen)["moves"].get(square, [])
 
 def evaluate_board(board):
     """
-    Evaluează tabla de șah pe baza valorii pieselor, controlului centrului și siguranței regelui.
+    Evaluează tabla de șah cu valorile curente ale pieselor.
     """
-    piece_values = learning_data["piece_values"]
-    score = 0
-
-    # Valoarea pieselor
-    for square, piece in board.piece_map().items():
-        value = piece_values.get(piece.symbol(), 0)
-        score += value if piece.color == chess.WHITE else -value
-
-    # Controlul centrului
-    center_squares = [chess.D4, chess.D5, chess.E4, chess.E5]
-    for square in center_squares:
-        if board.piece_at(square):
-            piece = board.piece_at(square)
-            score += 0.5 if piece.color == chess.WHITE else -0.5
-
-    # Mobilitatea
-    score += 0.1 * len(list(board.legal_moves)) if board.turn == chess.WHITE else -0.1 * len(list(board.legal_moves))
-
-    # Siguranța regelui
-    if board.is_check():
-        score -= 1 if board.turn == chess.WHITE else -1
+    return evaluation.evaluate_board(board, learning_data.piece_values)
 
-    return score
-
-def minimax(board, depth, alpha, beta, is_maximizing):
+def find_ai_move(board, depth=AI_MAX_DEPTH, time_limit=AI_TIME_LIMIT, node_limit=None, stop_event=None, pool=None):
     """
-    Algoritmul Minimax cu Alpha-Beta Pruning.
+    Găsește cea mai bună mutare pentru AI prin adâncire iterativă până la
+    adâncimea `depth`, în limita bugetului de timp (secunde) și de noduri.
+    Cu AI_WORKERS > 1 căutarea este împărțită între procesele din `search_pool`
+    (sau din `pool`, dacă este dat).
+    `stop_event` permite anularea căutării (mutările AI din fundal).
+    Tabela de transpoziții se păstrează între cereri, deci mutările
+    consecutive din același joc refolosesc pozițiile deja căutate.
+    Pozițiile din cartea de deschideri și din tabelele de final nu mai sunt căutate.
+    Returnează (mutare, statisticile căutării).
     """
-    if depth == 0 or board.is_game_over():
-        return evaluate_board(board)
-
-    if is_maximizing:
-        max_eval = float('-inf')
-        for move in board.legal_moves:
-            board.push(move)
-            eval = minimax(board, depth - 1, alpha, beta, False)
-            board.pop()
-            max_eval = max(max_eval, eval)
-            alpha = max(alpha, eval)
-            if beta <= alpha:
-                break
-        return max_eval
+    book_move = opening_book.lookup(board, learning_data.piece_values)
+    if book_move:
+        print(f"AI move: {book_move.uci()} (opening book)")  # Debugging
+        ai_book_moves_total.inc()
+        return book_move, {"source": "book"}
+
+    tablebase_result = tablebase.best_move(board)
+    if tablebase_result:
+        tablebase_move, score = tablebase_result
+        print(f"AI move: {tablebase_move.uci()} (tablebase, score {score})")  # Debugging
+        ai_tablebase_moves_total.inc()
+        return tablebase_move, {"source": "tablebase"}
+
+    limits = SearchLimits(depth, time_limit, node_limit, stop_event)
+    pool = pool or search_pool
+    if pool is not None:
+        search = ParallelSearch(pool, learning_data.piece_values, transposition_table, limits,
+                                AI_SEARCH_FEATURES, tablebase)
     else:
-        min_eval = float('inf')
-        for move in board.legal_moves:
-            board.push(move)
-            eval = minimax(board, depth - 1, alpha, beta, True)
-            board.pop()
-            min_eval = min(min_eval, eval)
-            beta = min(beta, eval)
-            if beta <= alpha:
-                break
-        return min_eval
-
-def make_ai_move(board, depth=3):
-    """
-    Găsește cea mai bună mutare pentru AI folosind Minimax cu Alpha-Beta Pruning.
-    """
-    best_move = None
-    best_value = float('-inf')
-    for move in board.legal_moves:
-        board.push(move)
-        board_value = minimax(board, depth - 1, float('-inf'), float('inf'), False)
-        board.pop()
-        if board_value > best_value:
-            best_value = board_value
-            best_move = move
+        evaluator = IncrementalEvaluator(learning_data.piece_values)
+        search = Search(evaluator, transposition_table, limits, AI_SEARCH_FEATURES, tablebase)
+    best_move, _ = search.iterative_deepening(board)
+    stats = search.stats()
+    stats["source"] = "search"
+    ai_searches_total.inc()
+    ai_search_nodes_total.inc(stats["nodes"])
+    ai_search_seconds.observe(stats["elapsed"])
+    ai_search_depth.observe(stats["depth"])
     if best_move:
-        print(f"AI move: {best_move.uci()}")  # Debugging
-    return best_move
-
-def calculate_score(captured_pieces):
-    piece_values = {
-        'p': 1, 'n': 3, 'b': 3, 'r': 5, 'q': 9,
-        'P': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9
-    }
-    return sum([piece_values.get(piece.lower(), 0) for piece in captured_pieces])
+        print(f"AI move: {best_move.uci()} (depth {search.depth_reached}, {search.nodes} nodes)")  # Debugging
+    return best_move, stats
 
-def update_learning_data(winner):
+def make_ai_move(board, depth=AI_MAX_DEPTH, time_limit=AI_TIME_LIMIT, node_limit=None, stop_event=None):
     """
-    Actualizează valorile pieselor în funcție de rezultatul jocului.
+    Găsește cea mai bună mutare pentru AI (vezi `find_ai_move`).
     """
-    global captured_by_white, captured_by_black
-    if winner == "white":  # AI-ul a câștigat
-        for piece in captured_by_black:
-            learning_data["piece_values"][piece.lower()] += 0.1
-    elif winner == "black":  # AI-ul a pierdut
-        for piece in captured_by_white:
-            learning_data["piece_values"][piece.lower()] -= 0.1
+    return find_ai_move(board, depth, time_limit, node_limit, stop_event)[0]
 
-    # Normalizează valorile pentru a evita creșteri/scăderi excesive
-    for piece, value in learning_data["piece_values"].items():
-        learning_data["piece_values"][piece] = max(0.1, round(value, 2))
+def parse_search_limits(data):
+    """
+    Citește bugetul căutării din cererea /api/move, limitat la valorile maxime permise.
+    Valorile lipsă primesc bugetul implicit; cele invalide (0, negative, NaN) aruncă ValueError.
+    """
+    depth = data.get('depth')
+    depth = AI_MAX_DEPTH if depth is None else int(depth)
+    if depth < 1:
+        raise ValueError("depth must be at least 1")
+    time_limit = data.get('time_limit')
+    time_limit = AI_TIME_LIMIT if time_limit is None else float(time_limit)
+    if not math.isfinite(time_limit) or time_limit <= 0:
+        raise ValueError("time_limit must be a positive number of seconds")
+    node_limit = data.get('node_limit')
+    if node_limit is not None:
+        node_limit = int(node_limit)
+        if node_limit < 1:
+            raise ValueError("node_limit must be at least 1")
+        node_limit = min(node_limit, AI_NODE_LIMIT_MAX)
+    return min(depth, AI_MAX_DEPTH_LIMIT), min(time_limit, AI_TIME_LIMIT_MAX), node_limit
+
+def run_ai_job(job):
+    """
+    Calculează mutarea AI pentru un job din fundal.
+    """
+    depth, time_limit, node_limit, with_stats = job.options
+    board = job.board
+    # Căutarea rulează în procesele pool-ului; firul jobului doar așteaptă (și o poate anula între iterații)
+    ai_move, stats = find_ai_move(board, depth, time_limit, node_limit, job.cancel_event,
+                                  pool=search_pool or ai_job_pool)
+    if ai_move:
+        board.push(ai_move)
+    result = {
+        "fen": board.fen(),
+        "ai_move": ai_move.uci() if ai_move else None,
+        "turn": "w" if board.turn else "b"
+    }
+    if with_stats:
+        result["stats"] = stats
+    return result
 
-    # Crește numărul de jocuri jucate
-    learning_data["games_played"] += 1
-    db_cursor.execute("UPDATE learning_data SET value = %s WHERE piece = %s", 
-                      (learning_data["games_played"], "games_played"))
-    db_connection.commit()
+def notify_ai_job(job):
+    """
+    Trimite rezultatul jobului jucătorilor din camera jocului.
+    """
+    socketio.emit('ai_move', job.to_dict(), room=job.game_id)
 
-    save_learning_data(learning_data)
+ai_jobs = AIJobQueue(run_ai_job, notify_ai_job, workers=AI_JOB_WORKERS, max_pending=AI_JOB_QUEUE_SIZE)
 
 def determine_winner(board):
     if board.is_checkmate():
         return "white" if not board.turn else "black"  # Dacă este șah-mat, câștigătorul este adversarul
     return "draw"
 
-# Variabile globale pentru piesele capturate
-captured_by_white = []
-captured_by_black = []
+def spill_multiplayer_game(game):
+    """
+    Salvează în baza de date un joc multiplayer scos din memorie.
+    """
+    db_writer.put(db.upsert_query("multiplayer_games", ["game_id"], ["start_fen", "moves"]),
+                  (game.game_id, game.start_fen, json.dumps(game.moves)), key=game.game_id)
+
+def load_multiplayer_game(game_id):
+    """
+    Citește un joc multiplayer salvat: (fen_de_start, mutări) sau None.
+    """
+    db_writer.flush()  # jocul poate fi încă în coada de scrieri
+    rows = db.fetchall("SELECT start_fen, moves FROM multiplayer_games WHERE game_id = %s", (game_id,))
+    if not rows:
+        return None
+    return rows[0][0], json.loads(rows[0][1])
+
+def discard_multiplayer_game(game_id):
+    """
+    Șterge copia salvată a unui joc multiplayer terminat (jocul este deja în istoric).
+    """
+    db_writer.put("DELETE FROM multiplayer_games WHERE game_id = %s", (game_id,))
+
+# Stocarea jocurilor multiplayer: "local" (în proces, jocurile scoase din memorie sunt
+# salvate în baza de date), "memory" (stocare comună în proces, pentru teste) sau
+# "database" (comună tuturor proceselor care folosesc aceeași bază de date)
+GAME_STATE_STORE = os.environ.get("GAME_STATE_STORE", "local")
+if GAME_STATE_STORE == "local":
+    game_state_store = None
+elif GAME_STATE_STORE == "memory":
+    game_state_store = MemoryStateStore()
+elif GAME_STATE_STORE == "database":
+    game_state_store = DatabaseStateStore(db)
+else:
+    raise ValueError(f"Unknown GAME_STATE_STORE: {GAME_STATE_STORE!r} (expected local, memory or database)")
+
+# Jocurile multiplayer active, ca table vii cu tot istoricul mutărilor
+multiplayer_games = GameStore(
+    max_games=int(os.environ.get("MULTIPLAYER_MAX_GAMES", "1000")),
+    idle_timeout=int(os.environ.get("MULTIPLAYER_IDLE_TIMEOUT", "1800")),
+    spill=spill_multiplayer_game,
+    load=load_multiplayer_game,
+    discard=discard_multiplayer_game,
+    shared=game_state_store
+)
+
+def broadcast_move(game_id, seq, move, fen, turn):
+    """
+    Trimite camerei jocului doar mutarea nouă, cu numărul ei de secvență.
+    Un client care vede un număr sărit cere restul mutărilor cu `resync`.
+    """
+    socketio.emit('move_delta', {"game_id": game_id, "seq": seq, "move": move, "fen": fen, "turn": turn},
+                  room=game_id)
 
-# Variabile globale pentru jocurile multiplayer
-multiplayer_games = {}
+def game_state_message(game, since=0):
+    """
+    Starea jocului pentru un client: mutările de după `since`, poziția și
+    numărul de secvență al ultimei mutări. Se apelează cu `game.lock` ținut.
+    """
+    return {
+        "game_id": game.game_id,
+        "fen": game.fen,
+        "turn": game.turn,
+        "seq": game.seq,
+        "since": since,
+        "moves": game.moves[since:]
+    }
 
 @app.route('/')
 def index():
@@ -251,7 +401,10 @@ def index():
 
 @app.route('/api/setup', methods=['GET'])
 def setup():
-    fen = generate_random_setup()
+    try:
+        fen = generate_random_setup(requested_position_index())
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     print("Generated FEN:", fen)  # Debugging
     return jsonify(fen)
 
@@ -261,11 +414,12 @@ def move():
     fen = data['fen']
     move = f"{data['from']}{data['to']}"
     promotion = data.get('promotion', '')  # Implicit promovăm la regină dacă este cazul
-    board = chess.Board(fen)
-
     try:
+        board = chess960.make_board(fen)
+        depth, time_limit, node_limit = parse_search_limits(data)
+
         # Adaugă promovarea la mutare dacă este cazul
-        chess_move = chess.Move.from_uci(move + promotion if promotion else move)
+        chess_move = chess960.parse_move(board, move + promotion if promotion else move)
         print(f"Attempting move: {move}, Promotion: {promotion}, Current FEN: {fen}")  # Debugging
 
         if chess_move in board.legal_moves:
@@ -280,17 +434,37 @@ def move():
                     "fen": board.fen()
                 })
 
+            # Mutarea AI-ului în fundal: rezultatul vine prin Socket.IO ('ai_move')
+            # sau prin /api/move_result/<job_id>
+            if data.get('async'):
+                game_id = data.get('game_id')
+                try:
+                    job = ai_jobs.submit(str(game_id) if game_id is not None else None,
+                                         board.copy(), (depth, time_limit, node_limit, bool(data.get('stats'))))
+                except QueueFull as e:
+                    return jsonify({"status": "error", "message": str(e)}), 503
+                return jsonify({
+                    "status": "pending",
+                    "job_id": job.job_id,
+                    "game_id": job.game_id,
+                    "fen": board.fen(),
+                    "turn": "w" if board.turn else "b"
+                }), 202
+
             # Mutarea AI-ului
-            ai_move = make_ai_move(board)
+            ai_move, stats = find_ai_move(board, depth, time_limit, node_limit)
             if ai_move:
                 board.push(ai_move)
 
-            return jsonify({
+            response = {
                 "status": "success",
                 "fen": board.fen(),
                 "ai_move": ai_move.uci() if ai_move else None,
                 "turn": "w" if board.turn else "b"
-            })
+            }
+            if data.get('stats'):
+                response["stats"] = stats
+            return jsonify(response)
         else:
             print(f"Illegal move: {move}")  # Debugging
             return jsonify({"status": "error", "message": "Illegal move."}), 400
@@ -298,6 +472,65 @@ def move():
         print(f"Error processing move: {e}")  # Debugging
         return jsonify({"status": "error", "message": str(e)}), 400
 
+@app.route('/api/analyze', methods=['POST'])
+def analyze():
+    """
+    Analizează mai multe poziții într-o singură cerere: {"fens": [...], "multipv": N,
+    "depth", "time_limit", "node_limit"}, cu bugetul pentru fiecare poziție.
+    Răspunsul este NDJSON: un rând pentru fiecare poziție, în ordine, cu primele
+    N mutări și scorurile lor, trimis pe măsură ce pozițiile sunt analizate.
+    """
+    data = request.json or {}
+    fens = data.get('fens')
+    if not isinstance(fens, list) or not fens or not all(isinstance(fen, str) for fen in fens):
+        return jsonify({"status": "error", "message": "Expected a non-empty list of FEN strings in 'fens'"}), 400
+    if len(fens) > ANALYZE_MAX_POSITIONS:
+        return jsonify({"status": "error",
+                        "message": f"At most {ANALYZE_MAX_POSITIONS} positions per request"}), 413
+    try:
+        depth, time_limit, node_limit = parse_search_limits(data)
+        multipv = min(max(int(data.get('multipv') or 1), 1), ANALYZE_MAX_MULTIPV)
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    results = analyze_many(
+        fens, analysis_pool.executor if analysis_pool is not None else None, ANALYSIS_WORKERS,
+        multipv=multipv, depth=depth, time_limit=time_limit, node_limit=node_limit,
+        piece_values=dict(learning_data.piece_values), options=AI_SEARCH_FEATURES,
+        tablebase_path=tablebase.path
+    )
+
+    def generate():
+        for result in results:
+            analysis_positions_total.inc()
+            yield json.dumps(result) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+@app.route('/api/move_result/<job_id>', methods=['GET'])
+def move_result(job_id):
+    """
+    Returnează starea unei mutări AI din fundal (alternativa la Socket.IO).
+    """
+    job = ai_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/cancel_move', methods=['POST'])
+def cancel_move():
+    """
+    Anulează mutarea AI în curs pentru un joc.
+    """
+    data = request.get_json(silent=True) or {}
+    game_id = data.get('game_id')
+    if game_id is None or game_id == "":
+        return jsonify({"status": "error", "message": "game_id is required"}), 400
+    game_id = str(game_id)
+    if not ai_jobs.cancel(game_id):
+        return jsonify({"status": "error", "message": "No AI move in progress"}), 404
+    return jsonify({"status": "success", "game_id": game_id})
+
 @app.route('/api/legal_moves', methods=['POST'])
 def legal_moves():
     data = request.json
@@ -306,9 +539,77 @@ def legal_moves():
     moves = get_legal_moves(fen, square)
     return jsonify({"moves": moves})
 
+@app.route('/api/legal_move_map', methods=['POST'])
+def legal_move_map():
+    """
+    Returnează toate mutările legale ale poziției într-un singur răspuns.
+    """
+    fen = (request.get_json(silent=True) or {}).get('fen')
+    if not isinstance(fen, str):
+        return jsonify({"status": "error", "message": "Expected a FEN string in 'fen'"}), 400
+    try:
+        return jsonify(get_legal_move_map(fen))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Metricile procesului în formatul text Prometheus.
+    """
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/health/live', methods=['GET'])
+def health_live():
+    """
+    Procesul răspunde (nu verifică baza de date).
+    """
+    return jsonify({"status": "alive"})
+
+@app.route('/api/health/ready', methods=['GET'])
+def health_ready():
+    """
+    Serverul poate primi trafic: baza de date răspunde, schema există și
+    valorile pieselor sunt încărcate. Prima verificare face conectarea și migrarea.
+    """
+    checks = {}
+    try:
+        db.ping()
+        checks["database"] = "ok"
+        learning_data.piece_values  # încarcă valorile, dacă nu sunt încă încărcate
+        checks["learning_data"] = "ok"
+    except Exception as e:
+        print(f"Readiness check failed: {e}")  # Debugging
+        return jsonify({"status": "unavailable", "checks": checks, "message": str(e)}), 503
+    return jsonify({"status": "ready", "checks": checks})
+
+@app.route('/api/cache_stats', methods=['GET'])
+def cache_stats():
+    """
+    Returnează statisticile cache-ului de mutări legale și ale tabelei de transpoziții.
+    """
+    info = _legal_move_map.cache_info()
+    return jsonify({
+        "legal_moves": {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize
+        },
+        "transposition_table": {
+            "hits": transposition_table.hits,
+            "misses": transposition_table.misses,
+            "size": len(transposition_table),
+            "max_size": transposition_table.max_entries
+        }
+    })
+
 @app.route('/api/start_game', methods=['GET'])
 def start_game():
-    fen = generate_random_setup()
+    try:
+        fen = generate_random_setup(requested_position_index())
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     return jsonify({"fen": fen, "status": "success"})
 
 @app.route('/api/start_multiplayer_game', methods=['POST'])
@@ -316,14 +617,14 @@ def start_multiplayer_game():
     """
     Inițializează un joc multiplayer.
     """
-    fen = generate_random_setup()
-    game_id = random.randint(1000, 9999)  # Creează un ID unic pentru joc
-    multiplayer_games[game_id] = {
-        "fen": fen,
-        "turn": "w",
-        "moves": []
-    }
-    return jsonify({"status": "success", "game_id": game_id, "fen": fen})
+    data = request.get_json(silent=True) or {}
+    try:
+        index = data.get('position_index')
+        fen = generate_random_setup(int(index) if index is not None else None)
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    game = multiplayer_games.create_new(fen)
+    return jsonify({"status": "success", "game_id": game.game_id, "fen": fen})
 
 @app.route('/api/multiplayer_move', methods=['POST'])
 def multiplayer_move():
@@ -333,36 +634,44 @@ def multiplayer_move():
     data = request.json
     game_id = data['game_id']
     move = data['move']
-    if game_id not in multiplayer_games:
+    game = multiplayer_games.get(game_id)
+    if game is None:
         return jsonify({"status": "error", "message": "Game not found"}), 404
 
-    game = multiplayer_games[game_id]
-    board = chess.Board(game["fen"])
-
     try:
-        chess_move = chess.Move.from_uci(move)
-        if chess_move in board.legal_moves:
-            board.push(chess_move)
-            game["fen"] = board.fen()
-            game["moves"].append(move)
-            game["turn"] = "w" if board.turn else "b"
-
-            if board.is_game_over():
+        with game.lock:
+            seq = multiplayer_games.play(game, move)
+            board = game.board
+            played, fen, turn = board.peek().uci(), game.fen, game.turn
+            game_over = board.is_game_over()
+            if game_over:
                 winner = determine_winner(board)
-                return jsonify({
-                    "status": "game_over",
-                    "winner": winner,
-                    "message": f"Game over! Winner: {winner}"
-                })
-
+                save_game_history(game.moves, winner, game.start_fen)
+            else:
+                moves = game.moves
+        broadcast_move(game.game_id, seq, played, fen, turn)
+
+        if game_over:
+            socketio.emit('game_over', {"winner": winner, "fen": fen}, room=game.game_id)
+            multiplayer_games.remove(game.game_id)
             return jsonify({
-                "status": "success",
-                "fen": game["fen"],
-                "turn": game["turn"],
-                "moves": game["moves"]
+                "status": "game_over",
+                "winner": winner,
+                "message": f"Game over! Winner: {winner}"
             })
-        else:
-            return jsonify({"status": "error", "message": "Illegal move"}), 400
+
+        return jsonify({
+            "status": "success",
+            "fen": fen,
+            "turn": turn,
+            "moves": moves,
+            "seq": seq
+        })
+    except IllegalMove:
+        return jsonify({"status": "error", "message": "Illegal move"}), 400
+    except GameNotFound:
+        # Jocul a fost terminat (și șters) de alt proces
+        return jsonify({"status": "error", "message": "Game not found"}), 404
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -374,34 +683,40 @@ def join_game():
     data = request.json
     game_id = data.get('game_id')
 
-    if game_id not in multiplayer_games:
+    game = multiplayer_games.get(game_id)
+    if game is None:
         return jsonify({"status": "error", "message": "Game not found"}), 404
 
-    game = multiplayer_games[game_id]
-    return jsonify({
-        "status": "success",
-        "game_id": game_id,
-        "fen": game["fen"],
-        "moves": game["moves"],
-        "turn": game["turn"]
-    })
+    with game.lock:
+        multiplayer_games.refresh(game)
+        return jsonify({
+            "status": "success",
+            "game_id": game_id,
+            "fen": game.fen,
+            "moves": game.moves,
+            "turn": game.turn,
+            "seq": game.seq
+        })
 
 @app.route('/api/game_state/<game_id>', methods=['GET'])
 def get_game_state(game_id):
     """
     Returnează starea curentă a jocului multiplayer.
     """
-    if game_id not in multiplayer_games:
+    game = multiplayer_games.get(game_id)
+    if game is None:
         return jsonify({"status": "error", "message": "Game not found"}), 404
 
-    game = multiplayer_games[game_id]
-    return jsonify({
-        "status": "success",
-        "game_id": game_id,
-        "fen": game["fen"],
-        "turn": game["turn"],
-        "moves": game["moves"]
-    })
+    with game.lock:
+        multiplayer_games.refresh(game)
+        return jsonify({
+            "status": "success",
+            "game_id": game_id,
+            "fen": game.fen,
+            "turn": game.turn,
+            "moves": game.moves,
+            "seq": game.seq
+        })
 
 @app.route('/api/test_stockfish', methods=['GET'])
 def test_stockfish():
@@ -412,13 +727,64 @@ def test_stockfish():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
+def requested_game_filter(default_order='desc'):
+    """
+    Filtrele istoricului din parametrii cererii: winner, since, until
+    (date ISO, `until` exclusiv) și order (desc sau asc).
+    """
+    game_filter = GameFilter(request.args.get('winner') or None, request.args.get('since'),
+                             request.args.get('until'))
+    order = request.args.get('order', default_order)
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+    return game_filter, order == 'desc'
+
+@app.route('/api/games', methods=['GET'])
+def list_games():
+    """
+    O pagină din istoricul jocurilor, de la cel mai nou. Pagina următoare se
+    cere cu `cursor` = `next_cursor` din răspuns (null la ultima pagină).
+    """
+    try:
+        game_filter, descending = requested_game_filter()
+        limit = min(max(int(request.args.get('limit', GAMES_PAGE_SIZE)), 1), GAMES_PAGE_MAX)
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    db_writer.flush()  # jocurile terminate pot fi încă în coada de scrieri
+    games = fetch_games(db, game_filter, after, limit + 1, descending)
+    next_cursor = encode_cursor(games[limit - 1]) if len(games) > limit else None
+    return jsonify({"status": "success", "games": games[:limit], "next_cursor": next_cursor})
+
+@app.route('/api/games/export', methods=['GET'])
+def export_game_history():
+    """
+    Exportul istoricului (format=pgn sau jsonl), cu aceleași filtre ca /api/games,
+    implicit de la cel mai vechi joc. Răspunsul este trimis pe măsură ce
+    jocurile sunt citite, în loturi, fără a încărca tabela în memorie.
+    """
+    fmt = request.args.get('format', 'pgn')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"status": "error", "message": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        game_filter, descending = requested_game_filter('asc')
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    db_writer.flush()
+    _, mimetype, extension = EXPORT_FORMATS[fmt]
+    return Response(export_games(db, fmt, game_filter, after, descending), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename=games.{extension}"})
+
 @app.route('/api/learning_data', methods=['GET'])
 def get_learning_data():
     """
     Returnează datele de învățare curente.
     """
-    db_cursor.execute("SELECT piece, value FROM learning_data")
-    rows = db_cursor.fetchall()
+    db_writer.flush()  # include scrierile încă din coadă
+    rows = db.fetchall("SELECT piece, value FROM learning_data")
     piece_values = {row[0]: row[1] for row in rows if row[0] != "games_played"}
     games_played = next((row[1] for row in rows if row[0] == "games_played"), 0)
 
@@ -427,20 +793,25 @@ def get_learning_data():
         "games_played": games_played
     })
 
+@app.route('/api/reload_learning_data', methods=['POST'])
+def reload_learning_data():
+    """
+    Reîncarcă valorile pieselor din baza de date, după ce au fost publicate
+    de `python -m engine.tuning fit --publish`.
+    """
+    db_writer.flush()
+    piece_values = learning_data.reload()
+    invalidate_search_caches(transposition_table)
+    return jsonify({"status": "success", "piece_values": piece_values})
+
 @app.route('/api/reset_learning_data', methods=['POST'])
 def reset_learning_data():
     """
     Resetează datele de învățare la valorile inițiale.
     """
-    global learning_data
-    learning_data = {
-        "piece_values": {
-            "p": 1, "n": 3, "b": 3, "r": 5, "q": 9,
-            "P": 1, "N": 3, "B": 3, "R": 5, "Q": 9
-        },
-        "games_played": 0
-    }
-    save_learning_data(learning_data)
+    learning_data.set(DEFAULT_PIECE_VALUES)
+    save_learning_data({"piece_values": learning_data.piece_values})
+    invalidate_search_caches(transposition_table)
     return jsonify({"status": "success", "message": "Learning data reset."})
 
 @socketio.on('create_game')
@@ -448,14 +819,9 @@ def create_game():
     """
     Creează un joc multiplayer și alocă un ID unic.
     """
-    game_id = str(random.randint(1000, 9999))  # ID unic pentru joc
-    multiplayer_games[game_id] = {
-        "fen": generate_random_setup(),
-        "turn": "w",
-        "moves": []
-    }
-    join_room(game_id)
-    emit('game_created', {"game_id": game_id, "fen": multiplayer_games[game_id]["fen"]}, room=game_id)
+    game = multiplayer_games.create_new(generate_random_setup())
+    join_room(game.game_id)
+    emit('game_created', {"game_id": game.game_id, "fen": game.fen, "seq": 0}, room=game.game_id)
 
 @socketio.on('join_game')
 def join_game(data):
@@ -463,12 +829,50 @@ def join_game(data):
     Permite unui jucător să se alăture unui joc multiplayer existent.
     """
     game_id = data.get('game_id')
-    if game_id in multiplayer_games:
-        join_room(game_id)
-        emit('game_joined', {"game_id": game_id, "fen": multiplayer_games[game_id]["fen"]}, room=game_id)
+    game = multiplayer_games.get(game_id)
+    if game is not None:
+        with game.lock:
+            multiplayer_games.refresh(game)
+            state = game_state_message(game)
+        join_room(game.game_id)
+        emit('game_joined', state, room=game.game_id)
     else:
         emit('error', {"message": "Game not found."})
 
+
+@socketio.on('resync')
+def resync(data):
+    """
+    Trimite clientului mutările pe care le-a pierdut: cele de după ultimul
+    număr de secvență primit (`seq`).
+    """
+    game = multiplayer_games.get(data.get('game_id'))
+    if game is None:
+        emit('error', {"message": "Game not found."})
+        return
+    try:
+        since = int(data.get('seq') or 0)
+    except (TypeError, ValueError):
+        since = 0
+    multiplayer_resyncs_total.inc()
+    with game.lock:
+        multiplayer_games.refresh(game)
+        # Un număr necunoscut (alt joc, client repornit) primește toate mutările
+        emit('game_state', game_state_message(game, since if 0 <= since <= game.seq else 0))
+
+@socketio.on('watch_ai_game')
+def watch_ai_game(data):
+    """
+    Abonează clientul la mutările AI calculate în fundal pentru un joc.
+    """
+    game_id = (data or {}).get('game_id')
+    if game_id is None or game_id == "":
+        emit('error', {"message": "game_id is required"})
+        return
+    game_id = str(game_id)
+    join_room(game_id)
+    emit('watching_ai_game', {"game_id": game_id})
+
 @socketio.on('make_move')
 def make_move(data):
     """
@@ -477,30 +881,35 @@ def make_move(data):
     game_id = data.get('game_id')
     move = data.get('move')
 
-    if game_id not in multiplayer_games:
+    game = multiplayer_games.get(game_id)
+    if game is None:
         emit('error', {"message": "Game not found."})
         return
 
-    game = multiplayer_games[game_id]
-    board = chess.Board(game["fen"])
-
     try:
-        chess_move = chess.Move.from_uci(move)
-        if chess_move in board.legal_moves:
-            board.push(chess_move)
-            game["fen"] = board.fen()
-            game["moves"].append(move)
-            game["turn"] = "w" if board.turn else "b"
-
-            # Notifică jucătorii să sincronizeze starea jocului
-            emit('sync_game', {"game_id": game_id, "fen": game["fen"], "turn": game["turn"]}, room=game_id)
-            if board.is_game_over():
+        with game.lock:
+            seq = multiplayer_games.play(game, move)
+            board = game.board
+            played, fen, turn = board.peek().uci(), game.fen, game.turn
+            game_over = board.is_game_over()
+            if game_over:
                 winner = determine_winner(board)
-                emit('game_over', {"winner": winner, "fen": game["fen"]}, room=game_id)
-        else:
-            emit('error', {"message": "Illegal move."})
+                save_game_history(game.moves, winner, game.start_fen)
+
+        # Trimite jucătorilor doar mutarea nouă
+        broadcast_move(game.game_id, seq, played, fen, turn)
+        if game_over:
+            emit('game_over', {"winner": winner, "fen": fen}, room=game.game_id)
+            multiplayer_games.remove(game.game_id)
+    except IllegalMove:
+        emit('error', {"message": "Illegal move."})
+    except GameNotFound:
+        emit('error', {"message": "Game not found."})
     except Exception as e:
         emit('error', {"message": str(e)})
 
 if __name__ == '__main__':
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    for pool in (search_pool, ai_job_pool):
+        if pool is not None:
+            pool.warm_up()
+    socketio.run(app, host='0.0.0.0', port=int(os.environ.get("PORT", "5000")), debug=True)
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Benchmark-urile backend-ului: perft pe poziții Chess960 fixe, căutarea AI
+(noduri, noduri/s, timp pe mutare) la mai multe adâncimi pe un set fix de
+poziții și rutele /api/move și /api/legal_moves prin clientul de test Flask.
+
+Baza de date este SQLite în memorie, deci nu este nevoie de MySQL. Rulare
+(din directorul backend):
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --output new.json --compare bench.json
+
+Rezultatele sunt scrise ca JSON: `meta` (commit, versiuni) și `results`, o
+listă de {name, params, value, unit}, ca două rulări să poată fi comparate.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+# Înainte de importul aplicației: fără MySQL și fără cartea de deschideri
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("OPENING_BOOK", os.path.join(os.path.dirname(os.path.abspath(__file__)), "no-book.json"))
+os.environ.setdefault("AI_WORKERS", "0")
+
+import chess
+
+from engine import chess960
+from engine.batch import BatchEvaluator
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator, evaluate_board
+from engine.position import Position, perft as position_perft
+from engine.search import Search, SearchLimits, SearchOptions
+from engine.transposition import TranspositionTable
+
+# Pozițiile de start folosite pentru perft (numerotarea standard 0-959)
+PERFT_POSITIONS = (0, 100, 350, 518, 700, 959)
+
+# Pozițiile pentru căutare: starturi Chess960 și câteva poziții de mijloc de joc și final
+SEARCH_CORPUS = [chess960.start_fen(index) for index in (42, 518, 811)] + [
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "2r3k1/pp3ppp/2n1b3/3p4/3P4/2PB1N2/P4PPP/R5K1 b - - 0 20",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def _measure(function, repeat):
+    """Timpul median (secunde) al `repeat` apeluri."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _result(name, value, unit, **params):
+    return {"name": name, "params": params, "value": value, "unit": unit}
+
+
+def perft(board, depth):
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def bench_perft(depth):
+    """Perft cu python-chess și cu `Position` (generatorul căutării); numărul de noduri trebuie să fie același."""
+    results = []
+    for index in PERFT_POSITIONS:
+        board = chess960.make_board(chess960.start_fen(index))
+        start = time.perf_counter()
+        nodes = perft(board, depth)
+        elapsed = time.perf_counter() - start
+        position = Position.from_board(board)
+        start = time.perf_counter()
+        position_nodes = position_perft(position, depth)
+        position_elapsed = time.perf_counter() - start
+        if position_nodes != nodes:
+            raise AssertionError(f"perft mismatch for position {index}: {position_nodes} != {nodes}")
+        results.append(_result("perft.nodes", nodes, "nodes", position=index, depth=depth))
+        results.append(_result("perft.nps", round(nodes / elapsed), "nodes/s", position=index, depth=depth))
+        results.append(_result("perft.position.nps", round(nodes / position_elapsed), "nodes/s",
+                               position=index, depth=depth))
+    return results
+
+
+def bench_evaluation(repeat):
+    boards = [chess960.make_board(fen) for fen in SEARCH_CORPUS]
+    evaluator = IncrementalEvaluator(DEFAULT_PIECE_VALUES)
+
+    def reference():
+        for board in boards:
+            evaluate_board(board, DEFAULT_PIECE_VALUES)
+
+    def incremental():
+        for board in boards:
+            evaluator.reset(board)
+            evaluator.evaluate(board)
+
+    table = evaluator.square_table()
+    positions = [Position.from_board(board, table) for board in boards]
+
+    def position():
+        for item in positions:
+            evaluator.evaluate_position(item)
+
+    return [
+        _result("evaluate.reference", _measure(reference, repeat) / len(boards) * 1e6, "us/position"),
+        _result("evaluate.incremental", _measure(incremental, repeat) / len(boards) * 1e6, "us/position"),
+        _result("evaluate.position", _measure(position, repeat) / len(boards) * 1e6, "us/position"),
+    ]
+
+
+def _random_positions(count, table, seed=0):
+    """Poziții din jocuri cu mutări aleatorii de la starturi Chess960 (deschideri, mijloc de joc, finaluri)."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess960.make_board(chess960.start_fen(rng.randrange(chess960.POSITION_COUNT)))
+        while not board.is_game_over() and board.ply() < 120 and len(positions) < count:
+            positions.append(Position.from_board(board, table))
+            board.push(rng.choice(list(board.legal_moves)))
+    return positions
+
+
+def bench_batch_evaluation(batch_sizes, repeat):
+    """Evaluarea pe loturi (NumPy) față de evaluarea pe rând; scorurile trebuie să fie aceleași."""
+    evaluator = IncrementalEvaluator(DEFAULT_PIECE_VALUES)
+    batch = BatchEvaluator(evaluator)
+    positions = _random_positions(max(batch_sizes), evaluator.square_table())
+    difference = max(abs(score - evaluator.evaluate_position(position))
+                     for position, score in zip(positions, batch.evaluate_positions(positions)))
+    if difference > 1e-9:
+        raise AssertionError(f"batch evaluation differs from evaluate_position by {difference}")
+    results = []
+    for size in batch_sizes:
+        chunk = positions[:size]
+        scalar = _measure(lambda: [evaluator.evaluate_position(position) for position in chunk], repeat)
+        vectorized = _measure(lambda: batch.evaluate_positions(chunk), repeat)
+        results.append(_result("evaluate.batch.scalar", round(size / scalar), "positions/s", batch_size=size))
+        results.append(_result("evaluate.batch.numpy", round(size / vectorized), "positions/s", batch_size=size))
+    return results
+
+
+def _search(fen, limits, options):
+    search = Search(IncrementalEvaluator(DEFAULT_PIECE_VALUES), TranspositionTable(), limits, options)
+    search.iterative_deepening(chess960.make_board(fen))
+    return search
+
+
+def bench_search(max_depth, options):
+    """Fiecare poziție este căutată cu o tabelă de transpoziții nouă, fără limită de timp."""
+    results = []
+    features = str(options)
+    for depth in range(1, max_depth + 1):
+        nodes = 0
+        times = []
+        for fen in SEARCH_CORPUS:
+            search = _search(fen, SearchLimits(depth), options)
+            nodes += search.nodes
+            times.append(search.elapsed)
+        elapsed = sum(times)
+        results.append(_result("search.nodes", nodes, "nodes", depth=depth, features=features))
+        results.append(_result("search.nps", round(nodes / elapsed) if elapsed else 0, "nodes/s",
+                               depth=depth, features=features))
+        results.append(_result("search.time_to_move.mean", statistics.mean(times), "s", depth=depth, features=features))
+        results.append(_result("search.time_to_move.max", max(times), "s", depth=depth, features=features))
+    return results
+
+
+def bench_search_budget(time_limit, options):
+    """Adâncimea atinsă în bugetul de timp al unei mutări (ca /api/move)."""
+    depths = [_search(fen, SearchLimits(30, time_limit), options).depth_reached for fen in SEARCH_CORPUS]
+    return [_result("search.depth_in_budget", statistics.mean(depths), "plies",
+                    time_limit=time_limit, features=str(options))]
+
+
+def bench_routes(app_module, depth, repeat):
+    client = app_module.app.test_client()
+    board = chess960.make_board(chess960.start_fen(chess960.STANDARD_POSITION))
+    payload = {"fen": board.fen(), "from": "e2", "to": "e4", "depth": depth, "time_limit": 60}
+
+    def post_move():
+        app_module.transposition_table.clear()
+        response = client.post("/api/move", json=payload)
+        assert response.status_code == 200, response.get_json()
+
+    # O cerere pentru fiecare piesă a jucătorului la mutare, în fiecare poziție
+    squares = []
+    for fen in SEARCH_CORPUS:
+        position = chess960.make_board(fen)
+        for square in chess.SquareSet(position.occupied_co[position.turn]):
+            squares.append({"fen": fen, "square": chess.SQUARE_NAMES[square]})
+
+    def legal_moves(cold=False):
+        for request in squares:
+            if cold:
+                app_module._legal_move_map.cache_clear()
+            response = client.post("/api/legal_moves", json=request)
+            assert response.status_code == 200
+
+    # Rutele afișează mesaje de depanare la fiecare mutare
+    with contextlib.redirect_stdout(io.StringIO()):
+        move_time = _measure(post_move, repeat)
+        legal_moves()
+        warm = _measure(legal_moves, repeat)
+        cold = _measure(lambda: legal_moves(cold=True), repeat)
+    return [
+        _result("route.move", move_time * 1000, "ms/request", depth=depth),
+        _result("route.legal_moves", warm / len(squares) * 1000, "ms/request", cache="warm"),
+        _result("route.legal_moves", cold / len(squares) * 1000, "ms/request", cache="cold"),
+    ]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results, baseline):
+    """Afișează raportul față de o rulare anterioară pentru fiecare rezultat comun."""
+    previous = {_key(result): result for result in baseline["results"]}
+    print(f"\nCompared with {baseline['meta'].get('commit')}:")
+    for result in results:
+        old = previous.get(_key(result))
+        if old is None or not old["value"]:
+            continue
+        ratio = result["value"] / old["value"]
+        params = ", ".join(f"{name}={value}" for name, value in result["params"].items())
+        print(f"  {result['name']:<28} {params:<24} {old['value']:>12.4g} -> {result['value']:>12.4g} "
+              f"{result['unit']:<12} x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the backend benchmarks.")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--perft-depth", type=int, default=3)
+    parser.add_argument("--search-depth", type=int, default=4)
+    parser.add_argument("--route-depth", type=int, default=3, help="AI search depth used by /api/move")
+    parser.add_argument("--time-limit", type=float, default=1.5, help="time budget for search.depth_in_budget")
+    parser.add_argument("--features", action="append",
+                        help='search features to compare: "all", "none" or e.g. "quiescence,pvs" (repeatable)')
+    parser.add_argument("--batch-sizes", default="32,128,512,1024,4096",
+                        help="comma-separated batch sizes for the NumPy batch evaluator")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as app_module
+
+    feature_sets = [SearchOptions.parse(text) for text in (args.features or ["all"])]
+    results = []
+    for name, run in (
+        ("perft", lambda: bench_perft(args.perft_depth)),
+        ("evaluation", lambda: bench_evaluation(args.repeat)),
+        ("batch", lambda: bench_batch_evaluation([int(size) for size in args.batch_sizes.split(",")], args.repeat)),
+        ("search", lambda: [result for options in feature_sets for result in bench_search(args.search_depth, options)]),
+        ("budget", lambda: [result for options in feature_sets for result in bench_search_budget(args.time_limit, options)]),
+        ("routes", lambda: bench_routes(app_module, args.route_depth, args.repeat)),
+    ):
+        start = time.perf_counter()
+        results.extend(run())
+        print(f"{name}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "python_chess": chess.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    for result in results:
+        params = ", ".join(f"{name}={value}" for name, value in result["params"].items())
+        print(f"{result['name']:<28} {params:<24} {result['value']:>12.4g} {result['unit']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Analiza unui set de poziții: pentru fiecare FEN, primele N mutări (multi-PV)
+cu scorurile lor, fiecare poziție cu propriul buget de adâncime, timp și
+noduri. Pozițiile sunt împărțite între procesele unui pool, iar rezultatele
+sunt produse în ordinea pozițiilor, pe măsură ce sunt gata.
+
+Serverul expune analiza prin POST /api/analyze (răspuns NDJSON). Din linia de
+comandă (din directorul backend), cu un FEN pe linie:
+
+    python -m engine.analysis positions.txt --multipv 3 --depth 8 --time-limit 1 --workers 8 > results.ndjson
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import chess960
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator
+from engine.search import Search, SearchLimits, SearchOptions
+from engine.tablebase import Tablebase
+from engine.transposition import TranspositionTable
+
+# Tabela de transpoziții a fiecărei poziții analizate
+ANALYSIS_TT_ENTRIES = 100000
+
+# Câte poziții sunt trimise înainte pentru fiecare proces din pool
+IN_FLIGHT_PER_WORKER = 4
+
+# Tabelele de final ale procesului curent, deschise o singură dată
+_tablebase = None
+
+
+def _tablebase_at(path):
+    global _tablebase
+    if path is None:
+        return None
+    if _tablebase is None or _tablebase.path != path:
+        _tablebase = Tablebase(path)
+    return _tablebase
+
+
+def analyze_position(fen, multipv=1, depth=8, time_limit=None, node_limit=None, piece_values=None,
+                     options=None, tablebase_path=None):
+    """
+    Rulează și într-un proces din pool: analiza unei poziții. Scorurile sunt
+    din perspectiva albului, ca în căutare. O poziție invalidă produce un
+    rezultat cu "status": "error", fără a opri restul analizei.
+    """
+    try:
+        board = chess960.make_board(fen)
+        if not board.is_valid():
+            raise ValueError(f"Invalid position: {board.status()!r}")
+    except ValueError as e:
+        return {"fen": fen, "status": "error", "message": str(e)}
+
+    search = Search(IncrementalEvaluator(piece_values or DEFAULT_PIECE_VALUES),
+                    TranspositionTable(ANALYSIS_TT_ENTRIES), SearchLimits(depth, time_limit, node_limit),
+                    options, _tablebase_at(tablebase_path))
+    lines = search.multipv(board, multipv)
+    return {
+        "fen": board.fen(),
+        "status": "success" if lines else "game_over",
+        "turn": "w" if board.turn else "b",
+        "moves": [{"move": move.uci(), "score": round(score, 3)} for move, score in lines],
+        "stats": search.stats()
+    }
+
+
+def _future_result(index, fen, future):
+    """Rezultatul unei poziții trimise la pool; o eroare a procesului devine un rezultat cu "status": "error"."""
+    try:
+        return dict(index=index, **future.result())
+    except Exception as e:
+        return {"index": index, "fen": fen, "status": "error", "message": str(e)}
+
+
+def analyze_many(fens, executor=None, workers=1, **kwargs):
+    """
+    Generator: rezultatul fiecărei poziții din `fens`, în ordine, cu indexul
+    ei. Cu un `executor` (un pool de procese), cel mult
+    IN_FLIGHT_PER_WORKER * `workers` poziții sunt în lucru deodată; dacă
+    generatorul este închis (clientul a renunțat), pozițiile rămase sunt anulate.
+    """
+    if executor is None:
+        for index, fen in enumerate(fens):
+            yield dict(index=index, **analyze_position(fen, **kwargs))
+        return
+
+    pending = deque()
+    try:
+        for index, fen in enumerate(fens):
+            pending.append((index, fen, executor.submit(analyze_position, fen, **kwargs)))
+            if len(pending) >= IN_FLIGHT_PER_WORKER * workers:
+                yield _future_result(*pending.popleft())
+        while pending:
+            yield _future_result(*pending.popleft())
+    finally:
+        for _, _, future in pending:
+            future.cancel()
+
+
+def read_fens(lines):
+    """FEN-urile dintr-un fișier text, unul pe linie; liniile goale și comentariile (#) sunt ignorate."""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many positions and write NDJSON results.")
+    parser.add_argument("input", help='file with one FEN per line ("-" for stdin)')
+    parser.add_argument("--output", help="write the results to this file (default: stdout)")
+    parser.add_argument("--multipv", type=int, default=1, help="number of best moves per position")
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per position")
+    parser.add_argument("--node-limit", type=int, default=None, help="nodes per position")
+    parser.add_argument("--features", default="all", help='search features: "all", "none" or e.g. "quiescence,pvs"')
+    parser.add_argument("--values", help="JSON file with the piece values (default: built-in)")
+    parser.add_argument("--tablebase", default=None, help="endgame tablebase file (default: engine/data, if present)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    piece_values = DEFAULT_PIECE_VALUES
+    if args.values:
+        with open(args.values) as f:
+            piece_values = json.load(f)
+    kwargs = {
+        "multipv": max(args.multipv, 1),
+        "depth": max(args.depth, 1),
+        "time_limit": args.time_limit,
+        "node_limit": args.node_limit,
+        "piece_values": piece_values,
+        "options": SearchOptions.parse(args.features),
+        "tablebase_path": args.tablebase or Tablebase().path,
+    }
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        workers = args.workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in analyze_many(read_fens(source), executor, workers, **kwargs):
+                output.write(json.dumps(result, separators=(",", ":")) + "\n")
+                output.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Evaluarea pe loturi: multe poziții deodată, cu operații vectorizate NumPy.
+
+Pozițiile sunt codificate ca tablouri de bitboard-uri (un uint64 pentru
+fiecare cod de piesă). Materialul și bonusul de centru vin din tabela
+pătratelor evaluatorului (`IncrementalEvaluator.square_table`), citită câte
+un octet de bitboard odată. Mobilitatea este numărată din bitboard-uri pentru
+toate pozițiile odată: pozițiile cu negrul la mutare sunt oglindite pe
+verticală, ca pionii să avanseze mereu în sus, iar atacurile pieselor care
+alunecă sunt umplute (Kogge-Stone) pe toate cele 8 direcții într-un singur
+apel. Direcțiile „în jos” sunt calculate pe tabla rotită cu 180 de grade,
+unde devin direcții „în sus”, deci toate deplasările sunt la stânga.
+
+Piesele legate (doar pe linia lor) și șahul (doar regele sau piesele care
+opresc șahul) sunt tratate tot vectorizat. Pe rând, cu `Position`, sunt
+numărate doar rocada și en passant. Scorul este cel al
+`IncrementalEvaluator.evaluate_position`, până la erorile de rotunjire.
+"""
+from itertools import chain
+
+import numpy as np
+
+import chess
+
+from engine.evaluation import CHECK_PENALTY, MOBILITY_WEIGHT
+from engine.position import BACKRANKS, BLACK_OFFSET, PIECE_CODES, Position
+
+_U64 = np.uint64
+_NOT_FILE_A = chess.BB_ALL & ~chess.BB_FILE_A
+_NOT_FILE_H = chess.BB_ALL & ~chess.BB_FILE_H
+_NOT_FILE_AB = chess.BB_ALL & ~(chess.BB_FILE_A | chess.BB_FILE_B)
+_NOT_FILE_GH = chess.BB_ALL & ~(chess.BB_FILE_G | chess.BB_FILE_H)
+_U64_NOT_FILE_A = _U64(_NOT_FILE_A)
+_U64_NOT_FILE_H = _U64(_NOT_FILE_H)
+_RANK_3 = _U64(chess.BB_RANK_3)
+_RANK_8 = _U64(chess.BB_RANK_8)
+_NOT_RANK_8 = _U64(chess.BB_ALL & ~chess.BB_RANK_8)
+_ZERO = _U64(0)
+_ALL = _U64(chess.BB_ALL)
+_SEVEN, _EIGHT, _NINE = _U64(7), _U64(8), _U64(9)
+
+
+def _column(values):
+    return np.array(values, dtype=np.uint64).reshape(-1, 1)
+
+
+# Cele 8 direcții: nord, est, nord-est, nord-vest pe tabla normală, apoi sud,
+# vest, sud-vest, sud-est, care pe tabla rotită sunt aceleași 4 direcții
+_FRAME = np.array([0, 0, 0, 0, 1, 1, 1, 1])
+_DIAGONAL = np.array([0, 0, 1, 1, 0, 0, 1, 1])
+_DIRECTION_SHIFTS = [_column((8 * k, 1 * k, 9 * k, 7 * k) * 2) for k in (1, 2, 4)]
+_DIRECTION_MASKS = _column((chess.BB_ALL, _NOT_FILE_A, _NOT_FILE_A, _NOT_FILE_H) * 2)
+_KNIGHT_SHIFTS = _column((17, 15, 10, 6) * 2)
+_KNIGHT_MASKS = _column((_NOT_FILE_A, _NOT_FILE_H, _NOT_FILE_AB, _NOT_FILE_GH) * 2)
+
+# Fiecare octet cu biții în ordine inversă (pentru rotirea tablei)
+_REVERSED_BYTES = np.array([int(f"{value:08b}"[::-1], 2) for value in range(256)], dtype=np.uint8)
+
+
+def _rotate(bb):
+    """Tabla rotită cu 180 de grade: pătratul s devine 63 - s."""
+    return _REVERSED_BYTES[np.ascontiguousarray(bb).byteswap().view(np.uint8)].view(np.uint64)
+
+
+def _step(bb):
+    """Pătratele vecine pe fiecare direcție (mutările regelui)."""
+    return (bb << _DIRECTION_SHIFTS[0]) & _DIRECTION_MASKS
+
+
+def _slide(sliders, empty):
+    """Pătratele atacate pe fiecare direcție, până la primul pătrat ocupat (inclusiv)."""
+    one, two, four = _DIRECTION_SHIFTS
+    empty = empty & _DIRECTION_MASKS
+    sliders = sliders | (empty & (sliders << one))
+    empty = empty & (empty << one)
+    sliders = sliders | (empty & (sliders << two))
+    empty = empty & (empty << two)
+    sliders = sliders | (empty & (sliders << four))
+    return (sliders << one) & _DIRECTION_MASKS
+
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(bb):
+        return np.bitwise_count(bb).astype(np.int64)
+else:
+    _M1, _M2, _M4, _H01 = (_U64(0x5555555555555555), _U64(0x3333333333333333),
+                           _U64(0x0F0F0F0F0F0F0F0F), _U64(0x0101010101010101))
+
+    def _popcount(bb):
+        bb = bb - ((bb >> _U64(1)) & _M1)
+        bb = (bb & _M2) + ((bb >> _U64(2)) & _M2)
+        bb = (bb + (bb >> _U64(4))) & _M4
+        return ((bb * _H01) >> _U64(56)).astype(np.int64)
+
+
+def _pawn_moves(pushes):
+    """Numărul mutărilor de pion spre pătratele `pushes` (câte 4 pe ultimul rând, pentru promovări)."""
+    return _popcount(pushes & _NOT_RANK_8) + 4 * _popcount(pushes & _RANK_8)
+
+
+class BatchEvaluator:
+    """
+    Scorul `evaluator.evaluate_position` (un `IncrementalEvaluator`), pentru
+    liste de poziții.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        # Termenul static al fiecărui octet posibil al fiecărui bitboard (16 coduri x 8 octeți x 256)
+        table = np.asarray(evaluator.square_table(), dtype=np.float64).reshape(-1, 8, 8)
+        bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little")
+        self._byte_table = np.einsum("cbk,vk->cbv", table, bits.astype(np.float64)).reshape(-1, 256)
+        self._byte_index = np.arange(len(self._byte_table))
+
+    def static_terms(self, pieces):
+        """Materialul și centrul, din bitboard-urile (N x 16) ale pieselor."""
+        octets = pieces.astype("<u8").view(np.uint8)
+        return self._byte_table[self._byte_index, octets].sum(axis=1)
+
+    def mobility(self, positions, pieces, turn):
+        """Numărul mutărilor legale și șahul, pentru fiecare poziție."""
+        white = pieces[:, chess.PAWN:chess.KING + 1].T
+        black = pieces[:, chess.PAWN | BLACK_OFFSET:chess.KING + 1 | BLACK_OFFSET].T
+        # Rândurile: piesele proprii (pion ... rege), apoi ale adversarului; coloanele: pozițiile
+        board = np.where(turn, np.concatenate([white, black]), np.concatenate([black, white]))
+        board[:, ~turn] = board[:, ~turn].byteswap()
+        frames = np.stack([board, _rotate(board)])  # tabla normală și tabla rotită
+        pawns, kings = board[chess.PAWN - 1], board[chess.KING - 1]
+        enemy_all = np.bitwise_or.reduce(board[6:])
+        own_all = np.bitwise_or.reduce(frames[:, :6], axis=1)
+        empty = ~(own_all | np.bitwise_or.reduce(frames[:, 6:], axis=1))
+        own_all = own_all[_FRAME]
+        empty_directions = empty[_FRAME]
+
+        # Pe fiecare direcție: piesele proprii și adverse care alunecă pe ea, regele propriu
+        sliders = np.stack([frames[:, 3] | frames[:, 4], frames[:, 2] | frames[:, 4]], axis=1)[_FRAME, _DIAGONAL]
+        snipers = np.stack([frames[:, 9] | frames[:, 10], frames[:, 8] | frames[:, 10]], axis=1)[_FRAME, _DIAGONAL]
+        own_kings = frames[_FRAME, 5]
+        enemy_pawns = board[6 + chess.PAWN - 1]
+        # Atacurile adversarului trec prin pătratul regelui: regele nu scapă de șah pe aceeași linie
+        enemy_attacks, king_rays = _slide(np.stack([snipers, own_kings]),
+                                          np.stack([empty_directions | own_kings, empty_directions]))
+        enemy_attacks |= _step(frames[_FRAME, 11])
+        enemy_attacks |= (frames[_FRAME, 7] << _KNIGHT_SHIFTS) & _KNIGHT_MASKS
+
+        # Șahul: piesele care atacă regele și linia până la ele (inclusiv)
+        checking_lines = np.where(king_rays & snipers, king_rays, _ZERO)
+        knight_checkers = ((own_kings << _KNIGHT_SHIFTS) & _KNIGHT_MASKS) & frames[_FRAME, 7]
+        pawn_checkers = (((kings & _U64_NOT_FILE_A) << _SEVEN) | ((kings & _U64_NOT_FILE_H) << _NINE)) & enemy_pawns
+        checkers = ((checking_lines != 0).sum(axis=0) + _popcount(knight_checkers).sum(axis=0)
+                    + _popcount(pawn_checkers))
+
+        # Piesele legate: o piesă proprie între rege și o piesă adversă care
+        # alunecă pe aceeași linie se poate muta doar pe acea linie
+        blockers = king_rays & own_all
+        lines = _slide(own_kings, empty_directions | blockers)
+        blockers = np.where(lines & snipers, blockers, _ZERO)
+        up = np.bitwise_or.reduce(blockers[:4])
+        down = np.bitwise_or.reduce(blockers[4:])
+        king_steps = _step(own_kings)
+        # Înapoi pe tabla normală, într-o singură rotire: legăturile, atacurile
+        # adversarului, pătratele regelui, pionii legați pe coloană și șahul
+        rotated = _rotate(np.stack([up, down, np.bitwise_or.reduce(enemy_attacks[4:]),
+                                    np.bitwise_or.reduce(king_steps[4:]), blockers[4] & frames[1, 0],
+                                    np.bitwise_or.reduce(checking_lines[4:] | knight_checkers[4:])]))
+        free = ~np.stack([up | rotated[1], rotated[0] | down])[_FRAME]
+        attacked = (np.bitwise_or.reduce(enemy_attacks[:4]) | rotated[2]
+                    | ((enemy_pawns & _U64_NOT_FILE_A) >> _NINE) | ((enemy_pawns & _U64_NOT_FILE_H) >> _SEVEN))
+        king_targets = np.bitwise_or.reduce(king_steps[:4]) | rotated[3]
+        # Pătratele pe care piesele, în afară de rege, pot ajunge: toate, fără șah;
+        # linia șahului, la un singur șah; niciunul, la șah dublu
+        blocks = np.bitwise_or.reduce(checking_lines[:4] | knight_checkers[:4]) | rotated[5] | pawn_checkers
+        allowed = np.where(checkers == 0, _ALL, np.where(checkers == 1, blocks, _ZERO))
+        targets = ~own_all & np.stack([allowed, _rotate(allowed)])[_FRAME]
+
+        count = _popcount(_slide(sliders & free, empty_directions) & targets).sum(axis=0)
+        count += _popcount(((frames[_FRAME, 1] & free) << _KNIGHT_SHIFTS) & _KNIGHT_MASKS & targets).sum(axis=0)
+        count += _popcount(king_targets & ~own_all[0] & ~attacked)
+        # Piesa legată care alunecă în direcția legăturii: până la piesa adversă inclusiv
+        count += np.where(blockers & sliders, _popcount(lines & ~blockers & targets), 0).sum(axis=0)
+
+        free_pawns = pawns & free[0]
+        single = (free_pawns << _EIGHT) & empty[0]
+        count += _popcount(((single & _RANK_3) << _EIGHT) & empty[0] & allowed)
+        count += _pawn_moves(single & allowed)
+        count += _pawn_moves(((free_pawns & _U64_NOT_FILE_A) << _SEVEN) & enemy_all & allowed)
+        count += _pawn_moves(((free_pawns & _U64_NOT_FILE_H) << _NINE) & enemy_all & allowed)
+        # Pionul legat pe coloană avansează; pe diagonala din față capturează piesa care îl leagă
+        single = (((blockers[0] & pawns) | rotated[4]) << _EIGHT) & empty[0]
+        count += _popcount(single & allowed) + _popcount(((single & _RANK_3) << _EIGHT) & empty[0] & allowed)
+        count += _pawn_moves(((blockers[2] & pawns) << _NINE) & _U64_NOT_FILE_A & lines[2] & enemy_all & allowed)
+        count += _pawn_moves(((blockers[3] & pawns) << _SEVEN) & _U64_NOT_FILE_H & lines[3] & enemy_all & allowed)
+
+        # Cazurile rare, pe rând: rocada (fără șah) și en passant (fără șah dublu)
+        in_check = checkers > 0
+        for row, position in enumerate(positions):
+            castling = position.castling & BACKRANKS[position.turn] and not in_check[row]
+            en_passant = position.ep_square is not None and checkers[row] < 2
+            if not (castling or en_passant):
+                continue
+            rare = []
+            king = position.king(position.turn)
+            if castling:
+                position._castling_moves(rare, king)
+            if en_passant:
+                position._en_passant_moves(rare, king)
+            count[row] += len(rare)
+        return count, in_check
+
+    def evaluate_positions(self, positions):
+        """Scorurile (din perspectiva albului) pentru o listă de `Position`, ca tablou NumPy."""
+        if not positions:
+            return np.zeros(0)
+        pieces = np.fromiter(chain.from_iterable(position.pieces for position in positions),
+                             dtype=np.uint64, count=PIECE_CODES * len(positions)).reshape(-1, PIECE_CODES)
+        turn = np.array([position.turn for position in positions], dtype=bool)
+        count, in_check = self.mobility(positions, pieces, turn)
+        sign = np.where(turn, 1.0, -1.0)
+        return self.static_terms(pieces) + sign * (MOBILITY_WEIGHT * count - CHECK_PENALTY * in_check)
+
+    def evaluate_boards(self, boards):
+        """Scorurile pentru o listă de chess.Board."""
+        return self.evaluate_positions([Position.from_board(board) for board in boards])
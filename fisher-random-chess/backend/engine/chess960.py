@@ -0,0 +1,55 @@
+"""
+Pozițiile de start Chess960 și citirea mutărilor pe table Chess960.
+
+Pozițiile sunt generate direct din numărul standard 0-959 (numerotarea
+Scharnagl), cu drepturile de rocadă complete în X-FEN.
+"""
+import random
+
+import chess
+
+POSITION_COUNT = 960
+STANDARD_POSITION = 518  # RNBQKBNR
+
+
+def random_index():
+    return random.randrange(POSITION_COUNT)
+
+
+def start_fen(index=None):
+    """FEN-ul (X-FEN) poziției de start cu numărul `index`; aleatoriu dacă lipsește."""
+    if index is None:
+        index = random_index()
+    if not 0 <= index < POSITION_COUNT:
+        raise ValueError(f"Chess960 position index must be between 0 and {POSITION_COUNT - 1}")
+    return chess.Board.from_chess960_pos(index).fen()
+
+
+def make_board(fen):
+    """Tablă în modul Chess960, ca drepturile de rocadă din X-FEN să fie citite corect."""
+    return chess.Board(fen, chess960=True)
+
+
+def castling_destinations(move):
+    """Pătratele finale (rege, turn) ale unei rocade codificate ca „regele ia turnul”."""
+    rank = chess.square_rank(move.from_square)
+    kingside = chess.square_file(move.to_square) > chess.square_file(move.from_square)
+    king_to = chess.square(6 if kingside else 2, rank)
+    rook_to = chess.square(5 if kingside else 3, rank)
+    return king_to, rook_to
+
+
+def parse_move(board, uci):
+    """
+    Citește o mutare UCI primită de la client. Pe lângă notația Chess960
+    (regele ia turnul), rocada este acceptată și ca mutarea regelui pe
+    pătratul său final, când aceasta nu este deja o mutare obișnuită a regelui.
+    """
+    move = chess.Move.from_uci(uci)
+    if move in board.legal_moves:
+        return move
+    if board.piece_type_at(move.from_square) == chess.KING and not move.promotion:
+        for castle in board.generate_castling_moves(chess.BB_SQUARES[move.from_square]):
+            if castling_destinations(castle)[0] == move.to_square:
+                return castle
+    return move
@@ -0,0 +1,218 @@
+"""
+Evaluarea pozițiilor.
+
+`evaluate_board` este definiția de referință (parcurge toată tabla).
+`IncrementalEvaluator` dă exact același scor, dar actualizează materialul și
+controlul centrului doar pe pătratele atinse de fiecare mutare, iar
+mobilitatea este numărată din bitboard-uri, fără generarea listei de mutări.
+Căutarea folosește aceiași termeni pe `Position` (`square_table` și
+`evaluate_position`).
+"""
+import chess
+
+from engine.position import PIECE_CODES, piece_code
+
+CENTER_SQUARES = [chess.D4, chess.D5, chess.E4, chess.E5]
+BB_CENTER = chess.BB_D4 | chess.BB_D5 | chess.BB_E4 | chess.BB_E5
+CENTER_BONUS = 0.5
+MOBILITY_WEIGHT = 0.1
+CHECK_PENALTY = 1
+
+DEFAULT_PIECE_VALUES = {
+    "p": 1, "n": 3, "b": 3, "r": 5, "q": 9,
+    "P": 1, "N": 3, "B": 3, "R": 5, "Q": 9
+}
+
+BB_NOT_FILE_A = ~chess.BB_FILE_A & chess.BB_ALL
+BB_NOT_FILE_H = ~chess.BB_FILE_H & chess.BB_ALL
+
+
+def evaluate_board(board, piece_values):
+    """
+    Evaluează tabla de șah pe baza valorii pieselor, controlului centrului și siguranței regelui.
+    """
+    score = 0
+
+    # Valoarea pieselor
+    for square, piece in board.piece_map().items():
+        value = piece_values.get(piece.symbol(), 0)
+        score += value if piece.color == chess.WHITE else -value
+
+    # Controlul centrului
+    for square in CENTER_SQUARES:
+        if board.piece_at(square):
+            piece = board.piece_at(square)
+            score += CENTER_BONUS if piece.color == chess.WHITE else -CENTER_BONUS
+
+    # Mobilitatea
+    score += MOBILITY_WEIGHT * len(list(board.legal_moves)) if board.turn == chess.WHITE else -MOBILITY_WEIGHT * len(list(board.legal_moves))
+
+    # Siguranța regelui
+    if board.is_check():
+        score -= CHECK_PENALTY if board.turn == chess.WHITE else -CHECK_PENALTY
+
+    return score
+
+
+def _pinned_mask(board, color, king):
+    """Piesele culorii `color` legate de rege de o piesă adversă care alunecă."""
+    occupied = board.occupied
+    enemy = board.occupied_co[not color]
+    snipers = ((chess.BB_RANK_ATTACKS[king][0] | chess.BB_FILE_ATTACKS[king][0])
+               & (board.rooks | board.queens) & enemy)
+    snipers |= chess.BB_DIAG_ATTACKS[king][0] & (board.bishops | board.queens) & enemy
+    pinned = 0
+    for sniper in chess.scan_reversed(snipers):
+        blockers = chess.between(king, sniper) & occupied
+        if blockers and not blockers & (blockers - 1) and blockers & board.occupied_co[color]:
+            pinned |= blockers
+    return pinned
+
+
+def count_legal_moves(board):
+    """
+    Numărul de mutări legale, egal cu len(list(board.legal_moves)).
+    Când regele nu este în șah, mutările pieselor nelegate sunt numărate
+    direct din atacuri; doar piesele legate, en passant și rocada trec prin
+    generatorul python-chess.
+    """
+    turn = board.turn
+    king = board.king(turn)
+    if king is None or board.is_check():
+        return board.legal_moves.count()
+
+    own = board.occupied_co[turn]
+    enemy = board.occupied_co[not turn]
+    occupied = board.occupied
+    pinned = _pinned_mask(board, turn, king)
+    free = own & ~pinned
+    count = 0
+
+    # Cai, nebuni, turnuri, dame
+    for square in chess.scan_reversed(free & (board.knights | board.bishops | board.rooks | board.queens)):
+        count += chess.popcount(board.attacks_mask(square) & ~own)
+
+    # Pioni: înaintări, capturi și promovări (câte 4 mutări fiecare)
+    pawns = free & board.pawns
+    if turn == chess.WHITE:
+        single = (pawns << 8) & ~occupied & chess.BB_ALL
+        double = ((single & chess.BB_RANK_3) << 8) & ~occupied & chess.BB_ALL
+        captures_left = ((pawns & BB_NOT_FILE_A) << 7) & enemy
+        captures_right = ((pawns & BB_NOT_FILE_H) << 9) & enemy
+        last_rank = chess.BB_RANK_8
+    else:
+        single = (pawns >> 8) & ~occupied
+        double = ((single & chess.BB_RANK_6) >> 8) & ~occupied
+        captures_left = ((pawns & BB_NOT_FILE_A) >> 9) & enemy
+        captures_right = ((pawns & BB_NOT_FILE_H) >> 7) & enemy
+        last_rank = chess.BB_RANK_1
+    for targets in (single, captures_left, captures_right):
+        count += chess.popcount(targets & ~last_rank) + 4 * chess.popcount(targets & last_rank)
+    count += chess.popcount(double)
+
+    # Regele (fără rocadă): nu se poate muta pe un pătrat atacat
+    for square in chess.scan_reversed(chess.BB_KING_ATTACKS[king] & ~own):
+        if not board.is_attacked_by(not turn, square):
+            count += 1
+
+    # Cazurile rare, prin generatorul complet
+    if pinned:
+        for move in board.generate_legal_moves(from_mask=pinned):
+            if not board.is_en_passant(move):
+                count += 1
+    if board.ep_square is not None:
+        count += sum(1 for _ in board.generate_legal_ep())
+    if board.castling_rights & own:
+        count += sum(1 for _ in board.generate_castling_moves())
+
+    return count
+
+
+class IncrementalEvaluator:
+    """
+    Evaluator care urmărește mutările făcute pe tablă. Mutările se fac prin
+    `push`/`pop` ale evaluatorului (în locul celor de pe tablă), care
+    actualizează termenii de material și centru doar pentru pătratele
+    modificate. Scorul este din perspectiva albului, ca în `evaluate_board`.
+    """
+
+    def __init__(self, piece_values):
+        # Valoarea fiecărei piese, cu semn: pozitivă pentru alb, negativă pentru negru
+        self._values = {}
+        for color in chess.COLORS:
+            for piece_type in chess.PIECE_TYPES:
+                value = piece_values.get(chess.Piece(piece_type, color).symbol(), 0)
+                self._values[color, piece_type] = value if color == chess.WHITE else -value
+        self._static = 0
+        self._stack = []
+
+    def _square_term(self, board, square):
+        piece_type = board.piece_type_at(square)
+        if piece_type is None:
+            return 0
+        color = bool(board.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+        term = self._values[color, piece_type]
+        if chess.BB_SQUARES[square] & BB_CENTER:
+            term += CENTER_BONUS if color == chess.WHITE else -CENTER_BONUS
+        return term
+
+    def _touched_squares(self, board, move):
+        if board.is_castling(move):
+            # Regele și turnul se mută pe rândul din spate (și în Chess960)
+            return list(chess.SquareSet(chess.BB_RANK_1 if board.turn == chess.WHITE else chess.BB_RANK_8))
+        if board.is_en_passant(move):
+            return [move.from_square, move.to_square, board.ep_square + (-8 if board.turn == chess.WHITE else 8)]
+        return [move.from_square, move.to_square]
+
+    def reset(self, board):
+        """Recalculează termenii statici pentru poziția curentă a tablei."""
+        self._stack = []
+        self._static = 0
+        for square in chess.scan_reversed(board.occupied):
+            self._static += self._square_term(board, square)
+
+    def push(self, board, move):
+        squares = self._touched_squares(board, move)
+        before = sum(self._square_term(board, square) for square in squares)
+        board.push(move)
+        after = sum(self._square_term(board, square) for square in squares)
+        self._stack.append(self._static)
+        self._static += after - before
+
+    def pop(self, board):
+        board.pop()
+        self._static = self._stack.pop()
+
+    def evaluate(self, board):
+        score = self._static
+        mobility = MOBILITY_WEIGHT * count_legal_moves(board)
+        score += mobility if board.turn == chess.WHITE else -mobility
+        if board.is_check():
+            score -= CHECK_PENALTY if board.turn == chess.WHITE else -CHECK_PENALTY
+        return score
+
+    def square_table(self):
+        """Materialul și bonusul de centru pentru fiecare cod de piesă și pătrat (`Position.table`)."""
+        table = [[0] * 64 for _ in range(PIECE_CODES)]
+        for (color, piece_type), value in self._values.items():
+            bonus = CENTER_BONUS if color == chess.WHITE else -CENTER_BONUS
+            for square in chess.SQUARES:
+                table[piece_code(piece_type, color)][square] = \
+                    value + (bonus if chess.BB_SQUARES[square] & BB_CENTER else 0)
+        return table
+
+    def evaluate_position(self, position, move_count=None, in_check=None):
+        """
+        Același scor ca `evaluate`, pentru o `Position` creată cu `square_table()`.
+        Numărul de mutări legale și șahul pot fi date, dacă sunt deja cunoscute.
+        """
+        if move_count is None:
+            move_count = position.count_legal_moves()
+        if in_check is None:
+            in_check = position.is_check()
+        score = position.static
+        mobility = MOBILITY_WEIGHT * move_count
+        score += mobility if position.turn == chess.WHITE else -mobility
+        if in_check:
+            score -= CHECK_PENALTY if position.turn == chess.WHITE else -CHECK_PENALTY
+        return score
@@ -0,0 +1,132 @@
+"""
+Cartea de deschideri Chess960: mutările căutate dinainte pentru cele 960 de
+poziții de start și pentru răspunsul negrului la fiecare primă mutare a
+albului, păstrate într-un fișier JSON.
+
+Construirea cărții (din directorul backend):
+
+    python -m engine.openings --depth 4 --plies 2 --workers 8
+
+Cartea este valabilă doar pentru valorile pieselor cu care a fost construită;
+după schimbarea lor trebuie reconstruită.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+
+from engine import chess960
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator
+from engine.search import Search, SearchLimits
+from engine.transposition import TranspositionTable
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "openings.json")
+
+
+def position_key(board):
+    # Contoarele de mutări nu contează pentru alegerea mutării
+    return " ".join(board.fen().split()[:4])
+
+
+class OpeningBook:
+    """
+    Fișierul este citit o singură dată, la prima căutare în carte. Dacă
+    lipsește, cartea este goală și AI-ul caută normal.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.piece_values = None
+        self.positions = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self.positions is not None:
+                return
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                self.piece_values = data["piece_values"]
+                self.positions = data["positions"]
+            except FileNotFoundError:
+                self.positions = {}
+            except (ValueError, KeyError) as e:
+                print(f"Error loading opening book {self.path}: {e}")  # Debugging
+                self.positions = {}
+
+    def __len__(self):
+        self._load()
+        return len(self.positions)
+
+    def lookup(self, board, piece_values):
+        """Mutarea din carte pentru poziție sau None."""
+        self._load()
+        if not self.positions or piece_values != self.piece_values:
+            return None
+        entry = self.positions.get(position_key(board))
+        if entry is None:
+            return None
+        move = chess.Move.from_uci(entry["move"])
+        return move if move in board.legal_moves else None
+
+
+def book_positions(plies):
+    """Pozițiile din carte: startul fiecărei poziții Chess960 și, cu plies >= 2, poziția după fiecare primă mutare."""
+    for index in range(chess960.POSITION_COUNT):
+        board = chess960.make_board(chess960.start_fen(index))
+        yield board.fen()
+        if plies >= 2:
+            for move in board.legal_moves:
+                board.push(move)
+                yield board.fen()
+                board.pop()
+
+
+def _search_position(fen, depth, piece_values):
+    board = chess960.make_board(fen)
+    search = Search(IncrementalEvaluator(piece_values), TranspositionTable(), SearchLimits(depth))
+    move, score = search.iterative_deepening(board)
+    return position_key(board), move.uci(), score
+
+
+def build(path=DEFAULT_PATH, depth=4, plies=2, workers=None, piece_values=None):
+    """Caută toate pozițiile din carte pe un pool de procese și scrie fișierul atomic."""
+    piece_values = dict(piece_values or DEFAULT_PIECE_VALUES)
+    fens = list(book_positions(plies))
+    positions = {}
+    start = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_search_position, fens, [depth] * len(fens),
+                               [piece_values] * len(fens), chunksize=16)
+        for done, (key, move, score) in enumerate(results, 1):
+            positions[key] = {"move": move, "score": round(score, 3)}
+            if done % 500 == 0:
+                print(f"{done}/{len(fens)} positions ({time.monotonic() - start:.0f}s)")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"depth": depth, "piece_values": piece_values, "positions": positions}, f)
+    os.replace(tmp_path, path)
+    return len(positions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Chess960 opening book.")
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--plies", type=int, choices=(1, 2), default=2,
+                        help="1: start positions only; 2: also Black's reply to every first move")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    count = build(args.output, args.depth, args.plies, args.workers)
+    print(f"Wrote {count} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
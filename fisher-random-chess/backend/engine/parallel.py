@@ -0,0 +1,244 @@
+"""
+Căutare paralelă pe mai multe procese, prin împărțirea mutărilor de la rădăcină.
+
+La fiecare iterație a adâncirii iterative, cea mai bună mutare din iterația
+anterioară este căutată întâi, iar scorul ei devine limita pentru celelalte
+mutări ale rădăcinii, împărțite apoi între procesele din `SearchPool`.
+Procesele rămân pornite între cereri și își păstrează propria tabelă de
+transpoziții, deci iterațiile și mutările următoare din același joc pornesc
+de la rezultatele deja calculate.
+
+O căutare care poate fi oprită din exterior (`SearchLimits.stop_event`)
+primește un eveniment partajat prin `multiprocessing.Manager`, verificat de
+procese la fel ca termenul limită, deci oprirea nu așteaptă sfârșitul iterației.
+"""
+import atexit
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+
+import chess
+
+from engine.evaluation import IncrementalEvaluator
+from engine.search import Search, SearchLimits, SearchOptions, SearchTimeout, search_stats
+from engine.tablebase import Tablebase
+from engine.transposition import TranspositionTable, invalidate_search_caches
+
+# Cât de des verifică serverul oprirea căutării cât așteaptă procesele (secunde)
+STOP_POLL_INTERVAL = 0.05
+
+# Starea fiecărui proces din pool
+_worker_tt = None
+_worker_piece_values = None
+_worker_tablebase = None
+
+
+def _init_worker(tt_entries):
+    global _worker_tt
+    _worker_tt = TranspositionTable(tt_entries)
+
+
+def _warm_up():
+    return True
+
+
+def _worker_tablebase_at(path):
+    """Tabelele de final ale procesului, deschise o singură dată (același fișier mapat ca în server)."""
+    global _worker_tablebase
+    if path is None:
+        return None
+    if _worker_tablebase is None or _worker_tablebase.path != path:
+        _worker_tablebase = Tablebase(path)
+    return _worker_tablebase
+
+
+def _search_root_moves(board, moves, depth, time_limit, node_limit, piece_values, options,
+                       tablebase_path=None, bound=None, stop_event=None):
+    """
+    Rulează într-un proces din pool: caută mutările `moves` la adâncimea dată.
+    Returnează ((mutare, scor) sau None dacă bugetul s-a epuizat, contoarele căutării).
+    """
+    global _worker_piece_values
+    if piece_values != _worker_piece_values:
+        invalidate_search_caches(_worker_tt)
+        _worker_piece_values = dict(piece_values)
+
+    search = Search(IncrementalEvaluator(piece_values), _worker_tt,
+                    SearchLimits(depth, time_limit, node_limit, stop_event), options, _worker_tablebase_at(tablebase_path))
+    search.start(board)
+    try:
+        result = search.search_root(board, depth, moves[0], moves, bound)
+    except SearchTimeout:
+        result = None
+    return result, search.counters()
+
+
+class SearchPool:
+    """
+    Procesele folosite de căutarea paralelă. Sunt create la prima folosire și
+    rămân pornite până la oprirea serverului.
+    """
+
+    def __init__(self, workers, tt_entries=200000):
+        self.workers = workers
+        self.tt_entries = tt_entries
+        self._executor = None
+        self._manager = None
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                # "spawn" evită copierea firelor de execuție ale serverului în procese
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.tt_entries,)
+                )
+            return self._executor
+
+    def stop_event(self):
+        """Un eveniment de oprire pe care îl pot verifica și procesele din pool."""
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            return self._manager.Event()
+
+    def warm_up(self):
+        """Pornește toate procesele dinainte, ca prima cerere să nu aștepte după ele."""
+        futures = [self.executor.submit(_warm_up) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
+
+class ParallelSearch:
+    """
+    O căutare paralelă pentru o singură mutare, cu aceeași interfață ca
+    `Search.iterative_deepening`. Prima iterație rulează local, ca să existe
+    întotdeauna o mutare; următoarele sunt împărțite între procese.
+    """
+
+    def __init__(self, pool, piece_values, transposition_table, limits=None, options=None, tablebase=None):
+        self.pool = pool
+        self.piece_values = dict(piece_values)
+        self.tt = transposition_table
+        self.limits = limits or SearchLimits()
+        self.options = options or SearchOptions()
+        self.tablebase = tablebase
+        self.nodes = 0
+        self.depth_reached = 0
+        self.cutoffs = 0
+        self.expanded = 0
+        self.tt_hits = 0
+        self.elapsed = 0.0
+
+    def _add_counters(self, counters):
+        self.nodes += counters["nodes"]
+        self.cutoffs += counters["cutoffs"]
+        self.expanded += counters["expanded"]
+        self.tt_hits += counters["tt_hits"]
+
+    def stats(self):
+        return search_stats(self.nodes, self.depth_reached, self.cutoffs,
+                            self.expanded, self.tt_hits, self.elapsed)
+
+    def _split(self, moves):
+        # Împărțire alternativă, ca fiecare proces să primească și mutări bune, și slabe
+        chunks = [moves[i::self.pool.workers] for i in range(self.pool.workers)]
+        return [chunk for chunk in chunks if chunk]
+
+    def _run(self, tasks, stop_event=None):
+        """Trimite sarcinile la procese; returnează rezultatele sau None dacă bugetul s-a epuizat."""
+        futures = [self.pool.executor.submit(_search_root_moves, *task, stop_event) for task in tasks]
+        if stop_event is not None:
+            # Oprirea cerută în timpul iterației este transmisă proceselor
+            pending = futures
+            while pending:
+                _, pending = wait(pending, timeout=STOP_POLL_INTERVAL, return_when=FIRST_EXCEPTION)
+                if pending and self.limits.stopped() and not stop_event.is_set():
+                    stop_event.set()
+        results = []
+        for future in futures:
+            result, counters = future.result()
+            self._add_counters(counters)
+            results.append(result)
+        if any(result is None for result in results):
+            return None
+        return results
+
+    def iterative_deepening(self, board):
+        start = time.monotonic()
+        local = Search(IncrementalEvaluator(self.piece_values), self.tt, SearchLimits(1), self.options,
+                       self.tablebase)
+        tablebase_path = self.tablebase.path if self.tablebase is not None else None
+        local.start(board)
+        best_move, best_value = local.search_root(board, 1)
+        self._add_counters(local.counters())
+        self.depth_reached = 1
+        if best_move is None:
+            self.elapsed = time.monotonic() - start
+            return best_move, best_value
+
+        stop_event = self.pool.stop_event() if self.limits.stop_event is not None else None
+        is_maximizing = board.turn == chess.WHITE
+        ordered = local.ordered_root_moves(board, best_move)
+        for depth in range(2, self.limits.max_depth + 1):
+            if self.limits.stopped():
+                break
+            time_left = None
+            if self.limits.time_limit is not None:
+                time_left = self.limits.time_limit - (time.monotonic() - start)
+                if time_left <= 0:
+                    break
+            node_limit = None
+            if self.limits.node_limit is not None:
+                node_limit = self.limits.node_limit - self.nodes
+                if node_limit <= 0:
+                    break
+
+            # Mutarea principală se caută singură, pentru a obține limita celorlalte
+            results = self._run([(board, ordered[:1], depth, time_left, node_limit, self.piece_values, self.options,
+                                  tablebase_path, None)], stop_event)
+            if results is None:
+                break
+            pv_move, pv_value = results[0]
+            candidates = [(pv_move, pv_value)]
+
+            chunks = self._split(ordered[1:])
+            if chunks:
+                if time_left is not None:
+                    time_left = self.limits.time_limit - (time.monotonic() - start)
+                if node_limit is not None:
+                    node_limit = max(self.limits.node_limit - self.nodes, 0) // len(chunks)
+                results = self._run([
+                    (board, chunk, depth, time_left, node_limit, self.piece_values, self.options,
+                     tablebase_path, pv_value)
+                    for chunk in chunks
+                ], stop_event)
+                if results is None:
+                    break
+                candidates.extend(result for result in results if result[0] is not None)
+
+            # Fiecare proces întoarce scorul exact al celei mai bune mutări care depășește limita
+            best_move, best_value = candidates[0]
+            for move, value in candidates[1:]:
+                if value > best_value if is_maximizing else value < best_value:
+                    best_move, best_value = move, value
+            self.depth_reached = depth
+            ordered.remove(best_move)
+            ordered.insert(0, best_move)
+        self.elapsed = time.monotonic() - start
+        return best_move, best_value
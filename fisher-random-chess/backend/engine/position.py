@@ -0,0 +1,661 @@
+"""
+Reprezentarea compactă a poziției, folosită intern de căutare în locul lui
+chess.Board.
+
+Tabla este ținută ca bitboard-uri întregi pentru fiecare piesă, plus un
+tablou de 64 de pătrate. Mutările sunt numere întregi (vezi `encode`), iar
+`push`/`pop` nu creează obiecte: starea necesară pentru refacerea mutării
+este scrisă într-o listă prealocată, indexată după ply. Mutările sunt
+generate pseudo-legal și filtrate ieftin (piese legate, șah, pătratele
+regelui), fără a face mutarea pe tablă.
+
+Rocada este codificată ca în python-chess pentru Chess960: regele „ia”
+propriul turn. Cheia Zobrist este actualizată incremental și este egală cu
+hash-ul Polyglot al poziției (`chess.polyglot.zobrist_hash`).
+
+Regula celor cinci repetări nu este urmărită: căutarea pornește dintr-un FEN,
+fără istoric, iar adâncimea ei nu ajunge la cinci repetări.
+"""
+import chess
+import chess.polyglot
+
+# Codurile pieselor: tipul python-chess pentru alb, tipul | 8 pentru negru
+BLACK_OFFSET = 8
+PIECE_CODES = 16
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING
+PROMOTIONS = (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)
+
+# Codificarea mutărilor: de la (6 biți), la (6 biți), promovare (3 biți), tip
+TO_SHIFT = 6
+PROMOTION_SHIFT = 12
+CASTLING = 1 << 15
+EN_PASSANT = 2 << 15
+FLAGS = 3 << 15
+
+# Tabelele de atacuri precalculate de python-chess
+BB_ALL = chess.BB_ALL
+BB_SQUARES = chess.BB_SQUARES
+KNIGHT_ATTACKS = chess.BB_KNIGHT_ATTACKS
+KING_ATTACKS = chess.BB_KING_ATTACKS
+PAWN_ATTACKS = chess.BB_PAWN_ATTACKS
+DIAG_MASKS = chess.BB_DIAG_MASKS
+DIAG_ATTACKS = chess.BB_DIAG_ATTACKS
+RANK_MASKS = chess.BB_RANK_MASKS
+RANK_ATTACKS = chess.BB_RANK_ATTACKS
+FILE_MASKS = chess.BB_FILE_MASKS
+FILE_ATTACKS = chess.BB_FILE_ATTACKS
+RAYS = chess.BB_RAYS
+BETWEEN = [[chess.between(a, b) for b in chess.SQUARES] for a in chess.SQUARES]
+ORTHOGONAL_RAYS = [RANK_ATTACKS[square][0] | FILE_ATTACKS[square][0] for square in chess.SQUARES]
+DIAGONAL_RAYS = [DIAG_ATTACKS[square][0] for square in chess.SQUARES]
+BACKRANKS = (chess.BB_RANK_8, chess.BB_RANK_1)  # după culoare: negru, alb
+NOT_FILE_A = BB_ALL & ~chess.BB_FILE_A
+NOT_FILE_H = BB_ALL & ~chess.BB_FILE_H
+
+# Cheile Polyglot
+_RANDOM = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+ZOBRIST_PIECES = [[0] * 64 for _ in range(PIECE_CODES)]
+for _piece_type in chess.PIECE_TYPES:
+    for _color in chess.COLORS:
+        for _square in chess.SQUARES:
+            ZOBRIST_PIECES[_piece_type | (0 if _color else BLACK_OFFSET)][_square] = \
+                _RANDOM[64 * ((_piece_type - 1) * 2 + int(_color)) + _square]
+ZOBRIST_CASTLING = _RANDOM[768:772]  # alb h, alb a, negru h, negru a
+ZOBRIST_EP = _RANDOM[772:780]
+ZOBRIST_TURN = _RANDOM[780]
+
+# Câmpurile salvate la fiecare ply pentru `pop`
+_UNDO_FIELDS = 9
+MAX_PLY = 256
+
+_EMPTY_TABLE = [[0] * 64 for _ in range(PIECE_CODES)]
+
+
+def encode(from_square, to_square, promotion=0, flags=0):
+    return from_square | to_square << TO_SHIFT | promotion << PROMOTION_SHIFT | flags
+
+
+def piece_code(piece_type, color):
+    return piece_type if color else piece_type | BLACK_OFFSET
+
+
+def _rook_attacks(square, occupied):
+    return RANK_ATTACKS[square][RANK_MASKS[square] & occupied] | FILE_ATTACKS[square][FILE_MASKS[square] & occupied]
+
+
+def _bishop_attacks(square, occupied):
+    return DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied]
+
+
+def _append_pawn_moves(moves, from_square, to_square, promotes):
+    if promotes:
+        for promotion in PROMOTIONS:
+            moves.append(from_square | to_square << TO_SHIFT | promotion << PROMOTION_SHIFT)
+    else:
+        moves.append(from_square | to_square << TO_SHIFT)
+
+
+class Position:
+    """
+    `table[cod][pătrat]` este termenul static al unei piese pe un pătrat
+    (de exemplu materialul și bonusul de centru al evaluatorului); suma lor
+    este ținută incremental în `static`.
+    """
+
+    __slots__ = ("squares", "pieces", "occupied_co", "occupied", "turn", "castling", "castling_key",
+                 "ep_square", "ep_key", "halfmove_clock", "hash", "static", "table", "ply", "_undo")
+
+    def __init__(self, table=None):
+        self.squares = [0] * 64
+        self.pieces = [0] * PIECE_CODES
+        self.occupied_co = [0, 0]
+        self.occupied = 0
+        self.turn = chess.WHITE
+        self.castling = 0
+        self.castling_key = 0
+        self.ep_square = None
+        self.ep_key = 0
+        self.halfmove_clock = 0
+        self.hash = 0
+        self.static = 0
+        self.table = table or _EMPTY_TABLE
+        self.ply = 0
+        self._undo = [0] * (MAX_PLY * _UNDO_FIELDS)
+
+    @classmethod
+    def from_board(cls, board, table=None):
+        position = cls(table)
+        for square, piece in board.piece_map().items():
+            position._put(square, piece_code(piece.piece_type, piece.color))
+        if chess.popcount(board.kings & board.occupied_co[chess.WHITE]) != 1 or \
+                chess.popcount(board.kings & board.occupied_co[chess.BLACK]) != 1:
+            raise ValueError("The position must have exactly one king of each color")
+        position.turn = board.turn
+        position.castling = board.clean_castling_rights()
+        position.castling_key = position._castling_key()
+        position.ep_square = board.ep_square
+        position.ep_key = position._ep_key()
+        position.halfmove_clock = board.halfmove_clock
+        position.hash ^= position.castling_key ^ position.ep_key ^ (ZOBRIST_TURN if board.turn else 0)
+        return position
+
+    def copy(self):
+        """
+        Copie a tablei, fără istoricul mutărilor: poate fi evaluată și se pot
+        face mutări noi pe ea, dar nu se pot anula mutările originalului.
+        """
+        position = Position.__new__(Position)
+        position.squares = self.squares[:]
+        position.pieces = self.pieces[:]
+        position.occupied_co = self.occupied_co[:]
+        position.occupied = self.occupied
+        position.turn = self.turn
+        position.castling = self.castling
+        position.castling_key = self.castling_key
+        position.ep_square = self.ep_square
+        position.ep_key = self.ep_key
+        position.halfmove_clock = self.halfmove_clock
+        position.hash = self.hash
+        position.static = self.static
+        position.table = self.table
+        position.ply = 0
+        position._undo = []
+        return position
+
+    # Tabla
+
+    def _put(self, square, code):
+        bb = BB_SQUARES[square]
+        self.squares[square] = code
+        self.pieces[code] |= bb
+        self.occupied_co[not code & BLACK_OFFSET] |= bb
+        self.occupied |= bb
+        self.hash ^= ZOBRIST_PIECES[code][square]
+        self.static += self.table[code][square]
+
+    def _remove(self, square):
+        bb = BB_SQUARES[square]
+        code = self.squares[square]
+        self.squares[square] = 0
+        self.pieces[code] ^= bb
+        self.occupied_co[not code & BLACK_OFFSET] ^= bb
+        self.occupied ^= bb
+        self.hash ^= ZOBRIST_PIECES[code][square]
+        self.static -= self.table[code][square]
+        return code
+
+    def king(self, color):
+        return self.pieces[KING if color else KING | BLACK_OFFSET].bit_length() - 1
+
+    def piece_type_at(self, square):
+        return self.squares[square] & 7
+
+    def _castling_key(self):
+        key = 0
+        for index, color in enumerate((chess.WHITE, chess.BLACK)):
+            king = self.king(color)
+            rights = self.castling & BACKRANKS[color]
+            if rights >> (king + 1):
+                key ^= ZOBRIST_CASTLING[2 * index]
+            if rights & BB_SQUARES[king] - 1:
+                key ^= ZOBRIST_CASTLING[2 * index + 1]
+        return key
+
+    def _ep_key(self):
+        # Ca în Polyglot: doar dacă un pion al jucătorului la mutare poate captura
+        ep_square = self.ep_square
+        if ep_square is None:
+            return 0
+        turn = self.turn
+        if PAWN_ATTACKS[not turn][ep_square] & self.pieces[PAWN if turn else PAWN | BLACK_OFFSET]:
+            return ZOBRIST_EP[ep_square & 7]
+        return 0
+
+    # Atacuri
+
+    def attackers_mask(self, color, square, occupied):
+        """Piesele culorii `color` care atacă `square`, cu ocuparea dată."""
+        pieces = self.pieces
+        offset = 0 if color else BLACK_OFFSET
+        attackers = ((KNIGHT_ATTACKS[square] & pieces[KNIGHT | offset])
+                     | (KING_ATTACKS[square] & pieces[KING | offset])
+                     | (PAWN_ATTACKS[not color][square] & pieces[PAWN | offset]))
+        queens = pieces[QUEEN | offset]
+        rooks = pieces[ROOK | offset] | queens
+        if rooks & ORTHOGONAL_RAYS[square]:
+            attackers |= _rook_attacks(square, occupied) & rooks
+        bishops = pieces[BISHOP | offset] | queens
+        if bishops & DIAGONAL_RAYS[square]:
+            attackers |= _bishop_attacks(square, occupied) & bishops
+        return attackers & occupied
+
+    def is_check(self):
+        turn = self.turn
+        return bool(self.attackers_mask(not turn, self.king(turn), self.occupied))
+
+    def _pinned(self, color, king):
+        """Piesele culorii `color` legate de rege."""
+        pieces = self.pieces
+        offset = BLACK_OFFSET if color else 0
+        queens = pieces[QUEEN | offset]
+        snipers = ((ORTHOGONAL_RAYS[king] & (pieces[ROOK | offset] | queens))
+                   | (DIAGONAL_RAYS[king] & (pieces[BISHOP | offset] | queens)))
+        pinned = 0
+        occupied = self.occupied
+        own = self.occupied_co[color]
+        while snipers:
+            sniper = snipers.bit_length() - 1
+            snipers ^= BB_SQUARES[sniper]
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+        return pinned
+
+    def is_insufficient_material(self):
+        """Ca `chess.Board.is_insufficient_material`."""
+        pieces = self.pieces
+        if (pieces[PAWN] | pieces[PAWN | BLACK_OFFSET] | pieces[ROOK] | pieces[ROOK | BLACK_OFFSET]
+                | pieces[QUEEN] | pieces[QUEEN | BLACK_OFFSET]):
+            return False
+        knights = pieces[KNIGHT] | pieces[KNIGHT | BLACK_OFFSET]
+        bishops = pieces[BISHOP] | pieces[BISHOP | BLACK_OFFSET]
+        kings = pieces[KING] | pieces[KING | BLACK_OFFSET]
+        for color in chess.COLORS:
+            own = self.occupied_co[color]
+            if own & knights:
+                if own.bit_count() > 2 or self.occupied_co[not color] & ~kings & ~pieces[QUEEN] & ~pieces[QUEEN | BLACK_OFFSET]:
+                    return False
+            elif own & bishops:
+                same_color = not bishops & chess.BB_DARK_SQUARES or not bishops & chess.BB_LIGHT_SQUARES
+                if not same_color or knights:
+                    return False
+        return True
+
+    # Generarea mutărilor
+
+    def _castling_moves(self, moves, king):
+        turn = self.turn
+        occupied = self.occupied
+        backrank = BACKRANKS[turn]
+        rights = self.castling & backrank
+        king_bb = BB_SQUARES[king]
+        while rights:
+            rook = rights.bit_length() - 1
+            rights ^= BB_SQUARES[rook]
+            rank_start = rook & ~7
+            if rook < king:
+                king_to, rook_to = rank_start + 2, rank_start + 3
+            else:
+                king_to, rook_to = rank_start + 6, rank_start + 5
+            rook_bb = BB_SQUARES[rook]
+            king_path = BETWEEN[king][king_to]
+            if (occupied ^ king_bb ^ rook_bb) & (king_path | BETWEEN[rook][rook_to] | BB_SQUARES[king_to]
+                                                 | BB_SQUARES[rook_to]):
+                continue
+            path = king_path | king_bb
+            without_king = occupied ^ king_bb
+            attacked = False
+            while path:
+                square = path.bit_length() - 1
+                path ^= BB_SQUARES[square]
+                if self.attackers_mask(not turn, square, without_king):
+                    attacked = True
+                    break
+            if attacked or self.attackers_mask(not turn, king_to, without_king ^ rook_bb ^ BB_SQUARES[rook_to]):
+                continue
+            moves.append(king | rook << TO_SHIFT | CASTLING)
+
+    def _en_passant_moves(self, moves, king):
+        ep_square = self.ep_square
+        if ep_square is None or self.squares[ep_square]:
+            return
+        turn = self.turn
+        capturers = PAWN_ATTACKS[not turn][ep_square] & self.pieces[PAWN if turn else PAWN | BLACK_OFFSET]
+        captured = ep_square - 8 if turn else ep_square + 8
+        while capturers:
+            from_square = capturers.bit_length() - 1
+            capturers ^= BB_SQUARES[from_square]
+            # Verificarea completă: captura poate descoperi regele pe rând
+            occupied = (self.occupied ^ BB_SQUARES[from_square] ^ BB_SQUARES[captured]) | BB_SQUARES[ep_square]
+            if not self.attackers_mask(not turn, king, occupied & ~BB_SQUARES[captured]):
+                moves.append(from_square | ep_square << TO_SHIFT | EN_PASSANT)
+
+    def legal_moves(self):
+        """Lista mutărilor legale (întregi)."""
+        moves = []
+        turn = self.turn
+        pieces = self.pieces
+        offset = 0 if turn else BLACK_OFFSET
+        own = self.occupied_co[turn]
+        enemy = self.occupied_co[not turn]
+        occupied = self.occupied
+        king = pieces[KING | offset].bit_length() - 1
+
+        # Regele nu se poate muta pe un pătrat atacat (regele nu mai blochează razele)
+        without_king = occupied ^ BB_SQUARES[king]
+        targets = KING_ATTACKS[king] & ~own
+        while targets:
+            to_square = targets.bit_length() - 1
+            targets ^= BB_SQUARES[to_square]
+            if not self.attackers_mask(not turn, to_square, without_king):
+                moves.append(king | to_square << TO_SHIFT)
+
+        checkers = self.attackers_mask(not turn, king, occupied)
+        if checkers & (checkers - 1):
+            return moves  # șah dublu: doar regele se poate muta
+        if checkers:
+            allowed = BETWEEN[king][checkers.bit_length() - 1] | checkers
+        else:
+            allowed = BB_ALL
+            if self.castling & BACKRANKS[turn]:
+                self._castling_moves(moves, king)
+        pinned = self._pinned(turn, king)
+        rays = RAYS[king]
+        free = ~own & allowed
+
+        knights = pieces[KNIGHT | offset] & ~pinned
+        while knights:
+            from_square = knights.bit_length() - 1
+            knights ^= BB_SQUARES[from_square]
+            targets = KNIGHT_ATTACKS[from_square] & free
+            while targets:
+                to_square = targets.bit_length() - 1
+                targets ^= BB_SQUARES[to_square]
+                moves.append(from_square | to_square << TO_SHIFT)
+
+        queens = pieces[QUEEN | offset]
+        for sliders, attacks in ((pieces[BISHOP | offset] | queens, _bishop_attacks),
+                                 (pieces[ROOK | offset] | queens, _rook_attacks)):
+            while sliders:
+                from_square = sliders.bit_length() - 1
+                sliders ^= BB_SQUARES[from_square]
+                targets = attacks(from_square, occupied) & free
+                if pinned & BB_SQUARES[from_square]:
+                    targets &= rays[from_square]
+                while targets:
+                    to_square = targets.bit_length() - 1
+                    targets ^= BB_SQUARES[to_square]
+                    moves.append(from_square | to_square << TO_SHIFT)
+
+        pawns = pieces[PAWN | offset]
+        if pawns:
+            forward = 8 if turn else -8
+            last_rank = chess.BB_RANK_8 if turn else chess.BB_RANK_1
+            start_rank = chess.BB_RANK_2 if turn else chess.BB_RANK_7
+            while pawns:
+                from_square = pawns.bit_length() - 1
+                pawns ^= BB_SQUARES[from_square]
+                allowed_to = allowed
+                if pinned & BB_SQUARES[from_square]:
+                    allowed_to &= rays[from_square]
+                to_square = from_square + forward
+                if not occupied & BB_SQUARES[to_square]:
+                    if allowed_to & BB_SQUARES[to_square]:
+                        _append_pawn_moves(moves, from_square, to_square, BB_SQUARES[to_square] & last_rank)
+                    if start_rank & BB_SQUARES[from_square]:
+                        double = to_square + forward
+                        if not occupied & BB_SQUARES[double] and allowed_to & BB_SQUARES[double]:
+                            moves.append(from_square | double << TO_SHIFT)
+                targets = PAWN_ATTACKS[turn][from_square] & enemy & allowed_to
+                while targets:
+                    to_square = targets.bit_length() - 1
+                    targets ^= BB_SQUARES[to_square]
+                    _append_pawn_moves(moves, from_square, to_square, BB_SQUARES[to_square] & last_rank)
+            self._en_passant_moves(moves, king)
+        return moves
+
+    def count_legal_moves(self):
+        """Numărul mutărilor legale, numărat din bitboard-uri unde este posibil."""
+        turn = self.turn
+        pieces = self.pieces
+        offset = 0 if turn else BLACK_OFFSET
+        own = self.occupied_co[turn]
+        enemy = self.occupied_co[not turn]
+        occupied = self.occupied
+        king = pieces[KING | offset].bit_length() - 1
+
+        count = 0
+        without_king = occupied ^ BB_SQUARES[king]
+        targets = KING_ATTACKS[king] & ~own
+        while targets:
+            to_square = targets.bit_length() - 1
+            targets ^= BB_SQUARES[to_square]
+            if not self.attackers_mask(not turn, to_square, without_king):
+                count += 1
+
+        checkers = self.attackers_mask(not turn, king, occupied)
+        if checkers & (checkers - 1):
+            return count
+        rare = []
+        if checkers:
+            allowed = BETWEEN[king][checkers.bit_length() - 1] | checkers
+        else:
+            allowed = BB_ALL
+            if self.castling & BACKRANKS[turn]:
+                self._castling_moves(rare, king)
+        pinned = self._pinned(turn, king)
+        rays = RAYS[king]
+        free = ~own & allowed
+
+        knights = pieces[KNIGHT | offset] & ~pinned
+        while knights:
+            from_square = knights.bit_length() - 1
+            knights ^= BB_SQUARES[from_square]
+            count += (KNIGHT_ATTACKS[from_square] & free).bit_count()
+
+        queens = pieces[QUEEN | offset]
+        for sliders, attacks in ((pieces[BISHOP | offset] | queens, _bishop_attacks),
+                                 (pieces[ROOK | offset] | queens, _rook_attacks)):
+            while sliders:
+                from_square = sliders.bit_length() - 1
+                sliders ^= BB_SQUARES[from_square]
+                targets = attacks(from_square, occupied) & free
+                if pinned & BB_SQUARES[from_square]:
+                    targets &= rays[from_square]
+                count += targets.bit_count()
+
+        pawns = pieces[PAWN | offset]
+        if pawns:
+            # Pionii nelegați, toți odată; cei legați, pe rând
+            free_pawns = pawns & ~pinned
+            empty = ~occupied & BB_ALL
+            if turn:
+                single = (free_pawns << 8) & empty
+                double = ((single & chess.BB_RANK_3) << 8) & empty
+                captures = (((free_pawns & NOT_FILE_A) << 7) & enemy, ((free_pawns & NOT_FILE_H) << 9) & enemy)
+                last_rank = chess.BB_RANK_8
+            else:
+                single = (free_pawns >> 8) & empty
+                double = ((single & chess.BB_RANK_6) >> 8) & empty
+                captures = (((free_pawns & NOT_FILE_A) >> 9) & enemy, ((free_pawns & NOT_FILE_H) >> 7) & enemy)
+                last_rank = chess.BB_RANK_1
+            count += (double & allowed).bit_count()
+            for targets in (single, captures[0], captures[1]):
+                targets &= allowed
+                count += (targets & ~last_rank).bit_count() + 4 * (targets & last_rank).bit_count()
+            pinned_pawns = pawns & pinned
+            forward = 8 if turn else -8
+            while pinned_pawns:
+                from_square = pinned_pawns.bit_length() - 1
+                pinned_pawns ^= BB_SQUARES[from_square]
+                allowed_to = allowed & rays[from_square]
+                to_square = from_square + forward
+                if not occupied & BB_SQUARES[to_square]:
+                    if allowed_to & BB_SQUARES[to_square]:
+                        count += 4 if BB_SQUARES[to_square] & last_rank else 1
+                    if (chess.BB_RANK_2 if turn else chess.BB_RANK_7) & BB_SQUARES[from_square]:
+                        double = to_square + forward
+                        if not occupied & BB_SQUARES[double] and allowed_to & BB_SQUARES[double]:
+                            count += 1
+                targets = PAWN_ATTACKS[turn][from_square] & enemy & allowed_to
+                count += (targets & ~last_rank).bit_count() + 4 * (targets & last_rank).bit_count()
+            self._en_passant_moves(rare, king)
+        return count + len(rare)
+
+    # Mutările
+
+    def is_capture(self, move):
+        flags = move & FLAGS
+        if flags:
+            return flags == EN_PASSANT
+        return bool(self.squares[move >> TO_SHIFT & 63])
+
+    def push(self, move):
+        base = self.ply * _UNDO_FIELDS
+        undo = self._undo
+        if base >= len(undo):
+            undo.extend([0] * (MAX_PLY * _UNDO_FIELDS))
+        undo[base] = move
+        undo[base + 2] = self.castling
+        undo[base + 3] = self.castling_key
+        undo[base + 4] = self.ep_square
+        undo[base + 5] = self.ep_key
+        undo[base + 6] = self.halfmove_clock
+        undo[base + 7] = self.hash
+        undo[base + 8] = self.static
+
+        turn = self.turn
+        from_square = move & 63
+        to_square = move >> TO_SHIFT & 63
+        flags = move & FLAGS
+        piece = self.squares[from_square]
+        captured = 0
+        if flags == CASTLING:
+            rank_start = from_square & ~7
+            kingside = to_square > from_square
+            self._remove(from_square)
+            rook = self._remove(to_square)
+            self._put(rank_start + (6 if kingside else 2), piece)
+            self._put(rank_start + (5 if kingside else 3), rook)
+        elif flags == EN_PASSANT:
+            captured = self._remove(to_square - 8 if turn else to_square + 8)
+            self._remove(from_square)
+            self._put(to_square, piece)
+        else:
+            if self.squares[to_square]:
+                captured = self._remove(to_square)
+            self._remove(from_square)
+            promotion = move >> PROMOTION_SHIFT & 7
+            if promotion:
+                self._put(to_square, promotion | (piece & BLACK_OFFSET))
+            else:
+                self._put(to_square, piece)
+        undo[base + 1] = captured
+
+        self.hash ^= ZOBRIST_TURN ^ self.ep_key
+        if self.castling:
+            touched = BB_SQUARES[from_square] | BB_SQUARES[to_square]
+            if piece & 7 == KING:
+                touched |= BACKRANKS[turn]
+            if self.castling & touched:
+                self.castling &= ~touched
+                key = self._castling_key()
+                self.hash ^= self.castling_key ^ key
+                self.castling_key = key
+
+        self.turn = not turn
+        if piece & 7 == PAWN:
+            self.halfmove_clock = 0
+            if to_square - from_square in (16, -16):
+                self.ep_square = (from_square + to_square) >> 1
+                self.ep_key = self._ep_key()
+                self.hash ^= self.ep_key
+            else:
+                self.ep_square = None
+                self.ep_key = 0
+        else:
+            self.halfmove_clock = 0 if captured else self.halfmove_clock + 1
+            self.ep_square = None
+            self.ep_key = 0
+        self.ply += 1
+
+    def pop(self):
+        self.ply -= 1
+        base = self.ply * _UNDO_FIELDS
+        undo = self._undo
+        move = undo[base]
+        captured = undo[base + 1]
+        turn = self.turn = not self.turn
+        from_square = move & 63
+        to_square = move >> TO_SHIFT & 63
+        flags = move & FLAGS
+        if flags == CASTLING:
+            rank_start = from_square & ~7
+            kingside = to_square > from_square
+            king = self._remove(rank_start + (6 if kingside else 2))
+            rook = self._remove(rank_start + (5 if kingside else 3))
+            self._put(from_square, king)
+            self._put(to_square, rook)
+        elif flags == EN_PASSANT:
+            self._put(from_square, self._remove(to_square))
+            self._put(to_square - 8 if turn else to_square + 8, captured)
+        else:
+            piece = self._remove(to_square)
+            if move >> PROMOTION_SHIFT & 7:
+                piece = PAWN | (piece & BLACK_OFFSET)
+            self._put(from_square, piece)
+            if captured:
+                self._put(to_square, captured)
+        self.castling = undo[base + 2]
+        self.castling_key = undo[base + 3]
+        self.ep_square = undo[base + 4]
+        self.ep_key = undo[base + 5]
+        self.halfmove_clock = undo[base + 6]
+        self.hash = undo[base + 7]
+        self.static = undo[base + 8]
+
+    def push_null(self):
+        """Mutarea nulă: doar rândul la mutare se schimbă (pentru null-move pruning)."""
+        base = self.ply * _UNDO_FIELDS
+        undo = self._undo
+        if base >= len(undo):
+            undo.extend([0] * (MAX_PLY * _UNDO_FIELDS))
+        undo[base + 4] = self.ep_square
+        undo[base + 5] = self.ep_key
+        undo[base + 6] = self.halfmove_clock
+        undo[base + 7] = self.hash
+        self.hash ^= ZOBRIST_TURN ^ self.ep_key
+        self.ep_square = None
+        self.ep_key = 0
+        self.halfmove_clock += 1
+        self.turn = not self.turn
+        self.ply += 1
+
+    def pop_null(self):
+        self.ply -= 1
+        base = self.ply * _UNDO_FIELDS
+        undo = self._undo
+        self.turn = not self.turn
+        self.ep_square = undo[base + 4]
+        self.ep_key = undo[base + 5]
+        self.halfmove_clock = undo[base + 6]
+        self.hash = undo[base + 7]
+
+    def has_pieces(self, color):
+        """Culoarea are și alte piese în afară de pioni și rege (mutarea nulă este riscantă fără ele)."""
+        pieces = self.pieces
+        offset = 0 if color else BLACK_OFFSET
+        return bool(pieces[KNIGHT | offset] | pieces[BISHOP | offset] | pieces[ROOK | offset] | pieces[QUEEN | offset])
+
+    # Conversia la python-chess
+
+    def to_move(self, move, chess960=True):
+        """chess.Move pentru mutarea codificată; rocada în notația tablei (Chess960 sau standard)."""
+        from_square = move & 63
+        to_square = move >> TO_SHIFT & 63
+        if move & FLAGS == CASTLING and not chess960:
+            to_square = (from_square & ~7) + (6 if to_square > from_square else 2)
+        return chess.Move(from_square, to_square, (move >> PROMOTION_SHIFT & 7) or None)
+
+
+def perft(position, depth):
+    """Numărul de poziții la adâncimea `depth` (pentru verificarea generatorului)."""
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.push(move)
+        nodes += perft(position, depth - 1)
+        position.pop()
+    return nodes
@@ -0,0 +1,585 @@
+"""
+Căutarea AI: Minimax cu Alpha-Beta Pruning, adâncire iterativă cu buget de
+timp/noduri și ordonarea mutărilor (mutarea din tabela de transpoziții,
+capturi MVV-LVA, mutări killer și euristica istoricului).
+
+Extensiile selective (`SearchOptions`), fiecare oprită sau pornită separat:
+căutarea de liniștire (doar capturi, cu stand-pat) la frunze, null-move
+pruning, reducerea mutărilor târzii (LMR) și căutarea variantei principale
+(PVS), care caută mutările de după prima cu o fereastră nulă. Fără căutarea
+de liniștire, `batch` evaluează deodată (engine/batch.py) toate pozițiile de
+după mutările unui nod de la frontieră (adâncimea 1).
+
+Pozițiile din tabelele de final (engine/tablebase.py), dacă sunt date, au
+scorul exact din tabele și nu mai sunt căutate.
+
+Căutarea lucrează pe o `Position` (engine/position.py) creată din tablă la
+pornire; mutările interne sunt întregi și sunt convertite în chess.Move doar
+la rădăcină.
+"""
+import math
+import time
+
+import chess
+
+from engine.batch import BatchEvaluator
+from engine.position import CASTLING, EN_PASSANT, FLAGS, PROMOTION_SHIFT, TO_SHIFT, Position
+from engine.tablebase import TABLEBASE_WIN
+from engine.transposition import EXACT, LOWER, UPPER
+
+# Valorile fixe folosite doar pentru ordonarea capturilor (MVV-LVA)
+ORDERING_VALUES = {
+    chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3,
+    chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 10
+}
+
+TT_MOVE_SCORE = 1000000
+CAPTURE_SCORE = 100000
+PROMOTION_SCORE = 90000
+KILLER_SCORES = (80000, 70000)
+
+# Cât de des (în noduri) se verifică ceasul
+TIME_CHECK_INTERVAL = 128
+
+# Regula celor 75 de mutări (150 de semimutări fără captură sau mutare de pion)
+SEVENTYFIVE_MOVES = 150
+
+# Null-move pruning: reducerea adâncimii și adâncimea minimă
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+
+# LMR: primele mutări sunt căutate complet, celelalte mutări liniștite cu o adâncime mai puțin
+LMR_FULL_DEPTH_MOVES = 3
+LMR_MIN_DEPTH = 3
+LMR_REDUCTION = 2
+
+INF = float('inf')
+
+# Scorurile din tabelele de final (câștig în n semimutări de la rădăcină) sunt
+# cele de cel puțin TABLEBASE_WIN_MIN în valoare absolută; evaluarea nu ajunge la ele
+TABLEBASE_WIN_MIN = TABLEBASE_WIN // 2
+
+
+def _above(score):
+    """Fereastra nulă (score, _above(score)): cel mai mic scor mai mare decât `score`."""
+    return math.nextafter(score, INF)
+
+
+def _below(score):
+    return math.nextafter(score, -INF)
+
+
+def _score_to_tt(score, ply):
+    """
+    Scorul de păstrat în tabela de transpoziții: un scor din tabelele de final,
+    numărat de la rădăcină, devine relativ la nod (distanța de la nod la mat),
+    ca să fie corect și când poziția este atinsă la alt ply sau din altă rădăcină.
+    """
+    if score >= TABLEBASE_WIN_MIN:
+        return score + ply
+    if score <= -TABLEBASE_WIN_MIN:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    """Inversul lui `_score_to_tt`: scorul din tabelă, numărat de la rădăcina căutării curente."""
+    if score >= TABLEBASE_WIN_MIN:
+        return score - ply
+    if score <= -TABLEBASE_WIN_MIN:
+        return score + ply
+    return score
+
+
+def search_stats(nodes, depth, cutoffs, expanded, tt_hits, elapsed):
+    """Statisticile unei căutări, în forma returnată clienților."""
+    return {
+        "nodes": nodes,
+        "nps": int(nodes / elapsed) if elapsed > 0 else nodes,
+        "depth": depth,
+        "cutoff_ratio": round(cutoffs / expanded, 4) if expanded else 0.0,
+        "tt_hits": tt_hits,
+        "elapsed": round(elapsed, 4)
+    }
+
+
+class SearchTimeout(Exception):
+    """Bugetul de timp sau de noduri a fost epuizat în timpul unei iterații."""
+
+
+class SearchLimits:
+    """
+    Bugetul unei căutări: adâncime maximă, timp (secunde) și număr de noduri.
+    Timpul și nodurile pot lipsi (None), caz în care nu sunt limitate.
+    `stop_event` (threading.Event), dacă este dat, oprește căutarea din exterior.
+    """
+
+    def __init__(self, max_depth=3, time_limit=None, node_limit=None, stop_event=None):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.stop_event = stop_event
+
+    def stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+
+class SearchOptions:
+    """
+    Extensiile selective ale căutării. Toate, în afară de `batch`, sunt
+    pornite implicit ("all"); pot fi alese pentru comparații
+    (benchmarks/run.py --features). `batch` are efect doar fără `quiescence`
+    și este oprită implicit: la câteva zeci de mutări pe nod, costul fix al
+    operațiilor NumPy este mai mare decât evaluarea pe rând.
+    """
+
+    NAMES = ("quiescence", "null_move", "lmr", "pvs", "batch")
+
+    def __init__(self, quiescence=True, null_move=True, lmr=True, pvs=True, batch=False):
+        self.quiescence = quiescence
+        self.null_move = null_move
+        self.lmr = lmr
+        self.pvs = pvs
+        self.batch = batch
+
+    @classmethod
+    def parse(cls, text):
+        """Din "all", "none" sau o listă separată prin virgule (de exemplu "quiescence,pvs")."""
+        text = (text or "").strip().lower()
+        if text == "all":
+            return cls()
+        names = [name.strip() for name in text.split(",") if name.strip() and name.strip() != "none"]
+        unknown = set(names) - set(cls.NAMES)
+        if unknown:
+            raise ValueError(f"Unknown search features: {', '.join(sorted(unknown))}")
+        return cls(**{name: name in names for name in cls.NAMES})
+
+    def __str__(self):
+        enabled = [name for name in self.NAMES if getattr(self, name)]
+        return ",".join(enabled) if enabled else "none"
+
+
+class Search:
+    """
+    O căutare pentru o singură mutare. Tabela de transpoziții este primită din
+    exterior pentru a fi împărțită între cereri; mutările killer și istoricul
+    sunt locale căutării. Termenii statici ai evaluatorului (`square_table`)
+    sunt ținuți incremental de `Position`. `tablebase` (engine.tablebase.Tablebase)
+    este opțională.
+    """
+
+    def __init__(self, evaluator, transposition_table, limits=None, options=None, tablebase=None):
+        self.evaluator = evaluator
+        self.tt = transposition_table
+        self.limits = limits or SearchLimits()
+        self.options = options or SearchOptions()
+        self.tablebase = tablebase
+        self.nodes = 0
+        self.depth_reached = 0
+        self.cutoffs = 0  # noduri încheiate printr-o tăietură beta
+        self.expanded = 0  # noduri ale căror mutări au fost căutate
+        self.tt_hits = 0
+        self.elapsed = 0.0
+        self._started = None
+        self.position = None
+        self.batch_evaluator = None
+        self._prefetched = {}
+        self.killers = []
+        self.history = [0] * 8192  # (culoare, de la, la)
+        self._deadline = None
+        self._interruptible = True
+
+    # Bugetul
+
+    def _check_budget(self):
+        self.nodes += 1
+        if not self._interruptible:
+            return
+        if self.limits.node_limit is not None and self.nodes > self.limits.node_limit:
+            raise SearchTimeout()
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                raise SearchTimeout()
+            if self.limits.stopped():
+                raise SearchTimeout()
+
+    # Ordonarea mutărilor
+
+    def _killers_at(self, ply):
+        while len(self.killers) <= ply:
+            self.killers.append([None, None])
+        return self.killers[ply]
+
+    def _record_cutoff(self, position, move, depth, ply):
+        if position.is_capture(move) or move >> PROMOTION_SHIFT & 7:
+            return
+        killers = self._killers_at(ply)
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move & 4095 | position.turn << 12] += depth * depth
+
+    def order_moves(self, position, moves, tt_move=None, ply=0):
+        """Sortează pe loc mutările (întregi) ale poziției și returnează lista."""
+        killers = self._killers_at(ply)
+        squares = position.squares
+        history = self.history
+        turn = position.turn << 12
+
+        def score(move):
+            if move == tt_move:
+                return TT_MOVE_SCORE
+            flags = move & FLAGS
+            if flags == EN_PASSANT:
+                return CAPTURE_SCORE + 10 * ORDERING_VALUES[chess.PAWN] - ORDERING_VALUES[chess.PAWN]
+            victim = squares[move >> TO_SHIFT & 63] & 7 if flags != CASTLING else 0
+            if victim:
+                attacker = squares[move & 63] & 7
+                return CAPTURE_SCORE + 10 * ORDERING_VALUES[victim] - ORDERING_VALUES[attacker]
+            promotion = move >> PROMOTION_SHIFT & 7
+            if promotion:
+                return PROMOTION_SCORE + ORDERING_VALUES[promotion]
+            if move == killers[0]:
+                return KILLER_SCORES[0]
+            if move == killers[1]:
+                return KILLER_SCORES[1]
+            return history[move & 4095 | turn]
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    # Căutarea
+
+    def _store(self, key, depth, value, alpha_orig, beta_orig, best_move, ply):
+        if value <= alpha_orig:
+            bound = UPPER
+        elif value >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, _score_to_tt(value, ply), bound, best_move)
+
+    def minimax(self, position, depth, alpha, beta, is_maximizing, ply=0, allow_null=True):
+        """
+        Minimax cu Alpha-Beta Pruning. Scorul este întotdeauna din perspectiva
+        albului; albul maximizează, negrul minimizează. Scorurile în afara
+        ferestrei sunt limite (fail-soft).
+        """
+        self._check_budget()
+        if self.tablebase is not None and position.occupied.bit_count() == 3:
+            score = self.tablebase.score(position, ply)
+            if score is not None:
+                return score
+        alpha_orig, beta_orig = alpha, beta
+        key = position.hash
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            self.tt_hits += 1
+            if entry.depth >= depth:
+                score = _score_from_tt(entry.score, ply)
+                if entry.bound == EXACT:
+                    return score
+                if entry.bound == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score
+            tt_move = entry.best_move
+
+        if depth <= 0:
+            if self.options.quiescence:
+                return self.quiescence(position, alpha, beta, is_maximizing)
+            return self._evaluate(position, key, 0)
+        moves = position.legal_moves()
+        if self._is_game_over(position, moves):
+            return self._evaluate(position, key, depth)
+
+        options = self.options
+        in_check = (options.null_move or options.lmr) and depth >= 2 and position.is_check()
+
+        # Null-move pruning: dacă nici cedând rândul adversarul nu ajunge sub
+        # limita ferestrei, o mutare reală nu va face mai rău
+        if options.null_move and allow_null and ply > 0 and depth >= NULL_MOVE_MIN_DEPTH \
+                and not in_check and position.has_pieces(position.turn):
+            null_depth = depth - 1 - NULL_MOVE_REDUCTION
+            if is_maximizing and beta < INF:
+                position.push_null()
+                try:
+                    value = self.minimax(position, null_depth, _below(beta), beta, False, ply + 1, False)
+                finally:
+                    position.pop_null()
+                if value >= beta:
+                    return value
+            elif not is_maximizing and alpha > -INF:
+                position.push_null()
+                try:
+                    value = self.minimax(position, null_depth, alpha, _above(alpha), True, ply + 1, False)
+                finally:
+                    position.pop_null()
+                if value <= alpha:
+                    return value
+
+        self.expanded += 1
+        self.order_moves(position, moves, tt_move, ply)
+        prefetch = depth == 1 and self.batch_evaluator is not None and len(moves) > 2
+        killers = self._killers_at(ply)
+        reduce_late = options.lmr and depth >= LMR_MIN_DEPTH and not in_check
+        best_move = None
+        best_value = -INF if is_maximizing else INF
+        for index, move in enumerate(moves):
+            reduced = (reduce_late and index >= LMR_FULL_DEPTH_MOVES and move != killers[0]
+                       and move != killers[1] and not position.is_capture(move)
+                       and not move >> PROMOTION_SHIFT & 7)
+            zero_window = index > 0 and (options.pvs or reduced)
+            position.push(move)
+            try:
+                value = self._search_child(position, depth - 1 - (LMR_REDUCTION if reduced else 0),
+                                           alpha, beta, is_maximizing, ply, zero_window, reduced)
+            finally:
+                position.pop()
+            if is_maximizing:
+                if value > best_value:
+                    best_value = value
+                    best_move = move
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value = value
+                    best_move = move
+                beta = min(beta, value)
+            if beta <= alpha:
+                self.cutoffs += 1
+                self._record_cutoff(position, move, depth, ply)
+                break
+            if prefetch and index == 0:
+                # Prima mutare nu a produs o tăietură: probabil vor fi evaluate toate celelalte
+                self._prefetch(position, moves[1:])
+        if self._prefetched:
+            self._prefetched.clear()
+        self._store(key, depth, best_value, alpha_orig, beta_orig, best_move, ply)
+        return best_value
+
+    def _prefetch(self, position, moves):
+        """
+        Evaluează deodată pozițiile de după mutări (frunzele unui nod de
+        adâncime 1), în afara celor deja evaluate în tabela de transpoziții.
+        `_evaluate` folosește apoi scorurile calculate, pe măsură ce ajunge la ele.
+        """
+        children = []
+        for move in moves:
+            position.push(move)
+            entry = self.tt.peek(position.hash)
+            if entry is None or entry.bound != EXACT:
+                children.append(position.copy())
+            position.pop()
+        if len(children) > 1:
+            scores = self.batch_evaluator.evaluate_positions(children).tolist()
+            self._prefetched = {child.hash: score for child, score in zip(children, scores)}
+
+    def _search_child(self, position, depth, alpha, beta, is_maximizing, ply, zero_window, reduced):
+        """
+        Caută poziția de după o mutare. Cu `zero_window`, verifică întâi doar
+        dacă mutarea depășește fereastra (PVS/LMR) și o caută din nou complet,
+        la adâncimea întreagă, numai dacă o depășește.
+        """
+        full_depth = depth + (LMR_REDUCTION if reduced else 0)
+        if not zero_window:
+            return self.minimax(position, depth, alpha, beta, not is_maximizing, ply + 1)
+        if is_maximizing:
+            value = self.minimax(position, depth, alpha, _above(alpha), False, ply + 1)
+            if value > alpha and (reduced or value < beta):
+                value = self.minimax(position, full_depth, alpha, beta, False, ply + 1)
+        else:
+            value = self.minimax(position, depth, _below(beta), beta, True, ply + 1)
+            if value < beta and (reduced or value > alpha):
+                value = self.minimax(position, full_depth, alpha, beta, True, ply + 1)
+        return value
+
+    def quiescence(self, position, alpha, beta, is_maximizing):
+        """
+        Căutarea de liniștire: la frunze sunt căutate doar capturile (toate
+        mutările, dacă regele este în șah), până când poziția este liniștită.
+        Jucătorul la mutare poate oricând să nu captureze (stand-pat).
+        """
+        self._check_budget()
+        in_check = position.is_check()
+        moves = position.legal_moves()
+        stand_pat = self.evaluator.evaluate_position(position, len(moves), in_check)
+        if self._is_game_over(position, moves):
+            return stand_pat
+        if not in_check:
+            if is_maximizing:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            moves = [move for move in moves if position.is_capture(move)]
+            if not moves:
+                return stand_pat
+        self.order_moves(position, moves, None, 0)
+        best_value = stand_pat if not in_check else (-INF if is_maximizing else INF)
+        for move in moves:
+            position.push(move)
+            try:
+                value = self.quiescence(position, alpha, beta, not is_maximizing)
+            finally:
+                position.pop()
+            if is_maximizing:
+                best_value = max(best_value, value)
+                alpha = max(alpha, value)
+            else:
+                best_value = min(best_value, value)
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
+        return best_value
+
+    def _evaluate(self, position, key, depth):
+        score = self._prefetched.pop(key, None)
+        if score is None:
+            score = self.evaluator.evaluate_position(position)
+        self.tt.store(key, depth, score, EXACT)
+        return score
+
+    @staticmethod
+    def _is_game_over(position, moves):
+        """Mat, pat, material insuficient sau regula celor 75 de mutări, ca `board.is_game_over()`."""
+        return (not moves or position.halfmove_clock >= SEVENTYFIVE_MOVES
+                or position.is_insufficient_material())
+
+    def start(self, board):
+        """Pornește ceasul bugetului și creează poziția internă pentru `board`."""
+        self._started = time.monotonic()
+        if self.limits.time_limit is not None:
+            self._deadline = time.monotonic() + self.limits.time_limit
+        self.position = Position.from_board(board, self.evaluator.square_table())
+        if self.options.batch and not self.options.quiescence:
+            self.batch_evaluator = BatchEvaluator(self.evaluator)
+
+    def _encode_moves(self, board, moves):
+        """Mutările chess.Move ale rădăcinii, ca întregi."""
+        position = self.position
+        by_move = {position.to_move(move, board.chess960): move for move in position.legal_moves()}
+        return [by_move[move] for move in moves]
+
+    def ordered_root_moves(self, board, previous_best=None):
+        """Mutările legale ale rădăcinii (chess.Move), în ordinea în care ar fi căutate."""
+        position = self.position
+        previous = self._encode_moves(board, [previous_best])[0] if previous_best else None
+        moves = self.order_moves(position, position.legal_moves(), previous)
+        return [position.to_move(move, board.chess960) for move in moves]
+
+    def search_root(self, board, depth, previous_best=None, root_moves=None, bound=None):
+        """
+        Caută mutările de la rădăcină (toate, sau doar `root_moves`) la
+        adâncimea dată, începând cu cea mai bună mutare din iterația anterioară.
+        Cu `bound`, sunt căutate doar mutările care depășesc acest scor.
+        Returnează (mutare, scor) pentru jucătorul aflat la mutare; mutarea
+        este None dacă nicio mutare nu depășește `bound`.
+        """
+        position = self.position
+        if root_moves is None:
+            moves = position.legal_moves()
+        else:
+            moves = self._encode_moves(board, root_moves)
+        previous = self._encode_moves(board, [previous_best])[0] if previous_best else None
+        is_maximizing = board.turn == chess.WHITE
+        best_move = None
+        if bound is not None:
+            best_value = bound
+        else:
+            best_value = -INF if is_maximizing else INF
+        for move in self.order_moves(position, moves, previous):
+            # Cu PVS, mutările de după prima sunt doar verificate cu o fereastră nulă
+            zero_window = self.options.pvs and best_value not in (INF, -INF)
+            position.push(move)
+            try:
+                # Cel mai bun scor de până acum este limita ferestrei: o mutare
+                # care nu îl depășește nu poate fi aleasă oricum.
+                if is_maximizing:
+                    value = best_value
+                    if zero_window:
+                        value = self.minimax(position, depth - 1, best_value, _above(best_value), False, 1)
+                    if not zero_window or value > best_value:
+                        value = self.minimax(position, depth - 1, best_value, INF, False, 1)
+                else:
+                    value = best_value
+                    if zero_window:
+                        value = self.minimax(position, depth - 1, _below(best_value), best_value, True, 1)
+                    if not zero_window or value < best_value:
+                        value = self.minimax(position, depth - 1, -INF, best_value, True, 1)
+            finally:
+                position.pop()
+            improves = value > best_value if is_maximizing else value < best_value
+            if improves or (best_move is None and bound is None):
+                best_value = value
+                best_move = move
+        if best_move is None:
+            return None, best_value
+        return position.to_move(best_move, board.chess960), best_value
+
+    def iterative_deepening(self, board):
+        """
+        Adâncire iterativă: caută la adâncimea 1, 2, ... până la adâncimea
+        maximă sau până se epuizează bugetul. Returnează cea mai bună mutare
+        din ultima iterație completă. Prima iterație nu este întreruptă,
+        ca să existe întotdeauna o mutare.
+        """
+        self.start(board)
+        best_move, best_value = None, None
+        for depth in range(1, self.limits.max_depth + 1):
+            self._interruptible = depth > 1
+            try:
+                best_move, best_value = self.search_root(board, depth, best_move)
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+            if best_move is None:
+                break
+        self.elapsed = time.monotonic() - self._started
+        return best_move, best_value
+
+    def multipv(self, board, count):
+        """
+        Adâncire iterativă pentru primele `count` mutări (multi-PV): la fiecare
+        adâncime, mutarea următoare este cea mai bună dintre mutările încă
+        negăsite, cu scorul ei exact. Returnează [(mutare, scor)] din ultima
+        iterație completă, de la cea mai bună.
+        """
+        self.start(board)
+        lines = []
+        root_moves = list(board.legal_moves)
+        for depth in range(1, self.limits.max_depth + 1):
+            self._interruptible = depth > 1
+            # Mutările găsite la iterația anterioară sunt căutate primele
+            remaining = [move for move, _ in lines]
+            remaining += [move for move in root_moves if move not in remaining]
+            found = []
+            try:
+                while remaining and len(found) < count:
+                    move, value = self.search_root(board, depth, remaining[0], remaining)
+                    found.append((move, value))
+                    remaining.remove(move)
+            except SearchTimeout:
+                break
+            # Cu extensiile selective, o mutare găsită mai târziu poate avea un scor mai bun
+            found.sort(key=lambda line: line[1], reverse=board.turn == chess.WHITE)
+            lines = found
+            self.depth_reached = depth
+            if not lines:
+                break
+        self.elapsed = time.monotonic() - self._started
+        return lines
+
+    def counters(self):
+        return {"nodes": self.nodes, "cutoffs": self.cutoffs,
+                "expanded": self.expanded, "tt_hits": self.tt_hits}
+
+    def stats(self):
+        return search_stats(self.nodes, self.depth_reached, self.cutoffs,
+                            self.expanded, self.tt_hits, self.elapsed)
@@ -0,0 +1,341 @@
+"""
+Tabelele de final (tablebases) pentru finalurile cu trei piese: KQK, KRK și KPK.
+
+Pentru fiecare poziție a unui final, tabela păstrează rezultatul exact pentru
+jucătorul la mutare (câștig, remiză sau pierdere) și distanța până la mat, în
+semimutări. Tabelele sunt calculate offline prin analiză retrogradă și scrise
+într-un singur fișier binar, un octet pe poziție (din directorul backend):
+
+    python -m engine.tablebase --workers 8
+
+Serverul deschide fișierul cu `mmap` la prima folosire: căutarea AI (`Search`)
+ia scorul exact al pozițiilor din tabele fără să le mai caute, iar
+`find_ai_move` joacă direct mutarea cea mai scurtă spre mat (sau cea mai
+lungă apărare). Dacă fișierul lipsește, AI-ul caută normal.
+
+Regula celor 75 de mutări nu este urmărită: distanțele sunt cele ale jocului
+optim, mult sub 150 de semimutări.
+"""
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import numpy as np
+
+from engine.position import BLACK_OFFSET, KING, Position
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tablebases.bin")
+
+# Finalurile, în ordinea generării: KPK ajunge prin promovare în KQK și KRK
+ENDGAMES = (("KQK", chess.QUEEN), ("KRK", chess.ROOK), ("KPK", chess.PAWN))
+
+# Fișierul: antetul, apoi o intrare (nume, offset) pentru fiecare tabelă
+MAGIC = b"FRCTB\x00\x00\x01"
+HEADER = struct.Struct("<8sI")
+ENTRY = struct.Struct("<4sQ")
+
+# O tabelă: (la mutare, regele părții mai tari, regele celeilalte, piesa), cu
+# partea mai tare albă; „la mutare” este 0 când mută partea mai tare
+TABLE_SIZE = 2 * 64 * 64 * 64
+
+# Octetul unei poziții: 0 = remiză (sau poziție imposibilă), d = câștig în d
+# semimutări, LOSS | d = pierdere în d semimutări (0 = mat)
+LOSS = 128
+
+# Scorul unei poziții câștigate (din perspectiva albului, ca în căutare),
+# mai mic cu distanța până la mat: cea mai scurtă cale spre mat este preferată
+TABLEBASE_WIN = 1000
+
+# Stările folosite la generare
+_UNKNOWN, _WIN, _LOSS, _DRAW = 0, 1, 2, 3
+_DRAW_REF = -1
+
+
+def table_index(strong_to_move, strong_king, weak_king, piece):
+    return ((int(not strong_to_move) * 64 + strong_king) * 64 + weak_king) * 64 + piece
+
+
+def decode(value):
+    """Octetul din tabelă ca (rezultat, semimutări): rezultatul este 1, 0 sau -1 pentru jucătorul la mutare."""
+    if value & LOSS:
+        return -1, value & ~LOSS
+    return (1, value) if value else (0, 0)
+
+
+class Tablebase:
+    """
+    Fișierul este deschis o singură dată, la prima căutare în tabele, și
+    rămâne mapat în memorie (`mmap`): paginile sunt citite de sistem doar
+    când sunt folosite și sunt împărțite între procesele serverului.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._mmap = None
+        self._offsets = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        with self._lock:
+            if self._offsets is not None:
+                return self._offsets
+            offsets = {}
+            try:
+                with open(self.path, "rb") as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, count = HEADER.unpack_from(data, 0)
+                if magic != MAGIC:
+                    raise ValueError("not a tablebase file")
+                piece_types = dict(ENDGAMES)
+                for i in range(count):
+                    name, offset = ENTRY.unpack_from(data, HEADER.size + i * ENTRY.size)
+                    name = name.rstrip(b"\0").decode()
+                    if name in piece_types and offset + TABLE_SIZE <= len(data):
+                        offsets[piece_types[name]] = offset
+                self._mmap = data
+            except FileNotFoundError:
+                pass
+            except (ValueError, struct.error) as e:
+                print(f"Error loading tablebases {self.path}: {e}")  # Debugging
+                offsets = {}
+            self._offsets = offsets
+            return offsets
+
+    @property
+    def endgames(self):
+        offsets = self._open()
+        return [name for name, piece_type in ENDGAMES if piece_type in offsets]
+
+    def probe(self, position):
+        """
+        (rezultat, semimutări) pentru jucătorul la mutare din `position`
+        (engine.position.Position), sau None dacă poziția nu este în tabele.
+        """
+        if position.occupied.bit_count() != 3 or position.castling:
+            return None
+        offsets = self._offsets if self._offsets is not None else self._open()
+        strong = position.occupied_co[chess.WHITE].bit_count() == 2
+        own = position.occupied_co[strong]
+        piece = (own & ~position.pieces[KING if strong else KING | BLACK_OFFSET]).bit_length() - 1
+        offset = offsets.get(position.squares[piece] & 7)
+        if offset is None:
+            return None
+        # Cu partea mai tare neagră, tabla este oglindită pe verticală
+        flip = 0 if strong else 56
+        index = table_index(position.turn == strong, position.king(strong) ^ flip,
+                            position.king(not strong) ^ flip, piece ^ flip)
+        return decode(self._mmap[offset + index])
+
+    def score(self, position, ply=0):
+        """
+        Scorul exact al poziției din perspectiva albului, ca în căutare, sau None.
+        `ply` este distanța de la rădăcina căutării: matul este numărat de acolo,
+        deci o conversie mai rapidă are un scor mai bun.
+        """
+        result = self.probe(position)
+        if result is None:
+            return None
+        outcome, plies = result
+        score = outcome * (TABLEBASE_WIN - (ply + plies)) if outcome else 0
+        return score if position.turn == chess.WHITE else -score
+
+    def best_move(self, board):
+        """
+        Cea mai bună mutare după tabele pentru `board` (chess.Board): cel mai
+        scurt mat, altfel o remiză, altfel cea mai lungă apărare. Returnează
+        (mutare, scor din perspectiva albului) sau None dacă poziția nu este în tabele.
+        """
+        if not chess.popcount(board.occupied) == 3 or not self._open():
+            return None
+        position = Position.from_board(board)
+        if self.probe(position) is None:
+            return None
+        best_move, best_key, best_result = None, None, None
+        for move in position.legal_moves():
+            position.push(move)
+            # În afara tabelelor rămân doar KK, KBK și KNK: remize
+            outcome, plies = self.probe(position) or (0, 0)
+            position.pop()
+            outcome, plies = -outcome, plies + 1
+            key = (outcome, -plies) if outcome > 0 else (outcome, plies)
+            if best_key is None or key > best_key:
+                best_move, best_key, best_result = move, key, (outcome, plies)
+        if best_move is None:
+            return None
+        outcome, plies = best_result
+        score = outcome * (TABLEBASE_WIN - plies) if outcome else 0
+        return position.to_move(best_move, board.chess960), score if board.turn == chess.WHITE else -score
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = None
+            self._offsets = None
+
+
+# Generarea
+
+def _child_ref(position, table_ids):
+    """Referința poziției de după o mutare: (tabelă, index) codificat ca întreg, sau _DRAW_REF."""
+    if position.occupied.bit_count() == 2:
+        return _DRAW_REF
+    strong = position.occupied_co[chess.WHITE]
+    piece = (strong & ~position.pieces[KING]).bit_length() - 1
+    table_id = table_ids.get(position.squares[piece])
+    if table_id is None:
+        # Promovare la nebun sau cal: material insuficient
+        return _DRAW_REF
+    index = table_index(position.turn == chess.WHITE, position.king(chess.WHITE),
+                        position.king(chess.BLACK), piece)
+    return table_id * TABLE_SIZE + index
+
+
+def _generate_edges(piece_type, strong_king, table_ids):
+    """
+    Rulează într-un proces din pool: pozițiile finalului cu regele părții mai
+    tari pe `strong_king`, cu mutările lor. Returnează (părinți, copii) ca
+    muchii ale grafului, pozițiile de mat și pozițiile de pat.
+    """
+    position = Position()
+    parents = array("i")
+    children = array("i")
+    mates = array("i")
+    stalemates = array("i")
+    weak_code = KING | BLACK_OFFSET
+    for strong_to_move in (True, False):
+        for weak_king in range(64):
+            if weak_king == strong_king or chess.BB_KING_ATTACKS[strong_king] & chess.BB_SQUARES[weak_king]:
+                continue
+            for piece in range(64):
+                if piece in (strong_king, weak_king):
+                    continue
+                if piece_type == chess.PAWN and chess.BB_SQUARES[piece] & chess.BB_BACKRANKS:
+                    continue
+                position._put(strong_king, KING)
+                position._put(weak_king, weak_code)
+                position._put(piece, piece_type)
+                position.turn = strong_to_move
+                index = table_index(strong_to_move, strong_king, weak_king, piece)
+                # Partea care nu este la mutare nu poate fi în șah
+                if not (strong_to_move and position.attackers_mask(chess.WHITE, weak_king, position.occupied)):
+                    moves = position.legal_moves()
+                    if not moves:
+                        (mates if position.is_check() else stalemates).append(index)
+                    for move in moves:
+                        position.push(move)
+                        parents.append(index)
+                        children.append(_child_ref(position, table_ids))
+                        position.pop()
+                for square in (strong_king, weak_king, piece):
+                    position._remove(square)
+    return parents.tobytes(), children.tobytes(), mates.tobytes(), stalemates.tobytes()
+
+
+def solve(parents, children, mates, stalemates, tables):
+    """
+    Analiza retrogradă, vectorizată pe toate pozițiile: la runda n, o poziție
+    este câștigată dacă o mutare duce într-o poziție pierdută, și pierdută
+    dacă toate mutările duc în poziții câștigate (toate sunt cunoscute cel
+    târziu la runda n - 1). Mutările care ies din tabelă (promovări, capturi)
+    au rezultatul cunoscut din `tables`. Returnează octeții tabelei.
+    """
+    state = np.zeros(TABLE_SIZE, np.int8)
+    dist = np.zeros(TABLE_SIZE, np.int16)
+    state[mates] = _LOSS
+    state[stalemates] = _DRAW
+
+    table_id = children // TABLE_SIZE
+    internal = (children >= 0) & (table_id == len(tables))
+    child_index = np.where(internal, children % TABLE_SIZE, 0)
+    # Rezultatul mutărilor care ies din tabelă, pentru jucătorul de la mutare după ele
+    external_state = np.full(len(children), _DRAW, np.int8)
+    external_dist = np.zeros(len(children), np.int16)
+    for i, table in enumerate(tables):
+        selected = (children >= 0) & (table_id == i)
+        values = table[children[selected] % TABLE_SIZE]
+        external_state[selected] = np.where(values & LOSS, _LOSS, np.where(values, _WIN, _DRAW))
+        external_dist[selected] = values & (LOSS - 1)
+    child_count = np.bincount(parents, minlength=TABLE_SIZE)
+    last_external = int(external_dist.max(initial=0))
+
+    n = 1
+    while True:
+        child_state = np.where(internal, state[child_index], external_state)
+        child_dist = np.where(internal, dist[child_index], external_dist)
+        # Rezultatele aflate la runda n nu sunt încă vizibile
+        child_state[child_dist >= n] = _UNKNOWN
+        unknown = state == _UNKNOWN
+        won = np.zeros(TABLE_SIZE, bool)
+        won[parents[child_state == _LOSS]] = True
+        won &= unknown
+        lost = (np.bincount(parents[child_state == _WIN], minlength=TABLE_SIZE) == child_count) & unknown
+        lost &= child_count > 0
+        state[won] = _WIN
+        state[lost] = _LOSS
+        dist[won | lost] = n
+        if not (won.any() or lost.any()) and n > last_external:
+            break
+        n += 1
+
+    if dist.max() >= LOSS:
+        raise ValueError("Distance to mate does not fit in a byte")
+    return np.where(state == _WIN, dist, np.where(state == _LOSS, LOSS | dist, 0)).astype(np.uint8)
+
+
+def generate(piece_type, tables, table_ids, workers=None):
+    """Tabela unui final: mutările pozițiilor pe un pool de procese, apoi analiza retrogradă."""
+    parts = ([], [], [], [])
+    # Mutările care rămân în final trimit la tabela care se generează
+    table_ids = {**table_ids, piece_type: len(tables)}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(_generate_edges, [piece_type] * 64, range(64), [table_ids] * 64):
+            for part, data in zip(parts, result):
+                part.append(data)
+    parents, children, mates, stalemates = (np.frombuffer(b"".join(part), dtype=np.int32) for part in parts)
+    return solve(parents, children, mates, stalemates, tables)
+
+
+def build(path=DEFAULT_PATH, workers=None):
+    """Generează toate finalurile din ENDGAMES și scrie fișierul atomic."""
+    tables = []
+    table_ids = {}
+    for name, piece_type in ENDGAMES:
+        start = time.monotonic()
+        table = generate(piece_type, tables, table_ids, workers)
+        print(f"{name}: {np.count_nonzero(table)} decided positions, "
+              f"longest mate {int((table & (LOSS - 1)).max())} plies ({time.monotonic() - start:.0f}s)")
+        table_ids[piece_type] = len(tables)
+        tables.append(table)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(tables)))
+        offset = HEADER.size + len(tables) * ENTRY.size
+        for (name, _), table in zip(ENDGAMES, tables):
+            f.write(ENTRY.pack(name.encode(), offset))
+            offset += len(table)
+        for table in tables:
+            f.write(table.tobytes())
+    os.replace(tmp_path, path)
+    return [name for name, _ in ENDGAMES]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the KQK, KRK and KPK endgame tablebases.")
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    names = build(args.output, args.workers)
+    print(f"Wrote {', '.join(names)} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Tabela de transpoziții pentru căutarea Minimax.
+
+Pozițiile sunt indexate după cheia Zobrist (hash-ul Polyglot din python-chess),
+astfel încât aceeași poziție atinsă prin ordini diferite de mutări este
+căutată o singură dată.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+import chess.polyglot
+
+# Tipul limitei pentru scorul memorat
+EXACT = 0
+LOWER = 1  # scorul real este >= scorul memorat (tăietură beta)
+UPPER = 2  # scorul real este <= scorul memorat (nicio mutare nu a depășit alpha)
+
+TTEntry = namedtuple("TTEntry", ["depth", "score", "bound", "best_move"])
+
+
+def zobrist_key(board):
+    return chess.polyglot.zobrist_hash(board)
+
+
+class TranspositionTable:
+    """
+    Tabelă cu dimensiune limitată. La aceeași cheie se păstrează intrarea
+    cu adâncimea mai mare; când tabela este plină se elimină intrarea
+    folosită cel mai de demult (LRU).
+
+    `hits`/`misses` numără accesele de la ultima golire a tabelei;
+    `total_hits`/`total_misses` numără toate accesele (pentru metrici) și
+    nu sunt resetate de `clear`.
+    """
+
+    def __init__(self, max_entries=200000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.total_hits = 0
+        self.total_misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def probe(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                self.total_misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.total_hits += 1
+            return entry
+
+    def peek(self, key):
+        """Ca `probe`, dar fără a număra accesul și fără a schimba ordinea LRU."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def store(self, key, depth, score, bound, best_move=None):
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                if old.depth > depth:
+                    # Nu înlocuim o căutare mai adâncă, dar păstrăm mutarea bună
+                    self._entries.move_to_end(key)
+                    return
+                if best_move is None:
+                    best_move = old.best_move
+            self._entries[key] = TTEntry(depth, score, bound, best_move)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def invalidate_search_caches(*tables):
+    """
+    Golește tabelele după schimbarea valorilor pieselor: scorurile memorate
+    au fost calculate cu vechile valori și ar amesteca cele două evaluări.
+    """
+    for table in tables:
+        table.clear()
@@ -0,0 +1,262 @@
+"""
+Reglarea offline a valorilor pieselor prin jocuri AI contra AI (self-play).
+
+1. Jocurile sunt jucate pe un pool de procese, pe pozițiile de start Chess960,
+   și sunt scrise pe măsură ce se termină într-un fișier JSONL (un joc pe
+   linie, cu pozițiile eșantionate și rezultatul):
+
+       python -m engine.tuning selfplay --games 2000 --depth 2 --workers 8 --output selfplay.jsonl
+
+2. Valorile pieselor sunt potrivite pe pozițiile salvate prin metoda Texel
+   (regresie logistică a rezultatului după evaluare), în treceri vectorizate
+   NumPy pe loturi, și pot fi publicate în tabela `learning_data` într-o
+   singură tranzacție:
+
+       python -m engine.tuning fit selfplay.jsonl --publish
+
+Serverul folosește noile valori după POST /api/reload_learning_data sau
+după repornire.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import chess
+import numpy as np
+
+from engine import chess960
+from engine.batch import BatchEvaluator
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator
+from engine.position import Position
+from engine.search import Search, SearchLimits
+from engine.transposition import TranspositionTable
+
+# Piesele ale căror valori sunt reglate (aceeași valoare pentru alb și negru)
+TUNED_PIECES = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN)
+MIN_PIECE_VALUE = 0.1
+
+# Jocurile: mutări aleatorii la început (pentru varietate), apoi AI contra AI
+RANDOM_PLIES = 4
+MAX_PLIES = 200
+SAMPLE_FROM_PLY = 8
+# La MAX_PLIES, jocul este adjudecat după material (valorile implicite)
+ADJUDICATION_MARGIN = 3
+
+
+def _material_counts(board):
+    """Diferența alb - negru a numărului de piese, pentru fiecare tip reglat."""
+    return [chess.popcount(board.pieces_mask(piece_type, chess.WHITE))
+            - chess.popcount(board.pieces_mask(piece_type, chess.BLACK)) for piece_type in TUNED_PIECES]
+
+
+def _result(board, plies):
+    if board.is_checkmate():
+        return 0.0 if board.turn == chess.WHITE else 1.0
+    if plies >= MAX_PLIES:
+        material = sum(count * DEFAULT_PIECE_VALUES[chess.piece_symbol(piece_type)]
+                       for count, piece_type in zip(_material_counts(board), TUNED_PIECES))
+        if material >= ADJUDICATION_MARGIN:
+            return 1.0
+        if material <= -ADJUDICATION_MARGIN:
+            return 0.0
+    return 0.5
+
+
+def play_game(game, index, depth, node_limit, piece_values, seed):
+    """Rulează într-un proces din pool: un joc AI contra AI de la poziția de start `index`."""
+    rng = random.Random(seed * 1000003 + game)
+    board = chess960.make_board(chess960.start_fen(index))
+    evaluator = IncrementalEvaluator(piece_values)
+    tt = TranspositionTable(50000)
+    counts = []
+    positions = []
+    while not board.is_game_over(claim_draw=True) and board.ply() < MAX_PLIES:
+        if board.ply() < RANDOM_PLIES:
+            move = rng.choice(list(board.legal_moves))
+        else:
+            if board.ply() >= SAMPLE_FROM_PLY and not board.is_check():
+                counts.append(_material_counts(board))
+                positions.append(Position.from_board(board))
+            move, _ = Search(evaluator, tt, SearchLimits(depth, node_limit=node_limit)).iterative_deepening(board)
+        board.push(move)
+    # Restul evaluării (centru, mobilitate, șah), fără valorile pieselor, pentru toate pozițiile odată
+    positional = BatchEvaluator(IncrementalEvaluator({})).evaluate_positions(positions).tolist()
+    samples = [row + [round(score, 3)] for row, score in zip(counts, positional)]
+    return {
+        "game": game,
+        "index": index,
+        "result": _result(board, board.ply()),
+        "plies": board.ply(),
+        "positions": samples
+    }
+
+
+def selfplay(output, games=1000, depth=2, node_limit=20000, workers=None, piece_values=None, seed=0):
+    """
+    Joacă `games` jocuri pe un pool de procese și adaugă fiecare joc terminat
+    în `output` (JSONL). Pozițiile de start parcurg pe rând cele 960 de poziții.
+    """
+    piece_values = dict(piece_values or DEFAULT_PIECE_VALUES)
+    start = time.monotonic()
+    scores = {1.0: 0, 0.5: 0, 0.0: 0}
+    with open(output, "a") as f, ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, game, (seed + game) % chess960.POSITION_COUNT,
+                                   depth, node_limit, piece_values, seed)
+                   for game in range(games)]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            scores[record["result"]] += 1
+            if done % 50 == 0 or done == games:
+                print(f"{done}/{games} games (+{scores[1.0]} ={scores[0.5]} -{scores[0.0]}, "
+                      f"{time.monotonic() - start:.0f}s)")
+    return scores
+
+
+def load_samples(paths):
+    """Pozițiile din fișierele JSONL: (diferențe de material, restul evaluării, rezultat) ca tablouri NumPy."""
+    rows = []
+    results = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                rows.extend(record["positions"])
+                results.extend([record["result"]] * len(record["positions"]))
+    data = np.asarray(rows, dtype=np.float64).reshape(-1, len(TUNED_PIECES) + 1)
+    return data[:, :-1], data[:, -1], np.asarray(results, dtype=np.float64)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def fit_scale(material, positional, results, values, candidates=None):
+    """Factorul K al sigmoidei care potrivește cel mai bine rezultatele cu valorile date."""
+    if candidates is None:
+        candidates = np.linspace(0.05, 3.0, 60)
+    scores = material @ values + positional
+    errors = [np.mean((results - _sigmoid(k * scores)) ** 2) for k in candidates]
+    return float(candidates[int(np.argmin(errors))])
+
+
+def fit(material, positional, results, initial, scale=None, epochs=200, batch_size=65536,
+        learning_rate=0.01, seed=0):
+    """
+    Metoda Texel: minimizează eroarea pătratică medie dintre rezultatul jocului
+    și sigmoid(K * evaluare) după valorile pieselor, cu Adam pe loturi
+    amestecate. Returnează (valori, K, eroarea inițială, eroarea finală).
+    """
+    values = np.asarray(initial, dtype=np.float64)
+    if scale is None:
+        scale = fit_scale(material, positional, results, values)
+
+    def error(current):
+        return float(np.mean((results - _sigmoid(scale * (material @ current + positional))) ** 2))
+
+    initial_error = error(values)
+    rng = np.random.default_rng(seed)
+    moment = np.zeros_like(values)
+    velocity = np.zeros_like(values)
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    step = 0
+    for _ in range(epochs):
+        order = rng.permutation(len(results))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x = material[batch]
+            predicted = _sigmoid(scale * (x @ values + positional[batch]))
+            delta = (predicted - results[batch]) * predicted * (1.0 - predicted)
+            gradient = 2.0 * scale * (x.T @ delta) / len(batch)
+            step += 1
+            moment = beta1 * moment + (1 - beta1) * gradient
+            velocity = beta2 * velocity + (1 - beta2) * gradient ** 2
+            values -= learning_rate * (moment / (1 - beta1 ** step)) / (np.sqrt(velocity / (1 - beta2 ** step)) + epsilon)
+            np.maximum(values, MIN_PIECE_VALUE, out=values)
+    return values, scale, initial_error, error(values)
+
+
+def piece_values_from(values):
+    """Valorile reglate, în forma din `learning_data` (litere mici și mari)."""
+    piece_values = {}
+    for piece_type, value in zip(TUNED_PIECES, values):
+        symbol = chess.piece_symbol(piece_type)
+        piece_values[symbol] = piece_values[symbol.upper()] = round(max(float(value), MIN_PIECE_VALUE), 2)
+    return piece_values
+
+
+def publish(piece_values, db=None):
+    """Scrie valorile în `learning_data` într-o singură tranzacție."""
+    from utils.db import create_tables, database_from_env, save_piece_values
+
+    if db is None:
+        db = database_from_env()
+    create_tables(db)
+    save_piece_values(db, piece_values)
+
+
+def _load_values(path):
+    if not path:
+        return dict(DEFAULT_PIECE_VALUES)
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the piece values by self-play.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    play = commands.add_parser("selfplay", help="play engine-vs-engine games and append them to a JSONL file")
+    play.add_argument("--output", default="selfplay.jsonl")
+    play.add_argument("--games", type=int, default=1000)
+    play.add_argument("--depth", type=int, default=2)
+    play.add_argument("--node-limit", type=int, default=20000, help="nodes per move")
+    play.add_argument("--workers", type=int, default=None)
+    play.add_argument("--values", help="JSON file with the piece values to play with (default: built-in)")
+    play.add_argument("--seed", type=int, default=0)
+
+    tune = commands.add_parser("fit", help="fit the piece values to self-play results (Texel tuning)")
+    tune.add_argument("inputs", nargs="+")
+    tune.add_argument("--values", help="JSON file with the starting piece values (default: built-in)")
+    tune.add_argument("--epochs", type=int, default=200)
+    tune.add_argument("--batch-size", type=int, default=65536)
+    tune.add_argument("--learning-rate", type=float, default=0.01)
+    tune.add_argument("--output", help="write the fitted values to this JSON file")
+    tune.add_argument("--publish", action="store_true",
+                      help="write the fitted values to the learning_data table (DB_BACKEND etc. as for the server)")
+
+    args = parser.parse_args(argv)
+    if args.command == "selfplay":
+        selfplay(args.output, args.games, args.depth, args.node_limit, args.workers,
+                 _load_values(args.values), args.seed)
+        return
+
+    material, positional, results = load_samples(args.inputs)
+    if not len(results):
+        sys.exit("No positions in the input files")
+    initial_values = _load_values(args.values)
+    initial = [initial_values[chess.piece_symbol(piece_type)] for piece_type in TUNED_PIECES]
+    values, scale, before, after = fit(material, positional, results, initial, epochs=args.epochs,
+                                       batch_size=args.batch_size, learning_rate=args.learning_rate)
+    piece_values = piece_values_from(values)
+    print(f"{len(results)} positions, K={scale:.3f}, error {before:.5f} -> {after:.5f}")
+    print(json.dumps({symbol: piece_values[symbol] for symbol in "pnbrq"}))
+    if args.output:
+        tmp_path = args.output + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(piece_values, f)
+        os.replace(tmp_path, args.output)
+    if args.publish:
+        publish(piece_values)
+        print("Published to learning_data")
+
+
+if __name__ == "__main__":
+    main()
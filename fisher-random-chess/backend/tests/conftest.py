@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from engine import chess960
+
+
+def _special(board, move):
+    return (board.is_castling(move) or board.is_en_passant(move) or move.promotion is not None
+            or board.gives_check(move))
+
+
+def random_games(games=30, seed=960, max_plies=160):
+    """
+    Partide Chess960 aleatoare, ca perechi (FEN-ul de start, mutările).
+    Rocadele, promovările, en passant și șahurile sunt alese mai des decât
+    restul, ca să apară în fiecare rulare.
+    """
+    rng = random.Random(seed)
+    result = []
+    for _ in range(games):
+        board = chess960.make_board(chess960.start_fen(rng.randrange(960)))
+        while not board.is_game_over() and len(board.move_stack) < max_plies:
+            moves = list(board.legal_moves)
+            special = [move for move in moves if _special(board, move)]
+            board.push(rng.choice(special if special and rng.random() < 0.5 else moves))
+        result.append((board.root().fen(), list(board.move_stack)))
+    return result
+
+
+@pytest.fixture(scope="session")
+def games():
+    return random_games()
+
+
+# Serverul în teste: SQLite în memorie, fără procese pentru căutare și analiză
+APP_ENV = {
+    "DB_BACKEND": "sqlite",
+    "SQLITE_PATH": ":memory:",
+    "AI_WORKERS": "0",
+    "AI_JOB_PROCESSES": "0",
+    "ANALYSIS_WORKERS": "0",
+    "GAME_STATE_STORE": "local",
+    "SOCKETIO_MESSAGE_QUEUE": "",
+}
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    # Configurarea este citită la importul modulului
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in APP_ENV.items():
+            patch.setenv(name, value)
+        import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
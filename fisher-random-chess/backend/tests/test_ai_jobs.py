@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from utils.ai_jobs import CANCELLED, DONE, FAILED, AIJobQueue, QueueFull
+
+
+class Recorder:
+    """`run` și `notify` de test: joburile se termină doar când testul le eliberează."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.finished = []
+        self.done = threading.Condition()
+
+    def run(self, job):
+        self.started.set()
+        # Ca o căutare adevărată, se oprește la anulare
+        while not self.release.wait(0.01):
+            if job.cancel_event.is_set():
+                break
+        if job.options == "fail":
+            raise ValueError("search failed")
+        return {"move": "e2e4", "options": job.options}
+
+    def notify(self, job):
+        with self.done:
+            self.finished.append(job)
+            self.done.notify_all()
+
+    def wait_for(self, count):
+        with self.done:
+            assert self.done.wait_for(lambda: len(self.finished) >= count, timeout=5)
+
+
+@pytest.fixture
+def queue():
+    recorder = Recorder()
+    jobs = AIJobQueue(recorder.run, recorder.notify, workers=2, max_pending=3)
+    jobs.recorder = recorder
+    yield jobs
+    recorder.release.set()
+    jobs.shutdown()
+
+
+def test_result_is_delivered(queue):
+    queue.recorder.release.set()
+    job = queue.submit("game", "board", "all")
+    queue.recorder.wait_for(1)
+    assert queue.recorder.finished == [job]
+    assert queue.get(job.job_id) is job
+    assert job.status == DONE
+    assert job.board is None
+    assert job.to_dict() == {"job_id": job.job_id, "game_id": "game", "status": DONE,
+                             "move": "e2e4", "options": "all"}
+
+
+def test_job_without_game_uses_its_own_id(queue):
+    queue.recorder.release.set()
+    job = queue.submit(None, "board", "all")
+    queue.recorder.wait_for(1)
+    assert job.game_id == job.job_id and job.status == DONE
+
+
+def test_failure_is_reported(queue):
+    queue.recorder.release.set()
+    job = queue.submit("game", "board", "fail")
+    queue.recorder.wait_for(1)
+    assert job.status == FAILED
+    assert job.to_dict()["message"] == "search failed"
+
+
+def test_cancel_stops_the_running_job(queue):
+    job = queue.submit("game", "board", "all")
+    assert queue.recorder.started.wait(5)
+    assert queue.cancel("game")
+    queue.recorder.wait_for(1)
+    assert job.status == CANCELLED and job.result is None
+    # Nu mai există nicio căutare de anulat pentru joc
+    assert not queue.cancel("game")
+    assert not queue.cancel("other")
+
+
+def test_new_move_cancels_the_previous_search(queue):
+    first = queue.submit("game", "board", "all")
+    assert queue.recorder.started.wait(5)
+    second = queue.submit("game", "board", "all")
+    assert first.cancel_event.is_set() and not second.cancel_event.is_set()
+    queue.recorder.wait_for(1)
+    queue.recorder.release.set()
+    queue.recorder.wait_for(2)
+    assert (first.status, second.status) == (CANCELLED, DONE)
+
+
+def test_queue_is_bounded(queue):
+    jobs = [queue.submit(f"game-{i}", "board", "all") for i in range(3)]
+    with pytest.raises(QueueFull):
+        queue.submit("game-3", "board", "all")
+    queue.recorder.release.set()
+    queue.recorder.wait_for(3)
+    assert all(job.status == DONE for job in jobs)
+    # Locurile s-au eliberat
+    queue.submit("game-3", "board", "all")
+    queue.recorder.wait_for(4)
@@ -0,0 +1,46 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import chess
+
+from engine.analysis import analyze_many, analyze_position
+
+FENS = [chess.STARTING_FEN, "not a fen", "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"]
+
+
+class FailingExecutor(ThreadPoolExecutor):
+    """Un pool în care procesul poziției `broken` „moare”."""
+
+    def __init__(self, broken):
+        super().__init__(max_workers=2)
+        self.broken = broken
+
+    def submit(self, fn, fen, **kwargs):
+        if fen == self.broken:
+            future = Future()
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+        return super().submit(fn, fen, **kwargs)
+
+
+def test_results_in_input_order():
+    results = list(analyze_many(FENS, depth=1))
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert [result["status"] for result in results] == ["success", "error", "success"]
+    assert results[2]["moves"][0]["move"] == "a1a8"
+
+
+def test_pool_results_match_serial():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pooled = list(analyze_many(FENS, executor, workers=1, depth=2))
+    serial = [dict(index=index, **analyze_position(fen, depth=2)) for index, fen in enumerate(FENS)]
+    assert [r["moves"] if "moves" in r else r["status"] for r in pooled] == \
+        [r["moves"] if "moves" in r else r["status"] for r in serial]
+
+
+def test_failed_worker_does_not_stop_the_stream():
+    with FailingExecutor(broken=FENS[2]) as executor:
+        results = list(analyze_many(FENS, executor, workers=1, depth=1))
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["status"] == "success"
+    assert results[2] == {"index": 2, "fen": FENS[2], "status": "error", "message": "worker died"}
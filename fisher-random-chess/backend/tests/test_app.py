@@ -0,0 +1,134 @@
+import json
+
+import chess
+
+from engine import chess960
+
+
+def test_health(client):
+    assert client.get("/api/health/live").json == {"status": "alive"}
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    assert response.json["checks"] == {"database": "ok", "learning_data": "ok"}
+
+
+def test_analyze_streams_results_in_order(client):
+    fens = [chess.STARTING_FEN, "not a fen", chess960.start_fen(0)]
+    response = client.post("/api/analyze", json={"fens": fens, "multipv": 2, "depth": 1})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert [result["status"] for result in results] == ["success", "error", "success"]
+    assert len(results[0]["moves"]) == 2
+
+
+def test_analyze_rejects_bad_input(client):
+    assert client.post("/api/analyze", json={}).status_code == 400
+    assert client.post("/api/analyze", json={"fens": [1]}).status_code == 400
+
+
+def test_games_pages_and_export(app_module, client):
+    app_module.db.execute("DELETE FROM game_history")
+    for winner in ("white", "black", "draw"):
+        app_module.save_game_history(["e2e4", "e7e5"], winner, chess.STARTING_FEN)
+
+    # Jocurile sunt încă în coada de scrieri; ruta o golește înainte de citire
+    first = client.get("/api/games?limit=2").json
+    assert len(first["games"]) == 2 and first["next_cursor"]
+    second = client.get(f"/api/games?limit=2&cursor={first['next_cursor']}").json
+    assert second["next_cursor"] is None
+    ids = [game["id"] for game in first["games"] + second["games"]]
+    assert len(set(ids)) == 3
+
+    assert [game["winner"] for game in client.get("/api/games?winner=draw").json["games"]] == ["draw"]
+    assert client.get("/api/games?cursor=bad").status_code == 400
+    assert client.get("/api/games?winner=blue").status_code == 400
+
+    export = client.get("/api/games/export?format=jsonl")
+    assert [json.loads(line)["id"] for line in export.get_data(as_text=True).splitlines()] == sorted(ids)
+    assert client.get("/api/games/export?format=csv").status_code == 400
+
+
+def test_legal_move_map(client):
+    response = client.post("/api/legal_move_map", json={"fen": chess.STARTING_FEN})
+    assert sorted(response.json["moves"]["g1"]) == ["f3", "h3"]
+    assert client.post("/api/legal_move_map", json={}).status_code == 400
+    assert client.post("/api/legal_move_map", json={"fen": 5}).status_code == 400
+    assert client.post("/api/legal_move_map", json={"fen": "bad"}).status_code == 400
+
+
+def test_start_position_index(client):
+    assert client.get("/api/setup?index=518").json == chess.STARTING_FEN
+    assert client.get("/api/setup?index=960").status_code == 400
+    response = client.post("/api/start_multiplayer_game", json={"position_index": "5"})
+    assert response.json["fen"] == chess960.start_fen(5)
+    assert client.post("/api/start_multiplayer_game", json={"position_index": [5]}).status_code == 400
+
+
+def test_search_limits(app_module):
+    parse = app_module.parse_search_limits
+    assert parse({}) == (app_module.AI_MAX_DEPTH, app_module.AI_TIME_LIMIT, None)
+    assert parse({"depth": 99, "time_limit": 1e9, "node_limit": 10 ** 12}) == \
+        (app_module.AI_MAX_DEPTH_LIMIT, app_module.AI_TIME_LIMIT_MAX, app_module.AI_NODE_LIMIT_MAX)
+    assert parse({"depth": "2", "time_limit": "0.5", "node_limit": "100"}) == (2, 0.5, 100)
+
+
+def test_invalid_search_limits_are_rejected(client):
+    fen = chess.STARTING_FEN
+    for limits in ({"depth": 0}, {"depth": -3}, {"time_limit": 0}, {"time_limit": -1}, {"node_limit": 0},
+                   {"node_limit": -5}, {"time_limit": "nan"}, {"time_limit": "inf"}):
+        response = client.post("/api/move", json=dict(limits, fen=fen, **{"from": "e2", "to": "e4"}))
+        assert response.status_code == 400, limits
+        response = client.post("/api/analyze", json=dict(limits, fens=[fen]))
+        assert response.status_code == 400, limits
+    # NaN scris direct în JSON (acceptat de parserul JSON al Python-ului)
+    body = '{"fen": "%s", "from": "e2", "to": "e4", "depth": 6, "time_limit": NaN}' % fen
+    response = client.post("/api/move", data=body, content_type="application/json")
+    assert response.status_code == 400
+    assert response.json["message"] == "time_limit must be a positive number of seconds"
+
+
+def test_cancel_and_watch_require_game_id(app_module, client):
+    response = client.post("/api/cancel_move", json={})
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "game_id is required"
+    assert client.post("/api/cancel_move", json={"game_id": "nothing"}).status_code == 404
+
+    socket = app_module.socketio.test_client(app_module.app)
+    socket.emit("watch_ai_game", {})
+    assert socket.get_received() == [{"name": "error", "args": [{"message": "game_id is required"}], "namespace": "/"}]
+    socket.emit("watch_ai_game", {"game_id": 7})
+    assert socket.get_received()[0]["args"] == [{"game_id": "7"}]
+    socket.disconnect()
+
+
+def scrape(client):
+    """Eșantioanele fără etichete de pe /api/metrics, ca dicționar nume -> valoare."""
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith("#") and "{" not in line:
+            name, value = line.split()
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_count_searches(client):
+    before = scrape(client)
+    # O poziție de mijloc de joc, fără carte de deschideri
+    fen = "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"
+    response = client.post("/api/move", json={"fen": fen, "from": "d2", "to": "d3", "depth": 3})
+    assert response.get_json()["status"] == "success"
+    after = scrape(client)
+
+    names = ["ai_searches_total", "ai_search_nodes_total", "transposition_table_hits_total",
+             "transposition_table_misses_total"]
+    assert all(name in before and name in after for name in names)
+    assert after["ai_searches_total"] == before["ai_searches_total"] + 1
+    # Histograma apare după prima observație
+    assert after["ai_search_duration_seconds_count"] == before.get("ai_search_duration_seconds_count", 0) + 1
+    assert after["ai_search_nodes_total"] > before["ai_search_nodes_total"]
+    assert after["transposition_table_hits_total"] > before["transposition_table_hits_total"]
+    assert after["transposition_table_misses_total"] > before["transposition_table_misses_total"]
@@ -0,0 +1,56 @@
+import chess
+import pytest
+
+from engine import chess960
+from engine.batch import BatchEvaluator
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator
+from engine.position import Position
+
+# Scorurile pe loturi diferă de cele scalare doar prin ordinea adunărilor în virgulă mobilă
+TOLERANCE = 1e-9
+
+
+def game_boards(games):
+    for fen, moves in games:
+        board = chess960.make_board(fen)
+        yield board.copy(stack=False)
+        for move in moves:
+            board.push(move)
+            yield board.copy(stack=False)
+
+
+@pytest.mark.parametrize("piece_values", [
+    DEFAULT_PIECE_VALUES,
+    {"p": 0.9, "n": 3.1, "b": 3.3, "r": 4.8, "q": 9.4, "k": 0, "P": 1.1, "N": 2.9, "B": 3.2, "R": 5.1, "Q": 8.7},
+])
+def test_batch_matches_scalar(games, piece_values):
+    evaluator = IncrementalEvaluator(piece_values)
+    batch = BatchEvaluator(evaluator)
+    table = evaluator.square_table()
+    boards = list(game_boards(games))
+    expected = [evaluator.evaluate_position(Position.from_board(board, table)) for board in boards]
+    scores = []
+    for start in range(0, len(boards), 512):
+        scores.extend(batch.evaluate_boards(boards[start:start + 512]))
+    assert scores == pytest.approx(expected, abs=TOLERANCE)
+    # Loturi mici, inclusiv de o singură poziție
+    for size in (1, 7):
+        assert list(batch.evaluate_boards(boards[:size])) == pytest.approx(expected[:size], abs=TOLERANCE)
+
+
+def test_empty_batch():
+    batch = BatchEvaluator(IncrementalEvaluator(DEFAULT_PIECE_VALUES))
+    assert len(batch.evaluate_boards([])) == 0
+
+
+def test_check_and_stalemate_positions():
+    evaluator = IncrementalEvaluator(DEFAULT_PIECE_VALUES)
+    fens = [
+        "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1",   # pat
+        "6k1/5ppp/8/8/8/8/8/R5K1 b - - 0 1",  # fără șah
+        "R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1",  # mat
+        "4k3/8/8/3pP3/8/8/8/4K2R w K d6 0 2",  # en passant și rocadă
+    ]
+    boards = [chess.Board(fen) for fen in fens]
+    expected = [evaluator.evaluate_position(Position.from_board(board, evaluator.square_table())) for board in boards]
+    assert list(BatchEvaluator(evaluator).evaluate_boards(boards)) == pytest.approx(expected, abs=TOLERANCE)
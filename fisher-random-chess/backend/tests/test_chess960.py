@@ -0,0 +1,60 @@
+import json
+
+import chess
+import pytest
+
+from engine import chess960
+from engine.evaluation import DEFAULT_PIECE_VALUES
+from engine.openings import OpeningBook, build, position_key
+
+
+def test_every_index_is_a_legal_start():
+    seen = set()
+    for index in range(chess960.POSITION_COUNT):
+        board = chess960.make_board(chess960.start_fen(index))
+        assert board.is_valid(), index
+        # Numărul poziției se regăsește din tablă
+        assert board.chess960_pos() == index
+        back_rank = [board.piece_at(square) for square in chess.SquareSet(chess.BB_RANK_1)]
+        assert [piece.symbol().lower() for piece in back_rank] == \
+            [board.piece_at(square).symbol() for square in chess.SquareSet(chess.BB_RANK_8)]
+        bishops = list(board.pieces(chess.BISHOP, chess.WHITE))
+        assert chess.square_file(bishops[0]) % 2 != chess.square_file(bishops[1]) % 2
+        rooks = sorted(chess.square_file(square) for square in board.pieces(chess.ROOK, chess.WHITE))
+        assert rooks[0] < chess.square_file(board.king(chess.WHITE)) < rooks[1]
+        assert board.castling_rights == board.rooks
+        seen.add(board.board_fen())
+    assert len(seen) == chess960.POSITION_COUNT
+    assert chess960.start_fen(chess960.STANDARD_POSITION) == chess.STARTING_FEN
+
+
+@pytest.mark.parametrize("index", [-1, 960])
+def test_index_out_of_range(index):
+    with pytest.raises(ValueError):
+        chess960.start_fen(index)
+
+
+@pytest.fixture(scope="module")
+def book_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("book") / "openings.json")
+    build(path, depth=1, plies=1, workers=2)
+    return path
+
+
+def test_book_moves_are_legal(book_path):
+    book = OpeningBook(book_path)
+    assert len(book) == chess960.POSITION_COUNT
+    for index in range(chess960.POSITION_COUNT):
+        board = chess960.make_board(chess960.start_fen(index))
+        move = book.lookup(board, DEFAULT_PIECE_VALUES)
+        assert move in board.legal_moves, index
+
+
+def test_book_ignores_other_values_and_illegal_moves(book_path, tmp_path):
+    board = chess960.make_board(chess.STARTING_FEN)
+    assert OpeningBook(book_path).lookup(board, dict(DEFAULT_PIECE_VALUES, q=10)) is None
+    path = tmp_path / "openings.json"
+    path.write_text(json.dumps({"piece_values": DEFAULT_PIECE_VALUES,
+                                "positions": {position_key(board): {"move": "e2e5", "score": 0}}}))
+    assert OpeningBook(str(path)).lookup(board, DEFAULT_PIECE_VALUES) is None
+    assert len(OpeningBook(str(tmp_path / "missing.json"))) == 0
@@ -0,0 +1,214 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from utils.db import Database, MySQLDatabase, SQLiteDatabase, WriteBehindQueue, database_from_env
+
+INSERT_GAME = "INSERT INTO game_history (moves, winner) VALUES (%s, %s)"
+UPDATE_VALUE = "UPDATE learning_data SET value = %s WHERE piece = %s"
+
+
+class FlakyDatabase(SQLiteDatabase):
+    """O bază SQLite în memorie care poate fi „oprită” pentru a simula o întrerupere."""
+
+    def __init__(self):
+        super().__init__(":memory:", auto_migrate=True)
+        self.up = True
+
+    def cursor(self, commit=False):
+        if not self.up:
+            raise ConnectionError("database is down")
+        return super().cursor(commit)
+
+
+def make_queue(db, **kwargs):
+    # Fără scrieri din firul de fundal în timpul testului
+    return WriteBehindQueue(db, flush_interval=3600, **kwargs)
+
+
+def count_games(db):
+    return db.fetchall("SELECT COUNT(*) FROM game_history")[0][0]
+
+
+def test_flush_writes_batch():
+    db = FlakyDatabase()
+    queue = make_queue(db)
+    for winner in ("white", "black", "draw"):
+        queue.put(INSERT_GAME, ("[]", winner))
+    assert queue.flush()
+    assert len(queue) == 0
+    assert count_games(db) == 3
+    queue.close()
+
+
+def test_keyed_writes_keep_last_value():
+    db = FlakyDatabase()
+    db.execute("INSERT INTO learning_data (piece, value) VALUES (%s, %s)", ("p", 1.0))
+    queue = make_queue(db)
+    queue.put(UPDATE_VALUE, (2.0, "p"), key="p")
+    queue.put(UPDATE_VALUE, (3.0, "p"), key="p")
+    assert len(queue) == 1
+    assert queue.flush()
+    assert db.fetchall("SELECT value FROM learning_data WHERE piece = %s", ("p",)) == [(3.0,)]
+    queue.close()
+
+
+def test_bad_write_does_not_discard_good_ones():
+    db = FlakyDatabase()
+    queue = make_queue(db, max_attempts=3)
+    queue.put(INSERT_GAME, ("[]", "white"))
+    queue.put("INSERT INTO no_such_table VALUES (%s)", (1,))
+    assert not queue.flush()
+    assert count_games(db) == 1
+    assert len(queue) == 1  # doar scrierea greșită rămâne
+
+    queue.flush()
+    queue.flush()
+    assert len(queue) == 0  # renunțată după max_attempts încercări
+    assert count_games(db) == 1
+    queue.close()
+
+
+def test_writes_survive_outage():
+    db = FlakyDatabase()
+    queue = make_queue(db, max_attempts=2)
+    db.up = False
+    queue.put(INSERT_GAME, ("[]", "white"))
+    queue.put(INSERT_GAME, ("[]", "black"))
+    for _ in range(5):
+        assert not queue.flush()
+    assert len(queue) == 2  # încercările nu se numără cât timp baza de date nu răspunde
+
+    # O valoare nouă cu aceeași cheie înlocuiește scrierea din coadă
+    queue.put(UPDATE_VALUE, (2.0, "p"), key="p")
+    queue.put(UPDATE_VALUE, (5.0, "p"), key="p")
+    assert not queue.flush()
+    assert len(queue) == 3
+
+    db.up = True
+    db.execute("INSERT INTO learning_data (piece, value) VALUES (%s, %s)", ("p", 1.0))
+    assert queue.flush()
+    assert count_games(db) == 2
+    assert db.fetchall("SELECT value FROM learning_data WHERE piece = %s", ("p",)) == [(5.0,)]
+    queue.close()
+
+
+def test_close_reports_unwritten():
+    db = FlakyDatabase()
+    queue = make_queue(db)
+    db.up = False
+    queue.put(INSERT_GAME, ("[]", "draw"))
+    assert queue.close() == [(INSERT_GAME, ("[]", "draw"))]
+
+
+def test_incomplete_backend_fails_at_creation():
+    class PartialDatabase(Database):
+        dialect = "partial"
+
+        def cursor(self, commit=False):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialDatabase()
+
+
+def test_mysql_without_password_reports_it(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "mysql")
+    monkeypatch.delenv("DB_PASSWORD", raising=False)
+    # Crearea nu se conectează; lipsa parolei apare la prima interogare
+    db = database_from_env()
+    with pytest.raises(ValueError, match="DB_PASSWORD"):
+        db.ping()
+
+
+def test_interleaved_writes_keep_their_order():
+    db = SQLiteDatabase(":memory:", auto_migrate=True)
+    queue = make_queue(db)
+    insert = "INSERT INTO game_history (id, moves, winner) VALUES (%s, %s, %s)"
+    queue.put(insert, (1, "[]", "white"))
+    queue.put("UPDATE game_history SET winner = %s WHERE winner = %s", ("draw", "white"))
+    queue.put(insert, (2, "[]", "white"))
+    # Grupat după interogare, UPDATE ar rula după ambele INSERT și ar schimba și jocul 2
+    assert queue.flush()
+    assert db.fetchall("SELECT id, winner FROM game_history ORDER BY id") == [(1, "draw"), (2, "white")]
+
+
+class FakePool:
+    """Ca MySQLConnectionPool: aruncă o eroare dacă toate conexiunile sunt folosite."""
+
+    def __init__(self, size):
+        self.free = size
+        self.lock = threading.Lock()
+
+    def get_connection(self):
+        with self.lock:
+            if not self.free:
+                raise RuntimeError("Failed getting connection; pool exhausted")
+            self.free -= 1
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return mock.MagicMock()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        with self.pool.lock:
+            self.pool.free += 1
+
+
+def fake_mysql(pool_size, pool_timeout):
+    db = MySQLDatabase({"password": "x"}, pool_size=pool_size, pool_timeout=pool_timeout)
+    db._pool = FakePool(pool_size)
+    return db
+
+
+def test_mysql_waits_for_a_free_connection():
+    db = fake_mysql(2, pool_timeout=5)
+    release = threading.Event()
+    holding = threading.Barrier(3)
+
+    def hold():
+        with db.cursor():
+            holding.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    holding.wait()
+    # Ambele conexiuni sunt folosite: a treia cerere așteaptă în loc să eșueze
+    threading.Timer(0.2, release.set).start()
+    started = time.monotonic()
+    with db.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    assert time.monotonic() - started >= 0.15
+    for thread in threads:
+        thread.join()
+    assert db._pool.free == 2
+
+
+def test_mysql_pool_timeout():
+    db = fake_mysql(1, pool_timeout=0.05)
+    with db.cursor():
+        with pytest.raises(TimeoutError):
+            with db.cursor():
+                pass
+    # Conexiunea și locul din semafor sunt eliberate și după o eroare
+    with pytest.raises(ValueError):
+        with db.cursor():
+            raise ValueError("query failed")
+    with db.cursor():
+        pass
+    assert db._pool.free == 1
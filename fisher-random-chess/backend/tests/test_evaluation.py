@@ -0,0 +1,37 @@
+import pytest
+
+from engine import chess960
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator, count_legal_moves, evaluate_board
+from engine.position import Position
+
+TUNED_VALUES = {"p": 0.9, "n": 3.1, "b": 3.3, "r": 4.8, "q": 9.4, "P": 1.1, "N": 2.9, "B": 3.2, "R": 5.1, "Q": 8.7}
+
+
+@pytest.mark.parametrize("piece_values", [DEFAULT_PIECE_VALUES, TUNED_VALUES])
+def test_incremental_matches_reference(games, piece_values):
+    evaluator = IncrementalEvaluator(piece_values)
+    table = evaluator.square_table()
+    seen = {"castling": 0, "promotion": 0, "en_passant": 0, "check": 0}
+    for fen, moves in games:
+        board = chess960.make_board(fen)
+        position = Position.from_board(board, table)
+        evaluator.reset(board)
+        for move in moves:
+            seen["castling"] += board.is_castling(move)
+            seen["promotion"] += move.promotion is not None
+            seen["en_passant"] += board.is_en_passant(move)
+            encoded = next(m for m in position.legal_moves() if position.to_move(m) == move)
+            position.push(encoded)
+            evaluator.push(board, move)
+            seen["check"] += board.is_check()
+
+            expected = evaluate_board(board, piece_values)
+            assert evaluator.evaluate_position(position) == pytest.approx(expected), board.fen()
+            assert evaluator.evaluate(board) == pytest.approx(expected), board.fen()
+            assert count_legal_moves(board) == board.legal_moves.count()
+        # Revenirea mutare cu mutare refolosește exact termenii de dinainte
+        while board.move_stack:
+            evaluator.pop(board)
+            position.pop()
+            assert evaluator.evaluate_position(position) == pytest.approx(evaluate_board(board, piece_values))
+    assert all(seen.values()), seen
@@ -0,0 +1,62 @@
+import json
+
+import chess
+import pytest
+
+from utils.db import SQLiteDatabase
+from utils.game_history import GameFilter, decode_cursor, encode_cursor, export_games, fetch_games, iter_games
+
+# Mai multe jocuri în aceeași secundă: ordinea trebuie să depindă și de id
+DATES = ["2024-01-01 10:00:00", "2024-01-01 10:00:00", "2024-01-02 09:30:00", "2024-01-02 09:30:00",
+         "2024-01-02 09:30:00", "2024-01-03 12:00:00", "2024-02-01 00:00:00"]
+WINNERS = ["white", "black", "draw", "white", "white", "black", "white"]
+
+
+@pytest.fixture
+def db():
+    db = SQLiteDatabase(":memory:", auto_migrate=True)
+    for date_played, winner in zip(DATES, WINNERS):
+        db.execute("INSERT INTO game_history (moves, winner, date_played, start_fen) VALUES (%s, %s, %s, %s)",
+                   (json.dumps(["e2e4", "e7e5"]), winner, date_played, chess.STARTING_FEN))
+    return db
+
+
+def all_pages(db, game_filter=None, limit=2, descending=True):
+    """Parcurge istoricul pagină cu pagină, prin cursorul codificat, ca un client."""
+    ids, cursor = [], None
+    while True:
+        page = fetch_games(db, game_filter, decode_cursor(cursor) if cursor else None, limit + 1, descending)
+        ids.extend(game["id"] for game in page[:limit])
+        if len(page) <= limit:
+            return ids
+        cursor = encode_cursor(page[limit - 1])
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_cover_history_once(db, limit, descending):
+    expected = sorted(range(1, len(DATES) + 1), key=lambda i: (DATES[i - 1], i), reverse=descending)
+    assert all_pages(db, limit=limit, descending=descending) == expected
+
+
+def test_filters(db):
+    assert all_pages(db, GameFilter(winner="white")) == [7, 5, 4, 1]
+    assert all_pages(db, GameFilter(since="2024-01-02", until="2024-01-03")) == [5, 4, 3]
+    assert all_pages(db, GameFilter(winner="white", since="2024-01-02T00:00:00")) == [7, 5, 4]
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+    with pytest.raises(ValueError):
+        GameFilter(winner="blue")
+    with pytest.raises(ValueError):
+        GameFilter(since="yesterday")
+
+
+def test_export_reads_in_batches(db):
+    assert [game["id"] for game in iter_games(db, batch_size=2)] == [1, 2, 3, 4, 5, 6, 7]
+    lines = list(export_games(db, "jsonl", batch_size=3))
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3, 4, 5, 6, 7]
+    pgn = "".join(export_games(db, "pgn", GameFilter(winner="black")))
+    assert pgn.count("[Result \"0-1\"]") == 2 and "1. e4 e5" in pgn
@@ -0,0 +1,118 @@
+import chess
+import pytest
+
+from utils.db import SQLiteDatabase
+from utils.game_store import (DatabaseStateStore, GameNotFound, GameStateStore, GameStore, IllegalMove,
+                              MemoryStateStore, new_game_id)
+
+
+@pytest.fixture(params=["memory", "database"])
+def shared(request):
+    if request.param == "memory":
+        return MemoryStateStore()
+    return DatabaseStateStore(SQLiteDatabase(":memory:", auto_migrate=True))
+
+
+def play(store, game, uci):
+    with game.lock:
+        return store.play(game, uci)
+
+
+def test_sequence_numbers(shared):
+    store = GameStore(shared=shared)
+    game = store.create("g1", chess.STARTING_FEN)
+    assert [play(store, game, uci) for uci in ("e2e4", "e7e5", "g1f3")] == [1, 2, 3]
+    assert shared.load("g1") == (chess.STARTING_FEN, ["e2e4", "e7e5", "g1f3"])
+    assert shared.moves_since("g1", 1) == ["e7e5", "g1f3"]
+
+
+def test_duplicate_id_is_refused(shared):
+    first, second = GameStore(shared=shared), GameStore(shared=shared)
+    assert first.create("g1", chess.STARTING_FEN) is not None
+    assert second.create("g1", chess.STARTING_FEN) is None
+    ids = {first.create_new(chess.STARTING_FEN).game_id for _ in range(50)}
+    assert len(ids) == 50
+
+
+def test_stale_worker_catches_up(shared):
+    # Două procese (workeri) cu câte o copie vie a aceluiași joc
+    first, second = GameStore(shared=shared), GameStore(shared=shared)
+    game1 = first.create("g1", chess.STARTING_FEN)
+    game2 = second.get("g1")
+    assert play(first, game1, "e2e4") == 1
+
+    # Copia veche a celui de-al doilea proces este adusă la zi înainte de a respinge mutarea
+    with pytest.raises(IllegalMove):
+        play(second, game2, "e2e4")
+    assert game2.moves == ["e2e4"]
+    assert play(second, game2, "e7e5") == 2
+    assert play(first, game1, "g1f3") == 3
+    assert game1.moves == ["e2e4", "e7e5", "g1f3"]
+
+
+def test_lost_append_race_is_rejected(shared):
+    first, second = GameStore(shared=shared), GameStore(shared=shared)
+    game1 = first.create("g1", chess.STARTING_FEN)
+    game2 = second.get("g1")
+    assert play(first, game1, "e2e4") == 1
+    # d2d4 este legală pe copia veche, dar mutarea 1 a fost deja adăugată de primul
+    # proces; după aducerea la zi este rândul negrului, deci mutarea este respinsă
+    with pytest.raises(IllegalMove):
+        play(second, game2, "d2d4")
+    assert game2.moves == ["e2e4"]
+    assert shared.moves_since("g1", 0) == ["e2e4"]
+
+
+def test_invalid_move(shared):
+    store = GameStore(shared=shared)
+    game = store.create("g1", chess.STARTING_FEN)
+    with pytest.raises(ValueError):
+        play(store, game, "zz")
+
+
+def test_remove_deletes_finished_game(shared):
+    store = GameStore(shared=shared)
+    game = store.create("g1", chess.STARTING_FEN)
+    play(store, game, "e2e4")
+    store.remove("g1")
+    assert shared.load("g1") is None
+    assert shared.moves_since("g1", 0) == []
+    assert store.get("g1") is None
+
+
+def test_stale_copy_cannot_move_after_remove(shared):
+    first, second = GameStore(shared=shared), GameStore(shared=shared)
+    game1 = first.create("g1", chess.STARTING_FEN)
+    game2 = second.get("g1")
+    play(first, game1, "e2e4")
+    first.remove("g1")
+    # Al doilea proces are încă o copie în care d2d4 este legală, ca mutare 1
+    with pytest.raises(GameNotFound):
+        play(second, game2, "d2d4")
+    assert shared.load("g1") is None
+    assert shared.moves_since("g1", 0) == []
+    assert "g1" not in second
+
+
+def test_local_store_spills_and_discards():
+    saved = {}
+    store = GameStore(max_games=1, spill=lambda game: saved.__setitem__(game.game_id, (game.start_fen, game.moves)),
+                      load=saved.get, discard=lambda game_id: saved.pop(game_id, None))
+    game = store.create("a", chess.STARTING_FEN)
+    play(store, game, "e2e4")
+    store.create("b", chess.STARTING_FEN)  # „a” este scos din memorie
+    assert saved["a"] == (chess.STARTING_FEN, ["e2e4"])
+    assert store.create("a", chess.STARTING_FEN) is None
+    assert store.get("a").moves == ["e2e4"]
+    store.remove("a")
+    assert "a" not in saved
+
+
+def test_state_store_is_abstract():
+    with pytest.raises(TypeError):
+        GameStateStore()
+
+
+def test_new_game_id():
+    game_id = new_game_id()
+    assert len(game_id) == 8 and game_id.isalnum()
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from engine import chess960
+from engine.evaluation import DEFAULT_PIECE_VALUES
+from engine.evaluation import IncrementalEvaluator
+from engine.parallel import ParallelSearch, SearchPool
+from engine.search import Search, SearchLimits, SearchOptions
+from engine.transposition import TranspositionTable
+
+POSITIONS = [
+    chess960.start_fen(518),
+    chess960.start_fen(300),
+    "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SearchPool(2, tt_entries=50000)
+    pool.warm_up()
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.parametrize("fen", POSITIONS)
+def test_parallel_search_matches_serial_search(pool, fen):
+    # Fără extensiile selective, al căror rezultat depinde de
+    # ferestrele alpha-beta, scorul la adâncime fixă nu depinde de împărțire
+    options = SearchOptions.parse("none")
+    serial = Search(IncrementalEvaluator(DEFAULT_PIECE_VALUES), TranspositionTable(), SearchLimits(4), options)
+    _, expected = serial.iterative_deepening(chess960.make_board(fen))
+    parallel = ParallelSearch(pool, DEFAULT_PIECE_VALUES, TranspositionTable(), SearchLimits(4), options)
+    move, value = parallel.iterative_deepening(chess960.make_board(fen))
+    assert parallel.depth_reached == 4
+    assert value == pytest.approx(expected)
+    assert move in chess960.make_board(fen).legal_moves
+
+
+def test_pool_shuts_down_cleanly():
+    pool = SearchPool(2, tt_entries=1000)
+    pool.warm_up()
+    processes = list(pool.executor._processes.values())
+    assert len(processes) == 2
+    pool.shutdown()
+    assert pool._executor is None
+    assert not any(process.is_alive() for process in processes)
+    # Un apel ulterior pornește din nou procesele
+    pool.warm_up()
+    pool.shutdown()
+    pool.shutdown()
+
+
+def test_stop_reaches_the_workers(pool):
+    board = chess960.make_board(chess960.start_fen(518))
+    stop = threading.Event()
+    search = ParallelSearch(pool, DEFAULT_PIECE_VALUES, TranspositionTable(), SearchLimits(12, stop_event=stop))
+    stopped_at = []
+
+    def cancel():
+        stopped_at.append(time.monotonic())
+        stop.set()
+
+    timer = threading.Timer(3.0, cancel)
+    timer.start()
+    move, _ = search.iterative_deepening(board)
+    # Iterațiile de la adâncimea 8 în sus durează secunde: procesele se opresc
+    # fără să termine iterația în curs
+    assert time.monotonic() - stopped_at[0] < 0.5
+    assert move is not None and search.depth_reached < 12
+    # Procesele sunt din nou libere
+    start = time.monotonic()
+    pool.warm_up()
+    assert time.monotonic() - start < 1
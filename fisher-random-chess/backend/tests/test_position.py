@@ -0,0 +1,50 @@
+import pytest
+
+from engine import chess960
+from engine.position import Position, perft
+
+
+def board_perft(board, depth):
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += board_perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+@pytest.mark.parametrize("fen", [
+    chess960.start_fen(0),
+    chess960.start_fen(518),
+    chess960.start_fen(959),
+    # Kiwipete: rocade, en passant, promovări, piese legate
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    # Rocadă Chess960 cu regele și turnul pe pătrate vecine
+    "1r2k1r1/pbppnp1p/1b3P2/8/Q7/B1PB1q2/P4PPP/3RK1R1 w GDgb - 0 1",
+    # En passant care ar lăsa regele în șah pe rând
+    "8/8/8/K2pP2r/8/8/8/7k w - d6 0 2",
+    # Promovări cu captură
+    "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",
+])
+def test_perft_matches_python_chess(fen):
+    board = chess960.make_board(fen)
+    position = Position.from_board(board)
+    assert perft(position, 3) == board_perft(board, 3)
+    # Perft-ul nu lasă urme în poziție
+    assert position.pieces == Position.from_board(board).pieces
+
+
+def test_legal_moves_along_random_games(games):
+    for fen, moves in games:
+        board = chess960.make_board(fen)
+        position = Position.from_board(board)
+        for move in moves:
+            assert sorted(position.to_move(m).uci() for m in position.legal_moves()) == \
+                sorted(m.uci() for m in board.legal_moves), board.fen()
+            assert position.count_legal_moves() == board.legal_moves.count()
+            assert position.is_check() == board.is_check()
+            encoded = next(m for m in position.legal_moves() if position.to_move(m) == move)
+            position.push(encoded)
+            board.push(move)
@@ -0,0 +1,94 @@
+import chess
+import pytest
+
+from engine import chess960
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator, evaluate_board
+from engine.search import Search, SearchLimits, SearchOptions
+from engine.transposition import TranspositionTable
+
+POSITIONS = [
+    chess960.start_fen(518),
+    chess960.start_fen(77),
+    "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+    "8/2k5/8/3p4/3P1K2/8/5R2/8 b - - 0 1",
+]
+
+
+def search(fen, tt=None, depth=3, options=None):
+    board = chess960.make_board(fen)
+    searcher = Search(IncrementalEvaluator(DEFAULT_PIECE_VALUES), tt if tt is not None else TranspositionTable(),
+                      SearchLimits(depth), options)
+    move, value = searcher.iterative_deepening(board)
+    # Căutarea lucrează pe propria poziție, nu pe tablă
+    assert board.fen() == fen
+    return move, value, searcher.nodes
+
+
+@pytest.mark.parametrize("fen", POSITIONS)
+@pytest.mark.parametrize("options", ["all", "none"])
+def test_search_is_deterministic(fen, options):
+    options = SearchOptions.parse(options)
+    assert search(fen, options=options) == search(fen, options=options)
+
+
+def test_shared_table_is_deterministic():
+    # Aceeași succesiune de căutări pe tabele noi dă aceleași rezultate,
+    # deși fiecare căutare pornește de la intrările lăsate de cele dinainte
+    runs = []
+    for _ in range(2):
+        tt = TranspositionTable()
+        runs.append([search(fen, tt) for fen in POSITIONS + POSITIONS])
+        assert tt.total_hits > 0
+    assert runs[0] == runs[1]
+    # A doua căutare a aceleiași poziții pornește din tabelă
+    first, second = runs[0][:len(POSITIONS)], runs[0][len(POSITIONS):]
+    assert all(again[2] <= before[2] for before, again in zip(first, second))
+
+
+def alpha_beta(board, depth, alpha=-float("inf"), beta=float("inf")):
+    """Alpha-beta simplu pe chess.Board, fără tabelă și fără extensii: scorul de referință."""
+    if depth == 0 or board.is_game_over():
+        return evaluate_board(board, DEFAULT_PIECE_VALUES)
+    maximizing = board.turn == chess.WHITE
+    best = -float("inf") if maximizing else float("inf")
+    for move in board.legal_moves:
+        board.push(move)
+        value = alpha_beta(board, depth - 1, alpha, beta)
+        board.pop()
+        if maximizing:
+            best, alpha = max(best, value), max(alpha, value)
+        else:
+            best, beta = min(best, value), min(beta, value)
+        if alpha >= beta:
+            break
+    return best
+
+
+@pytest.mark.parametrize("fen", POSITIONS)
+def test_table_search_matches_plain_alpha_beta(fen):
+    board = chess960.make_board(fen)
+    tt = TranspositionTable()
+    options = SearchOptions.parse("none")
+    # A doua căutare folosește limitele (LOWER/UPPER) lăsate în tabelă de prima,
+    # calculate cu alte ferestre alpha-beta
+    results = [search(fen, tt, depth=3, options=options)[:2] for _ in range(2)]
+    assert tt.total_hits > 0
+
+    scores = {}
+    for candidate in board.legal_moves:
+        board.push(candidate)
+        scores[candidate] = alpha_beta(board, 2)
+        board.pop()
+    best = max(scores.values()) if board.turn == chess.WHITE else min(scores.values())
+    for move, value in results:
+        assert value == pytest.approx(best)
+        # Între mutările cu același scor, oricare este corectă
+        assert scores[move] == pytest.approx(best)
+
+    # Multi-PV dă scorul exact și pentru mutările care nu sunt cele mai bune,
+    # deci și pentru cele ale căror intrări din tabelă sunt doar limite
+    searcher = Search(IncrementalEvaluator(DEFAULT_PIECE_VALUES), tt, SearchLimits(3), options)
+    lines = searcher.multipv(board, 4)
+    expected = sorted(scores.values(), reverse=board.turn == chess.WHITE)[:4]
+    assert [value for _, value in lines] == pytest.approx(expected)
+    assert all(scores[move] == pytest.approx(value) for move, value in lines)
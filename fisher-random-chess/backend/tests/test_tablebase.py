@@ -0,0 +1,61 @@
+import chess
+
+from engine.evaluation import DEFAULT_PIECE_VALUES, IncrementalEvaluator
+from engine.position import Position
+from engine.search import Search, SearchLimits
+from engine.tablebase import TABLEBASE_WIN, Tablebase
+from engine.transposition import TranspositionTable
+
+KRK = "8/8/8/4k3/8/8/8/R3K3 w - - 0 1"
+
+
+class FixedTablebase(Tablebase):
+    """Tabele fără fișier: jucătorul la mutare pierde mereu în `plies` semimutări."""
+
+    def __init__(self, plies):
+        super().__init__(path=None)
+        self.plies = plies
+
+    def probe(self, position):
+        if position.occupied.bit_count() != 3:
+            return None
+        return (1, self.plies) if position.turn == chess.WHITE else (-1, self.plies)
+
+
+def test_score_counts_plies_from_the_root():
+    tablebase = FixedTablebase(5)
+    white = Position.from_board(chess.Board(KRK))
+    black = Position.from_board(chess.Board(KRK.replace(" w ", " b ")))
+    assert tablebase.score(white) == TABLEBASE_WIN - 5
+    assert tablebase.score(white, ply=3) == TABLEBASE_WIN - 8
+    # Semnul rămâne cel al rezultatului (din perspectiva albului)
+    assert tablebase.score(black, ply=3) == TABLEBASE_WIN - 8
+
+
+def test_search_prefers_faster_conversion():
+    board = chess.Board(KRK)
+    scores = {}
+    for plies in (2, 6):
+        search = Search(IncrementalEvaluator(DEFAULT_PIECE_VALUES), TranspositionTable(), SearchLimits(1),
+                        tablebase=FixedTablebase(plies))
+        search.start(board)
+        scores[plies] = search.search_root(board, 1)[1]
+    # Pozițiile din tabele sunt atinse la un ply de rădăcină
+    assert scores == {2: TABLEBASE_WIN - 3, 6: TABLEBASE_WIN - 7}
+
+
+def test_table_scores_follow_the_ply():
+    # Turnul ia pionul și ajunge în KRK, unde negrul la mutare pierde în 5 semimutări
+    board = chess.Board("8/8/8/4k3/8/8/p7/R3K3 w - - 0 1")
+    tt = TranspositionTable()
+    values, hits = [], []
+    for ply in (0, 3, 0):
+        # Căutări noi pe aceeași tabelă: aceeași poziție, la alt ply de rădăcină
+        search = Search(IncrementalEvaluator(DEFAULT_PIECE_VALUES), tt, SearchLimits(1),
+                        tablebase=FixedTablebase(5))
+        search.start(board)
+        values.append(search.minimax(search.position, 1, -float("inf"), float("inf"), True, ply))
+        hits.append(search.tt_hits)
+    # A doua și a treia căutare citesc poziția din tabelă
+    assert hits == [0, 1, 1]
+    assert values == [TABLEBASE_WIN - 6, TABLEBASE_WIN - 9, TABLEBASE_WIN - 6]
@@ -0,0 +1,25 @@
+from engine.transposition import EXACT, TranspositionTable
+
+
+def test_clear_keeps_lifetime_totals():
+    tt = TranspositionTable(10)
+    tt.store(1, 3, 25, EXACT)
+    assert tt.probe(1) is not None
+    assert tt.probe(2) is None
+    tt.clear()
+    assert (tt.hits, tt.misses) == (0, 0)
+    # Totalurile din spatele contorului Prometheus nu scad niciodată
+    assert (tt.total_hits, tt.total_misses) == (1, 1)
+    assert tt.probe(1) is None
+    assert (tt.total_hits, tt.total_misses) == (1, 2)
+
+
+def test_lru_eviction_keeps_deeper_entry():
+    tt = TranspositionTable(2)
+    tt.store(1, 5, 10, EXACT)
+    tt.store(1, 2, 99, EXACT)
+    assert tt.peek(1).score == 10
+    tt.store(2, 1, 0, EXACT)
+    tt.probe(1)
+    tt.store(3, 1, 0, EXACT)
+    assert tt.peek(2) is None and tt.peek(1) is not None and len(tt) == 2
@@ -0,0 +1,41 @@
+import json
+
+import chess
+import numpy as np
+
+from engine import chess960
+from engine.evaluation import DEFAULT_PIECE_VALUES
+from engine.tuning import (MIN_PIECE_VALUE, TUNED_PIECES, fit, load_samples, piece_values_from, play_game,
+                           selfplay)
+
+
+def test_selfplay_and_fit(tmp_path):
+    output = tmp_path / "selfplay.jsonl"
+    scores = selfplay(str(output), games=2, depth=1, node_limit=2000, workers=2, seed=7)
+    assert sum(scores.values()) == 2
+
+    records = sorted((json.loads(line) for line in output.read_text().splitlines()),
+                     key=lambda record: record["game"])
+    assert [record["game"] for record in records] == [0, 1]
+    for record in records:
+        assert set(record) == {"game", "index", "result", "plies", "positions"}
+        assert 0 <= record["index"] < chess960.POSITION_COUNT
+        assert record["result"] in (0.0, 0.5, 1.0)
+        assert record["positions"]
+        assert all(len(row) == len(TUNED_PIECES) + 1 for row in record["positions"])
+    # Aceeași sămânță, același joc
+    again = play_game(0, records[0]["index"], 1, 2000, DEFAULT_PIECE_VALUES, 7)
+    assert again == records[0]
+
+    material, positional, results = load_samples([str(output)])
+    assert len(material) == len(results) == sum(len(record["positions"]) for record in records)
+    # Pornind de la limita inferioară, cu pași mari, valorile nu coboară sub ea
+    initial = [MIN_PIECE_VALUE] * len(TUNED_PIECES)
+    values, scale, _, _ = fit(material, positional, results, initial, epochs=5, learning_rate=1.0)
+    assert scale > 0
+    assert np.all(values >= MIN_PIECE_VALUE) and np.all(np.isfinite(values))
+
+    piece_values = piece_values_from(values)
+    for piece_type in TUNED_PIECES:
+        symbol = chess.piece_symbol(piece_type)
+        assert piece_values[symbol] == piece_values[symbol.upper()] >= MIN_PIECE_VALUE
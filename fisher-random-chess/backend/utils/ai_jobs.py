@@ -0,0 +1,125 @@
+"""
+Mutările AI calculate în fundal.
+
+Cererea HTTP validează mutarea jucătorului și răspunde imediat; căutarea AI
+rulează într-un executor cu un număr limitat de fire și o coadă limitată.
+O nouă mutare în același joc anulează căutarea anterioară a jocului.
+
+Firele executorului nu caută ele însele: serverul trimite căutarea la un
+pool de procese (`SearchPool`) și firul jobului doar așteaptă rezultatul,
+deci căutările nu iau timp de procesor firelor care răspund celorlalte cereri.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "error"
+
+
+class QueueFull(Exception):
+    """Prea multe căutări AI în așteptare."""
+
+
+class AIJob:
+    def __init__(self, game_id, board, options):
+        self.job_id = uuid.uuid4().hex
+        self.game_id = game_id or self.job_id
+        self.board = board
+        self.options = options
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.cancel_event = threading.Event()
+
+    def to_dict(self):
+        data = {"job_id": self.job_id, "game_id": self.game_id, "status": self.status}
+        if self.result is not None:
+            data.update(self.result)
+        if self.error is not None:
+            data["message"] = self.error
+        return data
+
+
+class AIJobQueue:
+    """
+    `run(job)` calculează mutarea și returnează un dicționar cu rezultatul;
+    `notify(job)` este apelat când jobul s-a terminat (cu succes sau nu).
+    Joburile terminate sunt păstrate pentru interogare până la `max_jobs`.
+    """
+
+    def __init__(self, run, notify, workers=2, max_pending=32, max_jobs=1000):
+        self.run = run
+        self.notify = notify
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-move")
+        self._jobs = OrderedDict()
+        self._active_by_game = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, game_id, board, options):
+        job = AIJob(game_id, board, options)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull("Too many AI moves in progress, try again later.")
+            previous = self._active_by_game.get(job.game_id)
+            if previous is not None:
+                previous.cancel_event.set()
+            self._active_by_game[job.game_id] = job
+            self._jobs[job.job_id] = job
+            self._pending += 1
+            while len(self._jobs) > self.max_jobs:
+                _, old = self._jobs.popitem(last=False)
+                old.cancel_event.set()
+        self._executor.submit(self._execute, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, game_id):
+        """Anulează căutarea în curs pentru joc. Returnează True dacă exista una."""
+        with self._lock:
+            job = self._active_by_game.get(game_id)
+        if job is None:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def _execute(self, job):
+        try:
+            if job.cancel_event.is_set():
+                job.status = CANCELLED
+                return
+            job.status = RUNNING
+            result = self.run(job)
+            if job.cancel_event.is_set():
+                job.status = CANCELLED
+            else:
+                job.result = result
+                job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if self._active_by_game.get(job.game_id) is job:
+                    del self._active_by_game[job.game_id]
+            job.board = None
+            self.notify(job)
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._active_by_game.values():
+                job.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
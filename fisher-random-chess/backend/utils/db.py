@@ -0,0 +1,585 @@
+"""
+Accesul la baza de date: un pool de conexiuni MySQL folosit de toate firele
+serverului și o coadă de scrieri întârziate (write-behind), golită în loturi
+(`executemany`, un singur commit pe lot) de un fir separat.
+
+Pentru rulare locală, teste și benchmark-uri există și `SQLiteDatabase`, cu
+aceeași interfață. Interogările se scriu în dialectul MySQL (parametri `%s`);
+pentru upsert se folosește `upsert_query`, care diferă între dialecte.
+
+Conexiunea se deschide abia la prima interogare, deci serverul pornește și
+fără baza de date. Schema este creată (sau completată) fie o singură dată, la
+prima interogare (`auto_migrate`), fie dinainte, cu:
+
+    python -m utils.db migrate
+"""
+import abc
+import argparse
+import atexit
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Configurarea implicită a conexiunii MySQL (suprascrisă prin DB_HOST, DB_USER, DB_PASSWORD, DB_NAME);
+# parola nu are valoare implicită și se dă doar prin DB_PASSWORD
+DEFAULT_MYSQL_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "database": "fisher_random_chess"
+}
+
+# Tabelele aplicației
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS learning_data (
+        piece CHAR(1) PRIMARY KEY,
+        value FLOAT NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS game_history (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        moves TEXT NOT NULL,
+        winner VARCHAR(10),
+        date_played TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        start_fen VARCHAR(100)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS multiplayer_games (
+        game_id VARCHAR(36) PRIMARY KEY,
+        start_fen VARCHAR(100) NOT NULL,
+        moves TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS multiplayer_moves (
+        game_id VARCHAR(36) NOT NULL,
+        seq INT NOT NULL,
+        move VARCHAR(5) NOT NULL,
+        PRIMARY KEY (game_id, seq)
+    );
+    """
+]
+
+# Coloanele adăugate după crearea inițială a tabelelor: (tabelă, coloană, definiție)
+COLUMNS = [
+    ("game_history", "start_fen", "VARCHAR(100)"),
+]
+
+# Indexurile secundare: (nume, tabelă, coloane)
+INDEXES = [
+    ("idx_game_history_date", "game_history", ("date_played", "id")),
+    ("idx_game_history_winner_date", "game_history", ("winner", "date_played", "id")),
+]
+
+
+def _insert_source(columns, select_from=None):
+    """
+    Sursa valorilor unui INSERT: VALUES (%s, ...), sau SELECT %s, ... FROM
+    `select_from`, care inserează rândul doar dacă `select_from` are un rând.
+    """
+    placeholders = ", ".join(["%s"] * len(columns))
+    if select_from is None:
+        return f"VALUES ({placeholders})"
+    return f"SELECT {placeholders} FROM {select_from}"
+
+
+class Database(abc.ABC):
+    """
+    Interfața comună a bazelor de date. Cu `auto_migrate`, prima interogare
+    creează întâi schema (`create_tables`), o singură dată pentru tot procesul.
+    """
+
+    dialect = None
+
+    def __init__(self, auto_migrate=False):
+        self.auto_migrate = auto_migrate
+        self._schema_ready = not auto_migrate
+        self._migrating = False
+        self._schema_lock = threading.RLock()
+
+    def _ensure_schema(self):
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            # Interogările din create_tables ajung tot aici, pe același fir
+            if self._schema_ready or self._migrating:
+                return
+            self.migrate()
+
+    def migrate(self):
+        """Creează tabelele, coloanele și indexurile care lipsesc (poate fi rulată de oricâte ori)."""
+        with self._schema_lock:
+            self._migrating = True
+            try:
+                with self.cursor(commit=True) as cursor:
+                    for query in SCHEMA:
+                        cursor.execute(query)
+                for table, column, definition in COLUMNS:
+                    if not self.has_column(table, column):
+                        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                for name, table, columns in INDEXES:
+                    if not self.has_index(table, name):
+                        self.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+                self._schema_ready = True
+            finally:
+                self._migrating = False
+
+    @abc.abstractmethod
+    def cursor(self, commit=False):
+        """Context manager: un cursor, cu tranzacția confirmată la final dacă `commit`."""
+
+    @abc.abstractmethod
+    def upsert_query(self, table, keys, columns):
+        """INSERT care actualizează coloanele `columns` dacă rândul cu cheia `keys` există."""
+
+    @abc.abstractmethod
+    def insert_missing_query(self, table, columns, select_from=None):
+        """
+        INSERT care ignoră rândurile a căror cheie există deja. Cu `select_from`
+        (de exemplu "games WHERE id = %s"), rândul este inserat doar dacă
+        interogarea are un rezultat (vezi `_insert_source`).
+        """
+
+    @abc.abstractmethod
+    def has_column(self, table, column):
+        """True dacă tabela `table` are coloana `column`."""
+
+    @abc.abstractmethod
+    def has_index(self, table, name):
+        """True dacă tabela `table` are indexul `name`."""
+
+    def execute(self, query, params=()):
+        """Rulează o interogare de scriere și returnează numărul de rânduri modificate."""
+        with self.cursor(commit=True) as cursor:
+            cursor.execute(query, params)
+            return cursor.rowcount
+
+    def executemany(self, query, rows):
+        with self.cursor(commit=True) as cursor:
+            cursor.executemany(query, rows)
+
+    def fetchall(self, query, params=()):
+        with self.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    def ping(self):
+        """Verifică legătura cu baza de date (și schema, cu `auto_migrate`); aruncă o excepție dacă lipsește."""
+        self.fetchall("SELECT 1")
+
+
+class MySQLDatabase(Database):
+    """
+    Fiecare operație ia o conexiune din pool și o returnează la final, deci
+    firele nu mai împart același cursor.
+    """
+
+    dialect = "mysql"
+
+    def __init__(self, config, pool_size=5, pool_name="fisher_random_chess", auto_migrate=False, pool_timeout=10.0):
+        super().__init__(auto_migrate)
+        self.config = config
+        self.pool_size = pool_size
+        self.pool_name = pool_name
+        self.pool_timeout = pool_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Pool-ul MySQL aruncă PoolError când toate conexiunile sunt folosite;
+        # semaforul face ca firele să aștepte o conexiune liberă (cel mult `pool_timeout` secunde)
+        self._available = threading.BoundedSemaphore(pool_size)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                if self.config.get("password") is None:
+                    # Eroarea apare la prima interogare, deci și în /api/health/ready
+                    raise ValueError("DB_PASSWORD is not set (required with DB_BACKEND=mysql)")
+                import mysql.connector.pooling
+
+                self._pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name=self.pool_name, pool_size=self.pool_size, **self.config
+                )
+            return self._pool
+
+    @contextmanager
+    def cursor(self, commit=False):
+        self._ensure_schema()
+        pool = self._pool or self._get_pool()
+        if not self._available.acquire(timeout=self.pool_timeout):
+            raise TimeoutError(f"No free database connection after {self.pool_timeout} seconds")
+        try:
+            connection = pool.get_connection()
+            try:
+                cursor = connection.cursor()
+                try:
+                    yield cursor
+                    if commit:
+                        connection.commit()
+                finally:
+                    cursor.close()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.close()  # returnează conexiunea în pool
+        finally:
+            self._available.release()
+
+    def upsert_query(self, table, keys, columns):
+        names = list(keys) + list(columns)
+        updates = ", ".join(f"{column} = VALUES({column})" for column in columns)
+        return (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))}) "
+                f"ON DUPLICATE KEY UPDATE {updates}")
+
+    def insert_missing_query(self, table, columns, select_from=None):
+        return f"INSERT IGNORE INTO {table} ({', '.join(columns)}) {_insert_source(columns, select_from)}"
+
+    def has_column(self, table, column):
+        return bool(self.fetchall("SELECT 1 FROM information_schema.columns WHERE table_schema = DATABASE() "
+                                  "AND table_name = %s AND column_name = %s", (table, column)))
+
+    def has_index(self, table, name):
+        return bool(self.fetchall("SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                                  "AND table_name = %s AND index_name = %s", (table, name)))
+
+
+class _SQLiteCursor:
+    """Cursor SQLite care acceptă interogările scrise pentru MySQL."""
+
+    _REWRITES = [
+        (re.compile(r"\bINT AUTO_INCREMENT PRIMARY KEY\b", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+        (re.compile(r"\bON UPDATE CURRENT_TIMESTAMP\b", re.I), ""),
+        (re.compile(r"%s"), "?"),
+    ]
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @classmethod
+    def translate(cls, query):
+        for pattern, replacement in cls._REWRITES:
+            query = pattern.sub(replacement, query)
+        return query
+
+    def execute(self, query, params=()):
+        self._cursor.execute(self.translate(query), params)
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(self.translate(query), rows)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteDatabase(Database):
+    """
+    Bază de date SQLite într-un singur fișier (sau în memorie, cu ":memory:").
+    O singură conexiune, folosită pe rând de fire.
+    """
+
+    dialect = "sqlite"
+
+    def __init__(self, path=":memory:", auto_migrate=False):
+        super().__init__(auto_migrate)
+        self.path = path
+        self._connection = None
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def cursor(self, commit=False):
+        self._ensure_schema()
+        with self._lock:
+            if self._connection is None:
+                self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            cursor = _SQLiteCursor(self._connection.cursor())
+            try:
+                yield cursor
+                if commit:
+                    self._connection.commit()
+            except Exception:
+                self._connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def upsert_query(self, table, keys, columns):
+        names = list(keys) + list(columns)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns)
+        return (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))}) "
+                f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}")
+
+    def insert_missing_query(self, table, columns, select_from=None):
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) {_insert_source(columns, select_from)}"
+
+    def has_column(self, table, column):
+        return any(row[1] == column for row in self.fetchall(f"PRAGMA table_info({table})"))
+
+    def has_index(self, table, name):
+        return bool(self.fetchall("SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND name = %s",
+                                  (table, name)))
+
+
+def database_from_env():
+    """
+    Baza de date aleasă prin DB_BACKEND: "mysql" (implicit, pool de DB_POOL_SIZE
+    conexiuni, așteptate cel mult DB_POOL_TIMEOUT secunde) sau "sqlite" (fișierul SQLITE_PATH, implicit în memorie).
+    Nu se conectează încă (nici nu verifică DB_PASSWORD, obligatorie pentru
+    MySQL: lipsa ei este raportată la prima interogare). Cu DB_AUTO_MIGRATE=1 (implicit), schema este
+    creată la prima interogare; cu 0, trebuie creată cu `python -m utils.db migrate`.
+    """
+    backend = os.environ.get("DB_BACKEND", "mysql")
+    if backend not in ("mysql", "sqlite"):
+        raise ValueError(f"Unknown DB_BACKEND: {backend!r} (expected mysql or sqlite)")
+    auto_migrate = os.environ.get("DB_AUTO_MIGRATE", "1") != "0"
+    if backend == "sqlite":
+        return SQLiteDatabase(os.environ.get("SQLITE_PATH", ":memory:"), auto_migrate=auto_migrate)
+    config = {
+        "host": os.environ.get("DB_HOST", DEFAULT_MYSQL_CONFIG["host"]),
+        "user": os.environ.get("DB_USER", DEFAULT_MYSQL_CONFIG["user"]),
+        "password": os.environ.get("DB_PASSWORD"),
+        "database": os.environ.get("DB_NAME", DEFAULT_MYSQL_CONFIG["database"])
+    }
+    return MySQLDatabase(config, pool_size=int(os.environ.get("DB_POOL_SIZE", "5")), auto_migrate=auto_migrate,
+                         pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", "10")))
+
+
+def create_tables(db):
+    """Creează tabelele, coloanele și indexurile care lipsesc (poate fi rulată de oricâte ori)."""
+    db.migrate()
+
+
+def save_piece_values(db, piece_values):
+    """Scrie toate valorile pieselor într-o singură tranzacție (toate sau niciuna)."""
+    with db.cursor(commit=True) as cursor:
+        cursor.executemany(db.upsert_query("learning_data", ["piece"], ["value"]),
+                           list(piece_values.items()))
+
+
+def load_piece_values(db):
+    rows = db.fetchall("SELECT piece, value FROM learning_data")
+    return {row[0]: row[1] for row in rows}
+
+
+class LearningData:
+    """
+    Valorile pieselor folosite de AI, comune tuturor firelor serverului. Sunt
+    citite din baza de date o singură dată, la prima folosire; piesele care
+    lipsesc din tabel primesc valorile din `defaults`, ca valorile publicate
+    de `python -m engine.tuning fit --publish` să rămână după repornire.
+    """
+
+    def __init__(self, db, defaults):
+        self.db = db
+        self.defaults = dict(defaults)
+        self._piece_values = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._piece_values is not None
+
+    @property
+    def piece_values(self):
+        if self._piece_values is None:
+            with self._lock:
+                if self._piece_values is None:
+                    self._piece_values = self._load()
+        return self._piece_values
+
+    def reload(self):
+        """Recitește valorile din baza de date (după `engine.tuning fit --publish`)."""
+        with self._lock:
+            self._piece_values = self._load()
+        return self._piece_values
+
+    def set(self, piece_values):
+        # Dicționarul este înlocuit, nu modificat, ca o căutare în curs să păstreze valorile ei
+        self._piece_values = dict(piece_values)
+
+    def _load(self):
+        self.db.executemany(self.db.insert_missing_query("learning_data", ["piece", "value"]),
+                            list(self.defaults.items()))
+        return {piece: value for piece, value in load_piece_values(self.db).items() if piece in self.defaults}
+
+
+class WriteBehindQueue:
+    """
+    Scrierile sunt puse în coadă și trimise la baza de date când coada
+    ajunge la `max_batch` elemente, la fiecare `flush_interval` secunde și la
+    oprirea serverului. Scrierile cu aceeași cheie (`key`) se înlocuiesc
+    între ele, deci se trimite doar ultima valoare.
+
+    Scrierile care nu reușesc rămân în coadă și sunt reîncercate, cu o pauză
+    care se dublează până la `max_backoff` secunde. Cât timp baza de date nu
+    răspunde, nicio scriere nu este pierdută; o scriere respinsă de o bază de
+    date care răspunde (o interogare greșită) este renunțată după
+    `max_attempts` încercări, ca să nu blocheze restul cozii.
+    """
+
+    def __init__(self, db, max_batch=100, flush_interval=1.0, max_backoff=30.0, max_attempts=5):
+        self.db = db
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._pending = OrderedDict()
+        self._attempts = {}
+        self._failures = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, query, params, key=None):
+        with self._lock:
+            if key is None:
+                self._counter += 1
+                key = ("_", self._counter)
+            else:
+                self._pending.pop((query, key), None)
+                self._attempts.pop((query, key), None)
+            self._pending[(query, key)] = (query, params)
+            # În timpul unei pauze după o eroare, coada plină nu grăbește reîncercarea
+            full = len(self._pending) >= self.max_batch and not self._failures
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Trimite imediat toate scrierile din coadă. Returnează True dacă toate au fost scrise."""
+        with self._flush_lock:
+            with self._lock:
+                items = list(self._pending.items())
+                self._pending.clear()
+            if not items:
+                return True
+            try:
+                self._write([value for _, value in items])
+            except Exception as e:
+                print(f"Error flushing {len(items)} queued writes: {e}")  # Debugging
+                failed = self._write_each(items)
+            else:
+                failed = []
+            with self._lock:
+                failed_keys = {key for key, _ in failed}
+                for key, _ in items:
+                    if key not in failed_keys:
+                        self._attempts.pop(key, None)
+                self._requeue(failed)
+                self._failures = self._failures + 1 if failed else 0
+            return not failed
+
+    def _write(self, values):
+        # Doar interogările identice consecutive sunt grupate: ordinea scrierilor
+        # se păstrează (un INSERT, apoi DELETE, apoi alt INSERT al aceluiași rând)
+        batches = []
+        for query, params in values:
+            if batches and batches[-1][0] == query:
+                batches[-1][1].append(params)
+            else:
+                batches.append((query, [params]))
+        with self.db.cursor(commit=True) as cursor:
+            for query, rows in batches:
+                cursor.executemany(query, rows)
+
+    def _write_each(self, items):
+        """
+        După un lot eșuat: dacă baza de date nu răspunde, toate scrierile
+        rămân pentru mai târziu; altfel fiecare este scrisă separat, ca o
+        scriere greșită să nu le oprească pe celelalte. Returnează scrierile nereușite.
+        """
+        try:
+            self.db.ping()
+        except Exception:
+            return items
+        failed = []
+        for key, value in items:
+            try:
+                self._write([value])
+            except Exception as e:
+                # `put` poate șterge încercările aceleiași chei în paralel
+                with self._lock:
+                    attempts = self._attempts.get(key, 0) + 1
+                    if attempts < self.max_attempts:
+                        self._attempts[key] = attempts
+                if attempts >= self.max_attempts:
+                    print(f"Dropping queued write after {attempts} attempts: {value[0]} {value[1]!r}: {e}")  # Debugging
+                    continue
+                failed.append((key, value))
+        return failed
+
+    def _requeue(self, failed):
+        """Pune scrierile nereușite înaintea celor noi; o valoare mai nouă cu aceeași cheie le înlocuiește. Se apelează cu `_lock` ținut."""
+        if not failed:
+            return
+        merged = OrderedDict((key, value) for key, value in failed if key not in self._pending)
+        merged.update(self._pending)
+        self._pending = merged
+
+    def _run(self):
+        while not self._stopped:
+            delay = self.flush_interval
+            if self._failures:
+                delay = min(self.flush_interval * 2 ** self._failures, self.max_backoff)
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """
+        Oprește firul și trimite ce a rămas în coadă. Returnează scrierile care
+        nu au putut fi trimise (și le afișează), în loc să le piardă în tăcere.
+        """
+        if self._stopped:
+            return []
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        if self.flush():
+            return []
+        with self._lock:
+            unwritten = list(self._pending.values())
+        print(f"Could not write {len(unwritten)} queued writes at shutdown:")  # Debugging
+        for query, params in unwritten:
+            print(f"  {query} {params!r}")  # Debugging
+        return unwritten
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the database schema.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="create the missing tables, columns and indexes (DB_BACKEND etc. as for the server)")
+    parser.parse_args(argv)
+
+    db = database_from_env()
+    create_tables(db)
+    print(f"Schema is up to date ({db.dialect})")
+
+
+if __name__ == "__main__":
+    main()
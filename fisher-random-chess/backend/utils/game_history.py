@@ -0,0 +1,192 @@
+"""
+Citirea istoricului jocurilor (`game_history`): pagini cu filtre după
+câștigător și dată, și exportul întregului istoric ca PGN sau JSONL.
+
+Paginarea este după cheie (keyset), nu după OFFSET: fiecare pagină continuă
+de la ultimul joc al paginii anterioare (data, id), pe indexurile
+`idx_game_history_date` și `idx_game_history_winner_date`, deci costul unei
+pagini nu crește cu poziția ei în tabelă. Exportul citește tabela în loturi
+de același fel și produce textul joc cu joc, fără a ține tabela în memorie
+și fără a ține o conexiune ocupată între loturi.
+
+Din linia de comandă (din directorul backend, cu baza de date aleasă ca
+pentru server):
+
+    python -m utils.game_history --format pgn --winner white --since 2024-01-01 --output games.pgn
+"""
+import argparse
+import base64
+import json
+import sys
+from datetime import datetime
+
+import chess
+import chess.pgn
+
+from engine import chess960
+
+WINNERS = ("white", "black", "draw")
+RESULTS = {"white": "1-0", "black": "0-1", "draw": "1/2-1/2"}
+
+# Jocurile citite dintr-o singură interogare la export
+EXPORT_BATCH_SIZE = 1000
+
+_COLUMNS = "id, winner, date_played, start_fen, moves"
+
+
+def _date_text(value):
+    """Data ca text "AAAA-LL-ZZ HH:MM:SS", la fel în MySQL (datetime) și SQLite (text)."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+def parse_date(text):
+    """O dată sau un moment ("2024-01-31", "2024-01-31T12:00:00"), ca text comparabil cu `date_played`."""
+    if not text:
+        return None
+    try:
+        return _date_text(datetime.fromisoformat(text))
+    except ValueError:
+        raise ValueError(f"Invalid date: {text!r}")
+
+
+def encode_cursor(game):
+    return base64.urlsafe_b64encode(f"{game['date_played']}|{game['id']}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(data, id) din cursorul unei pagini."""
+    try:
+        date_played, game_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return date_played, int(game_id)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+class GameFilter:
+    """Filtrele unei citiri: câștigătorul și intervalul de date [since, until)."""
+
+    def __init__(self, winner=None, since=None, until=None):
+        if winner is not None and winner not in WINNERS:
+            raise ValueError(f"winner must be one of: {', '.join(WINNERS)}")
+        self.winner = winner
+        self.since = parse_date(since)
+        self.until = parse_date(until)
+
+    def where(self, after=None, descending=True):
+        """Condiția WHERE (cu parametrii ei), cu jocurile de după cursorul `after` = (data, id)."""
+        clauses = []
+        params = []
+        if self.winner is not None:
+            clauses.append("winner = %s")
+            params.append(self.winner)
+        if self.since is not None:
+            clauses.append("date_played >= %s")
+            params.append(self.since)
+        if self.until is not None:
+            clauses.append("date_played < %s")
+            params.append(self.until)
+        if after is not None:
+            # Scris desfăcut (nu ca (date_played, id) < (...)), ca MySQL să folosească indexul
+            sign = "<" if descending else ">"
+            clauses.append(f"(date_played {sign} %s OR (date_played = %s AND id {sign} %s))")
+            params.extend([after[0], after[0], after[1]])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _game(row):
+    game_id, winner, date_played, start_fen, moves = row
+    return {
+        "id": game_id,
+        "winner": winner,
+        "date_played": _date_text(date_played),
+        "start_fen": start_fen,
+        "moves": json.loads(moves)
+    }
+
+
+def fetch_games(db, game_filter=None, after=None, limit=100, descending=True):
+    """O pagină de jocuri, de la cel mai nou (sau cel mai vechi), după cursorul `after` = (data, id)."""
+    where, params = (game_filter or GameFilter()).where(after, descending)
+    order = "DESC" if descending else "ASC"
+    rows = db.fetchall(f"SELECT {_COLUMNS} FROM game_history{where} "
+                       f"ORDER BY date_played {order}, id {order} LIMIT %s", params + [limit])
+    return [_game(row) for row in rows]
+
+
+def iter_games(db, game_filter=None, after=None, descending=False, batch_size=EXPORT_BATCH_SIZE):
+    """Generator: toate jocurile care trec de filtru, citite în loturi de `batch_size`."""
+    while True:
+        games = fetch_games(db, game_filter, after, batch_size, descending)
+        yield from games
+        if len(games) < batch_size:
+            return
+        after = (games[-1]["date_played"], games[-1]["id"])
+
+
+def game_to_pgn(game):
+    """Jocul ca text PGN (Chess960, cu poziția de start în antet)."""
+    board = chess960.make_board(game["start_fen"] or chess.STARTING_FEN)
+    pgn = chess.pgn.Game()
+    pgn.setup(board)
+    pgn.headers["Event"] = "Fisher Random Chess"
+    pgn.headers["Date"] = game["date_played"][:10].replace("-", ".")
+    pgn.headers["Result"] = RESULTS.get(game["winner"], "*")
+    pgn.headers["GameId"] = str(game["id"])
+    node = pgn
+    for uci in game["moves"]:
+        try:
+            move = board.parse_uci(uci)
+        except ValueError:
+            pgn.comment = f"Invalid stored move {uci!r}; the game is cut here."
+            break
+        node = node.add_variation(move)
+        board.push(move)
+    return str(pgn) + "\n\n"
+
+
+def game_to_json(game):
+    return json.dumps(game, separators=(",", ":")) + "\n"
+
+
+# Formatele de export: (funcția pentru un joc, tipul MIME, extensia fișierului)
+EXPORT_FORMATS = {
+    "pgn": (game_to_pgn, "application/x-chess-pgn", "pgn"),
+    "jsonl": (game_to_json, "application/x-ndjson", "jsonl"),
+}
+
+
+def export_games(db, fmt="pgn", game_filter=None, after=None, descending=False, batch_size=EXPORT_BATCH_SIZE):
+    """Generator: textul exportului, joc cu joc."""
+    to_text = EXPORT_FORMATS[fmt][0]
+    for game in iter_games(db, game_filter, after, descending, batch_size):
+        yield to_text(game)
+
+
+def main(argv=None):
+    from utils.db import create_tables, database_from_env
+
+    parser = argparse.ArgumentParser(description="Export the game history as PGN or JSONL.")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="pgn")
+    parser.add_argument("--output", help="write the export to this file (default: stdout)")
+    parser.add_argument("--winner", choices=WINNERS)
+    parser.add_argument("--since", help="first date to include, e.g. 2024-01-01")
+    parser.add_argument("--until", help="first date to exclude")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    db = database_from_env()
+    create_tables(db)
+    game_filter = GameFilter(args.winner, args.since, args.until)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for text in export_games(db, args.format, game_filter, batch_size=args.batch_size):
+            output.write(text)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Jocurile multiplayer active, ținute în memorie ca table python-chess vii
+(cu tot istoricul mutărilor), în loc să fie reconstruite din FEN la fiecare
+mutare.
+
+Memoria este limitată: jocurile nefolosite de `idle_timeout` secunde sau cele
+mai vechi, peste `max_games`, sunt scoase din memorie și salvate prin
+`spill`; la următoarea cerere sunt refăcute prin `load` (FEN-ul de start și
+mutările sunt rejucate).
+
+Cu mai multe procese (workeri), jocurile sunt ținute într-o stocare comună
+(`shared`): mutările fiecărui joc sunt numerotate de la 1 (numărul de
+secvență), iar o mutare este adăugată doar dacă numărul ei urmează ultimei
+mutări din stocare. Fiecare proces păstrează tablele vii ca acum și le aduce
+la zi din stocare când alt proces a mutat între timp. Stocări:
+`MemoryStateStore` (un singur proces, pentru teste) și `DatabaseStateStore`
+(tabela `multiplayer_moves`; pe MySQL sau pe un fișier SQLite comun
+workerilor de pe aceeași mașină).
+"""
+import abc
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import chess
+
+from engine import chess960
+
+# Caracterele ID-urilor de joc (fără 0/o, 1/l/i, ușor de confundat când ID-ul este tastat)
+GAME_ID_ALPHABET = "23456789abcdefghjkmnpqrstuvwxyz"
+GAME_ID_LENGTH = 8
+
+
+def new_game_id():
+    """Un ID de joc aleator; unicitatea este garantată de `create`, care refuză un ID deja folosit."""
+    return "".join(secrets.choice(GAME_ID_ALPHABET) for _ in range(GAME_ID_LENGTH))
+
+
+class IllegalMove(ValueError):
+    pass
+
+
+class GameNotFound(LookupError):
+    """Jocul nu (mai) există în stocarea comună, de exemplu după ce alt proces l-a terminat."""
+
+
+class LiveGame:
+    __slots__ = ("game_id", "start_fen", "board", "lock", "last_used")
+
+    def __init__(self, game_id, start_fen, board=None):
+        self.game_id = game_id
+        self.start_fen = start_fen
+        self.board = board if board is not None else chess.Board(start_fen, chess960=True)
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    @property
+    def fen(self):
+        return self.board.fen()
+
+    @property
+    def turn(self):
+        return "w" if self.board.turn else "b"
+
+    @property
+    def moves(self):
+        return [move.uci() for move in self.board.move_stack]
+
+    @property
+    def seq(self):
+        """Numărul de secvență al ultimei mutări (0 la începutul jocului)."""
+        return len(self.board.move_stack)
+
+    @classmethod
+    def replay(cls, game_id, start_fen, moves):
+        board = chess.Board(start_fen, chess960=True)
+        for move in moves:
+            board.push_uci(move)
+        return cls(game_id, start_fen, board)
+
+
+class GameStateStore(abc.ABC):
+    """
+    Stocarea comună a jocurilor: FEN-ul de start și mutările (UCI), cu
+    numerele lor de secvență. Operațiile sunt atomice între procese.
+    """
+
+    @abc.abstractmethod
+    def create(self, game_id, start_fen):
+        """Creează jocul; returnează False dacă ID-ul este deja folosit."""
+
+    @abc.abstractmethod
+    def load(self, game_id):
+        """(fen_de_start, mutări) sau None dacă jocul nu există."""
+
+    @abc.abstractmethod
+    def moves_since(self, game_id, seq):
+        """Mutările cu numărul de secvență mai mare decât `seq`, în ordine."""
+
+    @abc.abstractmethod
+    def append(self, game_id, seq, move):
+        """
+        Adaugă mutarea cu numărul `seq`; returnează False dacă alt proces a adăugat
+        deja o mutare cu acest număr. Aruncă GameNotFound dacă jocul a fost șters.
+        """
+
+    @abc.abstractmethod
+    def delete(self, game_id):
+        """Șterge jocul și mutările lui (la sfârșitul jocului)."""
+
+
+class MemoryStateStore(GameStateStore):
+    """Stocarea în memoria procesului: același comportament, fără alte procese."""
+
+    def __init__(self):
+        self._games = {}
+        self._lock = threading.Lock()
+
+    def create(self, game_id, start_fen):
+        with self._lock:
+            if game_id in self._games:
+                return False
+            self._games[game_id] = (start_fen, [])
+            return True
+
+    def load(self, game_id):
+        with self._lock:
+            saved = self._games.get(game_id)
+            return (saved[0], list(saved[1])) if saved is not None else None
+
+    def moves_since(self, game_id, seq):
+        with self._lock:
+            saved = self._games.get(game_id)
+            return saved[1][seq:] if saved is not None else []
+
+    def append(self, game_id, seq, move):
+        with self._lock:
+            saved = self._games.get(game_id)
+            if saved is None:
+                raise GameNotFound(game_id)
+            moves = saved[1]
+            if len(moves) != seq - 1:
+                return False
+            moves.append(move)
+            return True
+
+    def delete(self, game_id):
+        with self._lock:
+            self._games.pop(game_id, None)
+
+
+class DatabaseStateStore(GameStateStore):
+    """
+    Jocurile în baza de date: rândul din `multiplayer_games` (FEN-ul de start)
+    și câte un rând pe mutare în `multiplayer_moves`. Cheia primară
+    (game_id, seq) face ca dintre două procese care adaugă aceeași mutare
+    doar unul să reușească.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def create(self, game_id, start_fen):
+        query = self.db.insert_missing_query("multiplayer_games", ["game_id", "start_fen", "moves"])
+        return self.db.execute(query, (game_id, start_fen, "[]")) == 1
+
+    def load(self, game_id):
+        rows = self.db.fetchall("SELECT start_fen FROM multiplayer_games WHERE game_id = %s", (game_id,))
+        if not rows:
+            return None
+        return rows[0][0], self.moves_since(game_id, 0)
+
+    def moves_since(self, game_id, seq):
+        rows = self.db.fetchall("SELECT move FROM multiplayer_moves WHERE game_id = %s AND seq > %s ORDER BY seq",
+                                (game_id, seq))
+        return [row[0] for row in rows]
+
+    def append(self, game_id, seq, move):
+        # Mutarea este inserată doar cât timp rândul jocului există, deci un proces
+        # cu o copie veche a unui joc terminat nu lasă mutări fără joc
+        query = self.db.insert_missing_query("multiplayer_moves", ["game_id", "seq", "move"],
+                                             select_from="multiplayer_games WHERE game_id = %s")
+        if self.db.execute(query, (game_id, seq, move, game_id)) == 1:
+            return True
+        if not self.db.fetchall("SELECT 1 FROM multiplayer_games WHERE game_id = %s", (game_id,)):
+            raise GameNotFound(game_id)
+        return False
+
+    def delete(self, game_id):
+        # Rândul jocului este șters primul: o adăugare concurentă fie îl vede
+        # (și mutarea ei este ștearsă odată cu celelalte), fie nu mai inserează nimic
+        with self.db.cursor(commit=True) as cursor:
+            cursor.execute("DELETE FROM multiplayer_games WHERE game_id = %s", (game_id,))
+            cursor.execute("DELETE FROM multiplayer_moves WHERE game_id = %s", (game_id,))
+
+
+class GameStore:
+    """
+    `spill(game)` salvează un joc scos din memorie; `load(game_id)` returnează
+    (fen_de_start, mutări) sau None dacă jocul nu există; `discard(game_id)`
+    șterge copia salvată a unui joc terminat. Cu o stocare comună (`shared`),
+    jocurile sunt create, mutate, refăcute și șterse prin ea, iar
+    `spill`/`load`/`discard` nu mai sunt folosite.
+    """
+
+    def __init__(self, max_games=1000, idle_timeout=1800, spill=None, load=None, shared=None, discard=None):
+        self.max_games = max_games
+        self.idle_timeout = idle_timeout
+        self.shared = shared
+        self.spill = spill if shared is None else None
+        self.load = load if shared is None else shared.load
+        self.discard = discard if shared is None else shared.delete
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._games)
+
+    def __contains__(self, game_id):
+        return self.get(game_id) is not None
+
+    def create(self, game_id, start_fen):
+        """Creează jocul; returnează None dacă ID-ul este deja folosit (și de un joc scos din memorie)."""
+        game = LiveGame(str(game_id), start_fen)
+        if self.shared is not None:
+            if not self.shared.create(game.game_id, start_fen):
+                return None
+        elif self.load is not None and self.load(game.game_id) is not None:
+            return None
+        with self._lock:
+            if game.game_id in self._games:
+                return None
+            self._games[game.game_id] = game
+            evicted = self._evict()
+        self._spill_all(evicted)
+        return game
+
+    def create_new(self, start_fen):
+        """Creează un joc cu un ID nou (alt ID dacă cel ales la întâmplare este deja folosit)."""
+        while True:
+            game = self.create(new_game_id(), start_fen)
+            if game is not None:
+                return game
+
+    def remove(self, game_id):
+        """Scoate un joc terminat din memorie și din stocare."""
+        game_id = str(game_id)
+        with self._lock:
+            self._games.pop(game_id, None)
+        if self.discard is not None:
+            self.discard(game_id)
+
+    def refresh(self, game):
+        """
+        Cu `game.lock` ținut: adaugă la tabla jocului mutările făcute de alte
+        procese. Returnează numărul de mutări adăugate.
+        """
+        if self.shared is None:
+            return 0
+        moves = self.shared.moves_since(game.game_id, game.seq)
+        for move in moves:
+            game.board.push_uci(move)
+        return len(moves)
+
+    def play(self, game, uci):
+        """
+        Cu `game.lock` ținut: joacă mutarea primită de la client și returnează
+        numărul ei de secvență. Dacă mutarea pare ilegală sau alt proces a
+        mutat între timp, jocul este adus la zi și mutarea este verificată din
+        nou. Aruncă ValueError pentru o mutare invalidă, IllegalMove pentru
+        una ilegală și GameNotFound dacă jocul a fost terminat și șters de alt
+        proces (copia lui este scoasă și din memorie).
+        """
+        while True:
+            move = chess960.parse_move(game.board, uci)
+            if move not in game.board.legal_moves:
+                if self.refresh(game):
+                    continue
+                raise IllegalMove("Illegal move")
+            seq = game.seq + 1
+            if self.shared is not None:
+                try:
+                    appended = self.shared.append(game.game_id, seq, move.uci())
+                except GameNotFound:
+                    with self._lock:
+                        if self._games.get(game.game_id) is game:
+                            del self._games[game.game_id]
+                    raise
+                if not appended:
+                    self.refresh(game)
+                    continue
+            game.board.push(move)
+            return seq
+
+    def get(self, game_id):
+        """Returnează jocul (refăcut din stocare dacă a fost scos din memorie) sau None."""
+        game_id = str(game_id)
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is not None:
+                game.last_used = time.monotonic()
+                self._games.move_to_end(game_id)
+                return game
+
+        saved = self.load(game_id) if self.load else None
+        if saved is None:
+            return None
+        start_fen, moves = saved
+        game = LiveGame.replay(game_id, start_fen, moves)
+        with self._lock:
+            # Alt fir l-ar fi putut reface între timp
+            game = self._games.setdefault(game_id, game)
+            self._games.move_to_end(game_id)
+            evicted = self._evict()
+        self._spill_all(evicted)
+        return game
+
+    def _evict(self):
+        """Scoate jocurile inactive sau în plus. Se apelează cu `_lock` ținut."""
+        evicted = []
+        now = time.monotonic()
+        for game_id, game in list(self._games.items()):
+            too_many = len(self._games) > self.max_games
+            idle = now - game.last_used > self.idle_timeout
+            if not too_many and not idle:
+                break  # jocurile sunt ordonate după ultima folosire
+            # Un joc cu o mutare în curs rămâne în memorie
+            if not game.lock.acquire(blocking=False):
+                continue
+            try:
+                del self._games[game_id]
+                evicted.append(game)
+            finally:
+                game.lock.release()
+        return evicted
+
+    def _spill_all(self, games):
+        if self.spill is None:
+            return
+        for game in games:
+            try:
+                self.spill(game)
+            except Exception as e:
+                print(f"Error saving game {game.game_id}: {e}")  # Debugging
@@ -0,0 +1,67 @@
+"""
+Coada de mesaje prin care mai multe procese ale serverului își trimit
+evenimentele Socket.IO: un eveniment trimis unei camere de un proces ajunge
+și la clienții camerei conectați la celelalte procese.
+
+SOCKETIO_MESSAGE_QUEUE alege coada:
+- lipsă: fără coadă (un singur proces);
+- "file:///cale/catre/fisier": `FileMessageQueue`, un fișier local în care
+  procesele de pe aceeași mașină adaugă mesajele și pe care îl citesc toate
+  (pentru teste și dezvoltare; fișierul doar crește);
+- orice alt URL (de exemplu "redis://localhost:6379/0"): transmis lui
+  Flask-SocketIO, care folosește coada respectivă (necesită pachetul ei).
+"""
+import json
+import os
+import time
+
+import socketio
+
+
+class FileMessageQueue(socketio.PubSubManager):
+    """
+    Fiecare mesaj este o linie JSON adăugată la fișier cu o singură scriere
+    în modul append, deci liniile scrise de procese diferite nu se amestecă.
+    Fiecare proces citește doar mesajele scrise după pornirea lui.
+    """
+
+    name = "file"
+
+    def __init__(self, path, channel="socketio", write_only=False, poll_interval=0.01, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = path
+        self.poll_interval = poll_interval
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        # Poziția de la care începe citirea, fixată înainte de primul mesaj publicat
+        self._start = os.path.getsize(path)
+
+    def _publish(self, data):
+        line = json.dumps({"channel": self.channel, "data": data}, separators=(",", ":")) + "\n"
+        os.write(self._fd, line.encode())
+
+    def _listen(self):
+        with open(self.path, "rb") as f:
+            f.seek(self._start)
+            pending = b""
+            while True:
+                chunk = f.readline()
+                if not chunk:
+                    time.sleep(self.poll_interval)
+                    continue
+                pending += chunk
+                if not pending.endswith(b"\n"):
+                    continue  # linia este încă scrisă
+                message = json.loads(pending)
+                pending = b""
+                if message.get("channel") == self.channel:
+                    yield message["data"]
+
+
+def socketio_queue_options(url=None):
+    """Argumentele pentru SocketIO(...) care aleg coada de mesaje (vezi SOCKETIO_MESSAGE_QUEUE)."""
+    url = url if url is not None else os.environ.get("SOCKETIO_MESSAGE_QUEUE", "")
+    if not url:
+        return {}
+    if url.startswith("file://"):
+        return {"client_manager": FileMessageQueue(url[len("file://"):])}
+    return {"message_queue": url}
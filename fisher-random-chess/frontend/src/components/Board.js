@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import Chessboard from "chessboardjsx";
 import axios from "axios";
 import { Chess } from "chess.js";
@@ -12,6 +12,7 @@ const Board = () => {
   const [gameMode, setGameMode] = useState(null); // "ai" sau "friend"
   const [gameId, setGameId] = useState(null);
   const [joinInput, setJoinInput] = useState("");
+  const seqRef = useRef(0); // numărul de secvență al ultimei mutări primite
 
   // State declarations
   const [gameState, setGameState] = useState({
@@ -30,6 +31,7 @@ const Board = () => {
   });
 
   const [highlightedSquares, setHighlightedSquares] = useState({});
+  const [moveMap, setMoveMap] = useState({}); // pătrat de plecare -> pătrate de sosire
   const [learningData, setLearningData] = useState(null);
 
   // Effects
@@ -49,16 +51,28 @@ const Board = () => {
       });
   }, []);
 
+  useEffect(() => {
+    // O singură cerere pe poziție pentru toate mutările legale
+    if (!gameState.fen || gameState.fen === "start") return;
+    axios
+      .post("http://127.0.0.1:5000/api/legal_move_map", { fen: gameState.fen })
+      .then((response) => setMoveMap(response.data.moves))
+      .catch((error) => console.error("Error fetching valid moves:", error));
+  }, [gameState.fen]);
+
   useEffect(() => {
     // Evenimente WebSocket
     socket.on("game_created", (data) => {
+      seqRef.current = data.seq;
       setGameId(data.game_id);
-      setGameState({ fen: data.fen, turn: "w" });
+      setGameState({ fen: data.fen, turn: "w", moves: [] });
     });
 
     socket.on("game_joined", (data) => {
+      if (data.seq < seqRef.current) return; // starea primită este mai veche
+      seqRef.current = data.seq;
       setGameId(data.game_id);
-      setGameState({ fen: data.fen, turn: "w" });
+      setGameState({ fen: data.fen, turn: data.turn, moves: data.moves });
     });
 
     return () => {
@@ -91,52 +105,45 @@ const Board = () => {
   }, []);
 
   useEffect(() => {
-    const syncGameState = async () => {
-      if (!gameId) return;
-
-      try {
-        const response = await axios.get(
-          `http://127.0.0.1:5000/api/game_state/${gameId}`
-        );
-        if (response.data.status === "success") {
-          setGameState((prev) => ({
-            ...prev,
-            fen: response.data.fen,
-            turn: response.data.turn,
-            moves: response.data.moves,
-          }));
-        }
-      } catch (error) {
-        console.error("Error syncing game state:", error);
+    if (!gameId) return;
+    const resync = () =>
+      socket.emit("resync", { game_id: gameId, seq: seqRef.current });
+
+    // Serverul trimite doar mutarea nouă, cu numărul ei de secvență
+    socket.on("move_delta", (data) => {
+      if (data.game_id !== gameId || data.seq <= seqRef.current) return; // mutare deja primită
+      if (data.seq > seqRef.current + 1) {
+        resync(); // au fost pierdute mutări
+        return;
       }
-    };
-
-    const interval = setInterval(syncGameState, 2000); // Sincronizare la fiecare 2 secunde
-    return () => clearInterval(interval); // Curăță intervalul la demontarea componentei
-  }, [gameId]);
+      seqRef.current = data.seq;
+      setGameState((prev) => ({
+        ...prev,
+        fen: data.fen,
+        turn: data.turn,
+        moves: [...(prev.moves || []), data.move],
+      }));
+    });
 
-  useEffect(() => {
-    socket.on("sync_game", (data) => {
-      if (data.game_id === gameId) {
-        // Sincronizează starea jocului
-        axios
-          .get(`http://127.0.0.1:5000/api/game_state/${gameId}`)
-          .then((response) => {
-            if (response.data.status === "success") {
-              setGameState((prev) => ({
-                ...prev,
-                fen: response.data.fen,
-                turn: response.data.turn,
-                moves: response.data.moves,
-              }));
-            }
-          })
-          .catch((error) => console.error("Error syncing game state:", error));
-      }
+    // Răspunsul la resync: mutările de după `since`
+    socket.on("game_state", (data) => {
+      if (data.game_id !== gameId || data.seq < seqRef.current) return;
+      seqRef.current = data.seq;
+      setGameState((prev) => ({
+        ...prev,
+        fen: data.fen,
+        turn: data.turn,
+        moves: [...(prev.moves || []).slice(0, data.since), ...data.moves],
+      }));
     });
 
+    // După o reconectare pot lipsi mutări
+    socket.on("connect", resync);
+
     return () => {
-      socket.off("sync_game");
+      socket.off("move_delta");
+      socket.off("game_state");
+      socket.off("connect", resync);
     };
   }, [gameId]);
 
@@ -155,34 +162,23 @@ const Board = () => {
     }
   };
 
-  const fetchValidMoves = async (square) => {
-    try {
-      const response = await axios.post(
-        "http://127.0.0.1:5000/api/legal_moves",
-        {
-          fen: gameState.fen,
-          square,
-        }
-      );
-
-      const newHighlightedSquares = response.data.moves.reduce(
-        (acc, move) => ({
-          ...acc,
-          [move]: {
-            background: "rgba(255, 255, 0, 0.4)",
-            borderRadius: "50%",
-          },
-        }),
-        {}
-      );
+  const showValidMoves = (square) => {
+    const newHighlightedSquares = (moveMap[square] || []).reduce(
+      (acc, move) => ({
+        ...acc,
+        [move]: {
+          background: "rgba(255, 255, 0, 0.4)",
+          borderRadius: "50%",
+        },
+      }),
+      {}
+    );
 
-      setHighlightedSquares(newHighlightedSquares);
-    } catch (error) {
-      console.error("Error fetching valid moves:", error);
-    }
+    setHighlightedSquares(newHighlightedSquares);
   };
 
   const startMultiplayerGame = () => {
+    seqRef.current = 0;
     socket.emit("create_game");
   };
 
@@ -191,6 +187,7 @@ const Board = () => {
       alert("Please enter a valid Game ID.");
       return;
     }
+    seqRef.current = 0;
     setGameId(joinInput);
     socket.emit("join_game", { game_id: joinInput });
   };
@@ -266,7 +263,7 @@ const Board = () => {
     try {
       const chess = new Chess(gameState.fen);
       if (chess.get(square)) {
-        fetchValidMoves(square);
+        showValidMoves(square);
       }
     } catch (error) {
       console.error("Error checking piece:", error);